@@ -1,12 +1,15 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, url_for
 from flask_cors import CORS
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-import threading
+import atexit
+import json
+import queue
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 import sys
 import os
 from dotenv import load_dotenv
+from driver_pool import DriverPoolTimeout
+from browser_manager import BrowserManager, BROWSER_INSTANCES, BROWSER_TABS, BROWSER_PREWARM_TABS
 
 # Load environment variables for FedEx API
 load_dotenv()
@@ -14,90 +17,23 @@ load_dotenv()
 # Add current dir to path just in case
 sys.path.append(os.getcwd())
 
-try:
-    from geopy.geocoders import Nominatim
-    from geopy.exc import GeocoderTimedOut, GeocoderServiceError
-except ImportError:
-    print("Warning: geopy not installed. Map coordinates will not be generated.")
-    Nominatim = None
-    
-import time as time_module
-
-# Initialize geocoder
-geolocator = None
-if Nominatim:
-    geolocator = Nominatim(user_agent="fedex_tracking_app")
-
-def geocode_location(location_name, max_retries=3):
-    """
-    Convert location name to coordinates with retry logic
-    Returns: dict with lat and lng, or None if failed
-    """
-    if not geolocator or not location_name or location_name == 'N/A':
-        return None
-    
-    for attempt in range(max_retries):
-        try:
-            location = geolocator.geocode(location_name, timeout=10)
-            if location:
-                return {
-                    "lat": location.latitude,
-                    "lng": location.longitude
-                }
-            return None
-        except (GeocoderTimedOut, GeocoderServiceError) as e:
-            if attempt < max_retries - 1:
-                time_module.sleep(1)
-                continue
-            print(f"Geocoding failed for {location_name}: {str(e)}")
-            return None
-    return None
-
-# Import functions 
-# Note: Using generic try/except to allow partial functionality if some scripts break
-try:
-    from update_atlantic_tracking import get_atlantic_tracking_details
-except ImportError:
-    print("Could not import Atlantic script")
-
-try:
-    from update_courierwala_tracking import get_courierwala_tracking_details
-except ImportError:
-    print("Could not import Courier Wala script")
-    
-try:
-    from update_dhl_tracking import get_dhl_tracking_details
-except ImportError:
-    print("Could not import DHL script")
-    
-try:
-    # Use new FedEx REST API instead of Selenium
-    from fedex_api import track_shipment as fedex_track_shipment
-    USE_FEDEX_API = True
-    print("✓ FedEx REST API loaded successfully")
-except ImportError:
-    USE_FEDEX_API = False
-    try:
-        # Fallback to old Selenium method
-        from update_fedex_tracking import get_fedex_tracking_details
-        print("⚠️ Using legacy Selenium FedEx tracking (API not available)")
-    except ImportError:
-        print("Could not import FedEx tracking")
-
-try:
-    from update_icl_tracking import get_icl_tracking_details
-except ImportError:
-    print("Could not import ICL script")
+from providers import PROVIDERS, get_provider, resolve_provider_name, group_by_provider, chunked
+from cache import TrackingCache, normalize_awb
+from singleflight import SingleFlight
+from jobs import TrackingJobQueue
+from geocoding import geocode_many, geocode_stats, build_route
+from wait_engine import latency_report
+from http_tracking import http_engine
+from browser_profile import apply_resource_blocking
+from warm_slots import warm_slots_for
+from xhr_capture import capture_stats
+from session_state import session_stats
 
 try:
-    from update_pxc_tracking import get_pxc_tracking_details
+    from fedex_api.token_manager import token_manager as fedex_token_manager
+    from fedex_api.rate_limit import fedex_limiter
 except ImportError:
-    print("Could not import PXC script")
-
-try:
-    from update_united_tracking import get_united_tracking_details
-except ImportError:
-    print("Could not import United Express script")
+    fedex_token_manager = fedex_limiter = None
 
 app = Flask(__name__)
 
@@ -111,54 +47,111 @@ CORS(app, resources={
     }
 })
 
-driver = None
-driver_lock = threading.Lock()
+# Browser-backed lookups run in parallel as tabs of a few shared Chrome
+# instances (BROWSER_INSTANCES x BROWSER_TABS slots), recycled in the
+# background by page loads, age and memory (BROWSER_MAX_* settings)
+driver_pool = BrowserManager(
+    browsers=BROWSER_INSTANCES,
+    tabs_per_browser=BROWSER_TABS,
+    checkout_timeout=float(os.getenv('DRIVER_CHECKOUT_TIMEOUT', '30')),
+    prewarm=BROWSER_PREWARM_TABS
+)
+atexit.register(driver_pool.close)
+atexit.register(http_engine.close)
 
-def get_driver():
-    global driver
-    try:
-        # Test if existing driver is still alive
-        if driver is not None:
-            driver.current_url  # This will throw if driver is dead
-            return driver
-    except:
-        print("Driver is dead, recreating...")
-        driver = None
-    
-    print("Initializing Chrome Driver...")
-    chrome_options = Options()
-    
-    # Headless mode
-    chrome_options.add_argument('--headless=new')
-    chrome_options.add_argument('--disable-gpu')
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('--disable-dev-shm-usage')  # Important for Docker
-    chrome_options.add_argument('--disable-software-rasterizer')
-    chrome_options.add_argument('--window-size=1920,1080')
-    chrome_options.add_argument('--no-zygote')
-    chrome_options.add_argument('--disable-features=VizDisplayCompositor')
-    
-    # Memory optimization
-    chrome_options.add_argument('--disable-extensions')
-    chrome_options.add_argument('--disable-setuid-sandbox')
-    chrome_options.add_argument('--single-process')  # Use single process
-    chrome_options.add_argument('--disable-dev-tools')
-    
-    # Stealth mode
-    chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-    chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    chrome_options.add_experimental_option('useAutomationExtension', False)
+# Tabs parked on form-based providers' tracking pages (WARM_SLOT_PROVIDERS),
+# taken out of the pool above and re-parked in the background after each use
+warm_slots = warm_slots_for(driver_pool, PROVIDERS)
+atexit.register(warm_slots.close)
+
+# Status-aware result cache; set TRACKING_CACHE_DB to keep results across restarts
+tracking_cache = TrackingCache(
+    max_entries=int(os.getenv('TRACKING_CACHE_SIZE', '500')),
+    db_path=os.getenv('TRACKING_CACHE_DB') or None
+)
+
+# Duplicate in-flight lookups for the same (provider, AWB) share one scrape
+inflight_lookups = SingleFlight()
+
+# Background workers for POST /track/jobs; more workers than browsers is fine,
+# extra jobs simply wait in the driver pool instead of holding HTTP requests
+tracking_jobs = TrackingJobQueue(
+    workers=int(os.getenv('TRACKING_JOB_WORKERS', '4')),
+    retention=int(os.getenv('TRACKING_JOB_RETENTION', '3600'))
+)
+atexit.register(tracking_jobs.shutdown)
+
+# Bulk tracking limits for POST /track/batch
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '250'))
+BATCH_WORKERS_PER_PROVIDER = int(os.getenv('BATCH_WORKERS_PER_PROVIDER', '3'))
+# Batch items queue for a browser instead of failing fast like /track
+BATCH_CHECKOUT_TIMEOUT = float(os.getenv('BATCH_CHECKOUT_TIMEOUT', '300'))
+
+def run_provider(tracker, awb, checkout_timeout=None):
+    """
+    Run a provider lookup. Only browser-backed providers check a driver out
+    of the pool; REST/HTTP providers never wait on or launch Chrome, and
+    HTTP-first providers only do when the HTTP path comes back empty.
+    A ready warm slot skips loading the provider's form.
+    """
+    if tracker.http_track:
+        result = tracker.http_track(awb)
+        if result is not None:
+            return result
+
+    if not tracker.needs_browser:
+        return tracker.track(awb)
+
+    with warm_slots.checkout(tracker.name) as tab:
+        if tab is not None:
+            return tracker.track(awb, tab, prepared=True)
     
-    try:
-        driver = webdriver.Chrome(options=chrome_options)
-        # Hide webdriver flag
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        print("✅ Chrome driver initialized successfully")
-        return driver
-    except Exception as e:
-        print(f"❌ Failed to initialize Chrome driver: {str(e)}")
-        raise
+    with driver_pool.checkout(timeout=checkout_timeout) as drv:
+        apply_resource_blocking(drv, tracker.name)
+        return tracker.track(awb, drv)
+
+def run_provider_many(tracker, awbs, checkout_timeout=None):
+    """
+    Look up several AWBs of a ``track_many`` provider with one page load
+    (or one API request), caching each result.
+    Returns: {awb: result}; AWBs the page had nothing for are left out
+    """
+    if not tracker.needs_browser:
+        results = tracker.track_many(awbs)
+    else:
+        with driver_pool.checkout(timeout=checkout_timeout) as drv:
+            apply_resource_blocking(drv, tracker.name)
+            results = tracker.track_many(awbs, drv)
+    for awb, result in results.items():
+        tracking_cache.put(tracker.name, awb, result)
+    return results
+
+def _load_and_cache(tracker, awb, checkout_timeout=None):
+    result = run_provider(tracker, awb, checkout_timeout=checkout_timeout)
+    tracking_cache.put(tracker.name, awb, result)
+    return result
+
+def fetch_tracking(tracker, awb, refresh=False, checkout_timeout=None):
+    """
+    Cached, coalesced provider lookup.
+    
+    Returns: (result, cache_info) where cache_info reports hit/miss, the
+    age of the result in seconds, and whether it was shared with a
+    concurrent request for the same AWB
+    """
+    if not refresh:
+        cached = tracking_cache.get(tracker.name, awb)
+        if cached is not None:
+            result, age = cached
+            print(f"⚡ Cache hit: {tracker.name} {awb} ({age:.0f}s old)")
+            return result, {"hit": True, "age": round(age, 1), "coalesced": False}
+    
+    key = (tracker.name, normalize_awb(awb))
+    result, shared = inflight_lookups.do(key, _load_and_cache, tracker, awb,
+                                         checkout_timeout=checkout_timeout)
+    if shared:
+        print(f"🔗 Coalesced with in-flight lookup: {tracker.name} {awb}")
+    return result, {"hit": False, "age": 0, "coalesced": shared}
 
 @app.route('/', methods=['GET'])
 def health_check():
@@ -169,165 +162,174 @@ def health_check():
         "version": "1.0.0",
         "endpoints": {
             "/": "Health check",
-            "/track": "POST - Track shipment (requires awb and provider)"
-        }
+            "/track": "POST - Track shipment (requires awb and provider, optional refresh)",
+            "/track/jobs": "POST - Queue a tracking lookup, returns a job id",
+            "/track/jobs/<job_id>": "GET - Poll a queued tracking lookup",
+            "/track/batch": "POST - Track a list of {awb, provider} items, streamed as NDJSON"
+        },
+        "driver_pool": driver_pool.stats(),
+        "tracking_cache": tracking_cache.stats(),
+        "inflight_lookups": inflight_lookups.stats(),
+        "tracking_jobs": tracking_jobs.stats(),
+        "geocode_cache": geocode_stats(),
+        "wait_latency": latency_report(),
+        "http_tracking": http_engine.stats(),
+        "warm_slots": warm_slots.stats(),
+        "xhr_capture": capture_stats.report(),
+        "session_state": session_stats(),
+        "fedex_token": fedex_token_manager.stats() if fedex_token_manager else None,
+        "fedex_rate": fedex_limiter.stats() if fedex_limiter else None
     }), 200
 
+def build_tracking_response(tracker, awb, refresh=False, checkout_timeout=None):
+    """
+    Look up an AWB and normalize the provider result for the frontend,
+    including geocoded coordinates and the route for the map.
+
+    Geocoding happens after fetch_tracking has returned its browser to the
+    pool, so slow map lookups never hold a driver.
+    """
+    result, cache_info = fetch_tracking(tracker, awb, refresh=refresh,
+                                        checkout_timeout=checkout_timeout)
+    return format_tracking_response(tracker, awb, result, cache_info)
+
+def format_tracking_response(tracker, awb, result, cache_info):
+    """Normalize a provider result for the frontend (see build_tracking_response)"""
+    # Normalize result structure for Frontend
+    origin_location = result.get('origin')
+    destination_location = result.get('destination')
+    timeline = result.get('timeline', [])
+    
+    # --- VALIDATION: Filter out bad scrapes (e.g. Timezones caught as locations) ---
+    invalid_keywords = ['GMT', 'Casablanca', 'Monrovia', 'Reykjavik', 'Time Zone', 'Privacy', 'Terms', 'DELIVERY STATUS', 'Label Created']
+    
+    if origin_location and any(k in str(origin_location) for k in invalid_keywords):
+        print(f"⚠️ Discarding invalid origin: {origin_location}")
+        origin_location = None
+        
+    if destination_location and any(k in str(destination_location) for k in invalid_keywords):
+        print(f"⚠️ Discarding invalid destination: {destination_location}")
+        destination_location = None
+    # ---------------------------------------------------------------------------
+
+    print(f"DEBUG - Initial origin: {origin_location}, destination: {destination_location}")
+    print(f"DEBUG - Timeline has {len(timeline)} events")
+
+    # Fallback: Try to infer Origin/Destination from Timeline if missing
+    if (not origin_location or origin_location == 'N/A' or str(origin_location) == 'None') and timeline:
+        # Use the location of the oldest event (last in list)
+        # We need to find the first NON-EMPTY location from the end
+        for event in reversed(timeline):
+            loc = event.get('location')
+            if loc and len(loc) > 3:
+                origin_location = loc
+                print(f"DEBUG - Extracted origin from timeline: {origin_location}")
+                break
+    
+    if (not destination_location or destination_location == 'N/A' or str(destination_location) == 'None') and timeline:
+        # Use the location of the newest event (first in list)
+        # Iterate to find the first valid location from the top
+        for event in timeline:
+            loc = event.get('location')
+            # VALIDATE the fallback location too
+            if (loc and len(loc) > 3 and 
+                not any(k in str(loc) for k in invalid_keywords)):
+                destination_location = loc
+                print(f"DEBUG - Extracted destination from timeline: {destination_location}")
+                break
+    
+    print(f"DEBUG - Final origin: {origin_location}, destination: {destination_location}")
+
+    # Geocode origin, destination and every distinct timeline stop in one batch
+    stop_locations = [
+        event.get('location') for event in timeline
+        if event.get('location') and not any(k in str(event.get('location')) for k in invalid_keywords)
+    ]
+    coords_by_name = geocode_many([origin_location, destination_location] + stop_locations)
+    origin_coords = coords_by_name.get(origin_location)
+    destination_coords = coords_by_name.get(destination_location)
+    
+    print(f"DEBUG - Origin coords: {origin_coords}, Destination coords: {destination_coords}")
+    
+    # Build coordinates object if both locations are geocoded
+    coordinates = None
+    if origin_coords and destination_coords:
+        coordinates = {
+            "origin": origin_coords,
+            "destination": destination_coords
+        }
+        print(f"DEBUG - Coordinates object created successfully")
+
+    route = build_route(timeline, coords_by_name)
+    # Copies, so the cached provider result isn't modified
+    timeline = [dict(event, coordinates=coords_by_name.get(event.get('location'))) for event in timeline]
+    
+    response = {
+        "awb": result.get('awb', awb),
+        "status": result.get('status', 'Unknown'),
+        "origin": origin_location if origin_location else 'N/A',
+        "destination": destination_location if destination_location else 'N/A',
+        "service": tracker.name,
+        "weight": result.get('weight', 'N/A'),
+        "estimatedDelivery": result.get('delivery_date', result.get('delivery_date_time', 'N/A')),
+        "timeline": timeline,
+        "coordinates": coordinates,
+        "route": route,
+        "cache": cache_info
+    }
+    
+    return response
+
+def parse_track_request(req_data):
+    """
+    Validate a tracking request body.
+    
+    Returns: (awb, provider, tracker, error_response) - error_response is
+    None when the request is valid
+    """
+    req_data = req_data or {}
+    awb = str(req_data.get('awb')).strip()
+    provider = req_data.get('provider')
+    
+    if not awb or not provider:
+        return awb, provider, None, (jsonify({"error": "Missing AWB or Provider"}), 400)
+        
+    tracker = get_provider(provider)
+    if tracker is None:
+        return awb, provider, None, (jsonify({"error": "Unknown Provider - logic not implemented"}), 400)
+    
+    return awb, provider, tracker, None
+
 @app.route('/track', methods=['POST'])
 def track():
     req_data = request.json
-    awb = str(req_data.get('awb')).strip()
-    provider = req_data.get('provider')
+    awb, provider, tracker, error_response = parse_track_request(req_data)
+    refresh = bool((req_data or {}).get('refresh', False))
     
     print(f"🚀 Tracking Request: AWB={awb}, Provider={provider}")
     
-    if not awb or not provider:
-        return jsonify({"error": "Missing AWB or Provider"}), 400
-        
-    result = {}
+    if error_response:
+        return error_response
     
     try:
-        with driver_lock:
-            drv = get_driver()
-            
-            if provider == 'Atlantic':
-                result = get_atlantic_tracking_details(awb, drv)
-            elif provider == 'Courier Wala':
-                result = get_courierwala_tracking_details(awb, drv)
-            elif provider == 'DHL':
-                result = get_dhl_tracking_details(awb, drv)
-            elif provider == 'FedEx':
-                if USE_FEDEX_API:
-                    # Use new REST API (no Selenium driver needed)
-                    api_result = fedex_track_shipment(awb)
-                    
-                    # Transform API response to match expected format
-                    if api_result.get('success'):
-                        result = {
-                            "awb": awb,
-                            "status": api_result.get('status', 'Unknown'),
-                            "origin": f"{api_result.get('origin', {}).get('city', '')}, {api_result.get('origin', {}).get('state', '')}".strip(', '),
-                            "destination": f"{api_result.get('destination', {}).get('city', '')}, {api_result.get('destination', {}).get('state', '')}".strip(', '),
-                            "timeline": [
-                                {
-                                    "date_time": event.get('timestamp', ''),
-                                    "activity": event.get('status', ''),
-                                    "location": f"{event.get('location', {}).get('city', '')}, {event.get('location', {}).get('state', '')}".strip(', ')
-                                }
-                                for event in api_result.get('events', [])
-                            ]
-                        }
-                    else:
-                        result = {
-                            "awb": awb,
-                            "status": "Error",
-                            "origin": "",
-                            "destination": "",
-                            "timeline": [],
-                            "error": api_result.get('error', 'Unknown error')
-                        }
-                else:
-                    # Fallback to Selenium
-                    result = get_fedex_tracking_details(awb, drv)
-            elif provider == 'ICL':
-                result = get_icl_tracking_details(awb, drv)
-            elif provider == 'PXC Pacific':
-                result = get_pxc_tracking_details(awb, drv)
-            elif provider == 'United Express':
-                result = get_united_tracking_details(awb, drv)
-            else:
-                return jsonify({"error": "Unknown Provider - logic not implemented"}), 400
-            
-            # Normalize result structure for Frontend
-            origin_location = result.get('origin')
-            destination_location = result.get('destination')
-            timeline = result.get('timeline', [])
-            
-            # --- VALIDATION: Filter out bad scrapes (e.g. Timezones caught as locations) ---
-            invalid_keywords = ['GMT', 'Casablanca', 'Monrovia', 'Reykjavik', 'Time Zone', 'Privacy', 'Terms', 'DELIVERY STATUS', 'Label Created']
-            
-            if origin_location and any(k in str(origin_location) for k in invalid_keywords):
-                print(f"⚠️ Discarding invalid origin: {origin_location}")
-                origin_location = None
-                
-            if destination_location and any(k in str(destination_location) for k in invalid_keywords):
-                print(f"⚠️ Discarding invalid destination: {destination_location}")
-                destination_location = None
-            # ---------------------------------------------------------------------------
-
-            print(f"DEBUG - Initial origin: {origin_location}, destination: {destination_location}")
-            print(f"DEBUG - Timeline has {len(timeline)} events")
-
-            # Fallback: Try to infer Origin/Destination from Timeline if missing
-            if (not origin_location or origin_location == 'N/A' or str(origin_location) == 'None') and timeline:
-                # Use the location of the oldest event (last in list)
-                # We need to find the first NON-EMPTY location from the end
-                for event in reversed(timeline):
-                    loc = event.get('location')
-                    if loc and len(loc) > 3:
-                        origin_location = loc
-                        print(f"DEBUG - Extracted origin from timeline: {origin_location}")
-                        break
-            
-            if (not destination_location or destination_location == 'N/A' or str(destination_location) == 'None') and timeline:
-                # Use the location of the newest event (first in list)
-                # Iterate to find the first valid location from the top
-                for event in timeline:
-                    loc = event.get('location')
-                    # VALIDATE the fallback location too
-                    if (loc and len(loc) > 3 and 
-                        not any(k in str(loc) for k in invalid_keywords)):
-                        destination_location = loc
-                        print(f"DEBUG - Extracted destination from timeline: {destination_location}")
-                        break
-            
-            print(f"DEBUG - Final origin: {origin_location}, destination: {destination_location}")
-
-            # Geocode locations for map
-            origin_coords = geocode_location(origin_location)
-            destination_coords = geocode_location(destination_location)
-            
-            print(f"DEBUG - Origin coords: {origin_coords}, Destination coords: {destination_coords}")
-            
-            # Build coordinates object if both locations are geocoded
-            coordinates = None
-            if origin_coords and destination_coords:
-                coordinates = {
-                    "origin": origin_coords,
-                    "destination": destination_coords
-                }
-                print(f"DEBUG - Coordinates object created successfully")
-            
-            response = {
-                "awb": result.get('awb', awb),
-                "status": result.get('status', 'Unknown'),
-                "origin": origin_location if origin_location else 'N/A',
-                "destination": destination_location if destination_location else 'N/A',
-                "service": provider,
-                "weight": result.get('weight', 'N/A'),
-                "estimatedDelivery": result.get('delivery_date', result.get('delivery_date_time', 'N/A')),
-                "timeline": timeline,
-                "coordinates": coordinates
-            }
-            
-            return jsonify(response)
-            
+        return jsonify(build_tracking_response(tracker, awb, refresh=refresh))
+        
+    except DriverPoolTimeout as e:
+        print(f"⏳ Driver pool exhausted: {str(e)}")
+        response = jsonify({
+            "error": "Tracking service busy",
+            "message": str(e),
+            "awb": awb,
+            "provider": provider
+        })
+        response.headers['Retry-After'] = '5'
+        return response, 503
+
     except Exception as e:
         error_msg = str(e)
         print(f"❌ Tracking Error: {error_msg}")
         traceback.print_exc()
         
-        # If it's a Selenium error, reset the driver
-        if 'invalid session id' in error_msg.lower() or 'session deleted' in error_msg.lower():
-            print("🔄 Selenium session error detected, resetting driver...")
-            global driver
-            try:
-                if driver:
-                    driver.quit()
-            except:
-                pass
-            driver = None
-            
         return jsonify({
             "error": "Tracking failed",
             "message": error_msg,
@@ -335,6 +337,184 @@ def track():
             "provider": provider
         }), 500
 
+@app.route('/track/jobs', methods=['POST'])
+def create_tracking_job():
+    """Queue a tracking lookup and return its job id immediately"""
+    req_data = request.json
+    awb, provider, tracker, error_response = parse_track_request(req_data)
+    refresh = bool((req_data or {}).get('refresh', False))
+    
+    print(f"📥 Tracking Job Request: AWB={awb}, Provider={provider}")
+    
+    if error_response:
+        return error_response
+    
+    try:
+        job = tracking_jobs.submit(
+            build_tracking_response, tracker, awb, refresh=refresh,
+            meta={"awb": awb, "provider": provider}
+        )
+    except RuntimeError as e:
+        return jsonify({"error": "Tracking service busy", "message": str(e)}), 503
+    
+    poll_url = url_for('get_tracking_job', job_id=job['job_id'])
+    job['poll'] = poll_url
+    return jsonify(job), 202, {'Location': poll_url}
+
+@app.route('/track/jobs/<job_id>', methods=['GET'])
+def get_tracking_job(job_id):
+    """Poll a tracking job: queued, running, done (with result) or failed"""
+    job = tracking_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job id", "job_id": job_id}), 404
+    return jsonify(job)
+
+def _track_batch_item(item, refresh, prefetched=None):
+    """
+    Track one batch item; always returns an NDJSON-ready dict.
+    ``prefetched``: (result, cache_info) from a multi-number lookup
+    """
+    line = {"index": item['index'], "awb": item['awb'], "provider": item['provider']}
+    try:
+        if prefetched:
+            line["result"] = format_tracking_response(item['tracker'], item['awb'], *prefetched)
+        else:
+            line["result"] = build_tracking_response(
+                item['tracker'], item['awb'], refresh=refresh,
+                checkout_timeout=BATCH_CHECKOUT_TIMEOUT
+            )
+        line["ok"] = True
+    except Exception as e:
+        print(f"❌ Batch item {item['awb']} ({item['provider']}) failed: {str(e)}")
+        line["ok"] = False
+        line["error"] = "Tracking failed"
+        line["message"] = str(e)
+    return line
+
+def _track_batch_chunk(items, refresh, deliver):
+    """
+    Track up to ``max_batch`` items of one provider with a single
+    multi-number lookup. Cached items are served from the cache, and items
+    the lookup had no result for are tracked one at a time.
+    """
+    tracker = items[0]['tracker']
+    pending = []
+    for item in items:
+        if not refresh and tracking_cache.get(tracker.name, item['awb']) is not None:
+            deliver(_track_batch_item(item, refresh))
+        else:
+            pending.append(item)
+    
+    found = {}
+    if len(pending) > 1:
+        try:
+            found = run_provider_many(tracker, [item['awb'] for item in pending],
+                                      checkout_timeout=BATCH_CHECKOUT_TIMEOUT)
+        except Exception as e:
+            print(f"⚠️ {tracker.name} multi-number lookup failed, tracking one at a time: {str(e)}")
+    
+    cache_info = {"hit": False, "age": 0, "coalesced": False, "batched": len(pending)}
+    for item in pending:
+        prefetched = (found[item['awb']], cache_info) if item['awb'] in found else None
+        deliver(_track_batch_item(item, refresh, prefetched))
+
+def _run_provider_group(items, refresh, results):
+    """
+    Track one provider's items with a few parallel workers, like
+    process_provider_batch; providers with ``track_many`` get chunks of
+    ``max_batch`` AWBs per page load instead of one each.
+    Every item gets exactly one line on ``results``, an error line if its
+    worker failed before producing one, so the stream always completes.
+    """
+    tracker = items[0]['tracker']
+    delivered = set()
+    
+    def deliver(line):
+        delivered.add(line["index"])
+        results.put(line)
+    
+    try:
+        if tracker.track_many and tracker.max_batch > 1 and len(items) > 1:
+            chunks = chunked(items, tracker.max_batch)
+            with ThreadPoolExecutor(max_workers=min(BATCH_WORKERS_PER_PROVIDER, len(chunks))) as executor:
+                for chunk in chunks:
+                    executor.submit(_track_batch_chunk, chunk, refresh, deliver)
+            return
+        
+        workers = min(BATCH_WORKERS_PER_PROVIDER, len(items))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for item in items:
+                future = executor.submit(_track_batch_item, item, refresh)
+                future.add_done_callback(lambda f: deliver(f.result()))
+    finally:
+        for item in items:
+            if item['index'] not in delivered:
+                print(f"❌ Batch item {item['awb']} ({item['provider']}) got no result")
+                results.put({
+                    "index": item['index'], "awb": item['awb'], "provider": item['provider'],
+                    "ok": False, "error": "Tracking failed", "message": "Lookup did not complete"
+                })
+
+@app.route('/track/batch', methods=['POST'])
+def track_batch():
+    """
+    Track many shipments in one request.
+    
+    Body: {"items": [{"awb": ..., "provider": ...}, ...], "refresh": false}
+    Streams one JSON object per line as each lookup completes (not in input
+    order); every line carries the item's input index.
+    """
+    req_data = request.json or {}
+    raw_items = req_data.get('items') if isinstance(req_data, dict) else req_data
+    refresh = isinstance(req_data, dict) and bool(req_data.get('refresh', False))
+    
+    if not isinstance(raw_items, list) or not raw_items:
+        return jsonify({"error": "Expected a non-empty list of {awb, provider} items"}), 400
+    if len(raw_items) > BATCH_MAX_ITEMS:
+        return jsonify({"error": f"Too many items (max {BATCH_MAX_ITEMS})"}), 400
+    
+    print(f"📦 Batch Tracking Request: {len(raw_items)} items")
+    
+    # Validate up front; invalid items are reported without being tracked
+    rejected = []
+    shipments = []
+    for index, raw in enumerate(raw_items):
+        raw = raw if isinstance(raw, dict) else {}
+        awb = str(raw.get('awb') or '').strip()
+        provider = raw.get('provider')
+        try:
+            tracker = get_provider(resolve_provider_name(provider)) if awb and provider else None
+        except ValueError:
+            tracker = None
+        
+        if tracker is None:
+            rejected.append({
+                "index": index, "awb": awb, "provider": provider, "ok": False,
+                "error": "Missing AWB or Provider" if not awb or not provider else "Unknown Provider"
+            })
+        else:
+            shipments.append({"index": index, "awb": awb, "provider": tracker.name, "tracker": tracker})
+    
+    provider_groups = group_by_provider(shipments)
+    results = queue.Queue()
+    
+    # Fan out across providers; each provider group gets its own workers
+    fan_out = ThreadPoolExecutor(max_workers=max(1, len(provider_groups)))
+    for items in provider_groups.values():
+        fan_out.submit(_run_provider_group, items, refresh, results)
+    
+    def generate():
+        try:
+            for line in rejected:
+                yield json.dumps(line) + "\n"
+            for _ in range(len(shipments)):
+                yield json.dumps(results.get(), default=str) + "\n"
+        finally:
+            # Client may disconnect early; remaining lookups still fill the cache
+            fan_out.shutdown(wait=False)
+    
+    return Response(generate(), mimetype='application/x-ndjson')
+
 @app.route('/api/shipments', methods=['GET'])
 def get_shipments():
     """Endpoint to get all shipments from DataSet.xlsx for dashboards"""
@@ -16,7 +16,6 @@ from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 import traceback
 import os
-from collections import defaultdict
 from dotenv import load_dotenv
 
 # Load environment variables for FedEx API
@@ -30,10 +29,15 @@ from update_fedex_tracking import get_fedex_tracking_details  # Selenium fallbac
 from update_icl_tracking import get_icl_tracking_details
 from update_pxc_tracking import get_pxc_tracking_details
 from update_united_tracking import get_united_tracking_details
+from providers import PROVIDERS, resolve_provider_name, group_by_provider, chunked, fedex_api_to_tracking_result
+from wait_engine import print_latency_report
+from browser_profile import apply_page_load_strategy, apply_resource_blocking, apply_multi_tab_flags
+from browser_manager import BrowserManager
+from xhr_capture import apply_network_capture
 
 # Try to import FedEx REST API
 try:
-    from fedex_api import track_shipment as fedex_api_track
+    from fedex_api import track_shipment as fedex_api_track, track_many as fedex_api_track_many
     USE_FEDEX_API = True
     print("✓ FedEx REST API enabled for batch processing")
 except ImportError:
@@ -41,45 +45,32 @@ except ImportError:
     print("⚠️ FedEx REST API not available, using Selenium fallback")
 
 # Provider mapping - handles all Excel variations
+PROVIDER_FUNCTIONS = {
+    'Atlantic': get_atlantic_tracking_details,
+    'Courier Wala': get_courierwala_tracking_details,
+    'DHL': get_dhl_tracking_details,
+    'FedEx': get_fedex_tracking_details,
+    'ICL': get_icl_tracking_details,
+    'PXC Pacific': get_pxc_tracking_details,
+    'United Express': get_united_tracking_details
+}
+
 def get_provider_function(provider_name):
     """
     Map Excel provider names to tracking functions
     Handles variations like 'COURIER WALA' vs 'COURIERWALA', FEDEX(ICL), etc.
     """
-    provider_upper = str(provider_name).upper().strip()
-    
-    # Atlantic
-    if 'ATLANTIC' in provider_upper:
-        return get_atlantic_tracking_details
-    
-    # Courier Wala (handles both with and without space)
-    if 'COURIER' in provider_upper and 'WALA' in provider_upper:
-        return get_courierwala_tracking_details
-    
-    # DHL
-    if provider_upper == 'DHL':
-        return get_dhl_tracking_details
-    
-    # FedEx - handles FEDEX(564), FEDEX(3026), etc.
-    if 'FEDEX' in provider_upper and 'ICL' not in provider_upper:
-        return get_fedex_tracking_details
-    
-    # ICL - handles FEDEX(ICL)
-    if 'ICL' in provider_upper:
-        return get_icl_tracking_details
-    
-    # PXC Pacific
-    if 'PXC' in provider_upper:
-        return get_pxc_tracking_details
-    
-    # United Express (handles both with and without space)
-    if 'UNITED' in provider_upper:
-        return get_united_tracking_details
-    
-    raise ValueError(f"Unknown provider: {provider_name}")
+    return PROVIDER_FUNCTIONS[resolve_provider_name(provider_name)]
 
 CHECKPOINT_FILE = 'batch_processing_checkpoint.json'
 
+# Browser slots shared by all providers: BATCH_BROWSERS Chrome instances
+# with BATCH_TABS_PER_BROWSER tabs each
+BATCH_BROWSERS = int(os.getenv('BATCH_BROWSERS', '2'))
+BATCH_TABS_PER_BROWSER = int(os.getenv('BATCH_TABS_PER_BROWSER', '6'))
+# How long a worker waits for a free tab (seconds)
+BATCH_CHECKOUT_TIMEOUT = float(os.getenv('BATCH_TAB_CHECKOUT_TIMEOUT', '600'))
+
 class ProgressTracker:
     """Thread-safe progress tracker"""
     def __init__(self, total):
@@ -103,18 +94,23 @@ class ProgressTracker:
             print(f"\r✓ {self.completed}/{self.total} | ✗ {self.failed} | "
                   f"Rate: {rate:.1f}/s | ETA: {remaining/60:.1f}m", end='', flush=True)
 
-def create_driver(headless=True):
-    """Create optimized Chrome driver instance"""
-    chrome_options = Options()
+def create_driver(headless=True, provider=None, tabs=1):
+    """
+    Create optimized Chrome driver instance, with the eager page-load
+    strategy and resource blocking tuned for ``provider``; ``tabs`` > 1
+    sets it up to host that many concurrent tabs
+    """
+    chrome_options = apply_network_capture(apply_page_load_strategy(Options()))
     
     if headless:
         chrome_options.add_argument('--headless=new')
+    if tabs > 1:
+        apply_multi_tab_flags(chrome_options, tabs)
     
     # Performance optimizations
     chrome_options.add_argument('--disable-gpu')
     chrome_options.add_argument('--no-sandbox')
     chrome_options.add_argument('--disable-dev-shm-usage')
-    chrome_options.add_argument('--disable-images')  # Faster loading
     chrome_options.add_argument('--disable-extensions')
     chrome_options.add_argument('--disable-logging')
     chrome_options.add_argument('--log-level=3')
@@ -136,11 +132,16 @@ def create_driver(headless=True):
     
     driver = webdriver.Chrome(options=chrome_options)
     driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    # Images, media, fonts and trackers (the old --disable-images switch did nothing)
+    apply_resource_blocking(driver, provider)
     
     return driver
 
-def process_single_shipment(row_data, provider_func, driver, progress, is_fedex=False):
-    """Process a single shipment"""
+def process_single_shipment(row_data, provider_func, browsers, progress, is_fedex=False, canonical=None):
+    """
+    Process a single shipment: over HTTP when the provider supports it (as
+    /track does), else in a browser tab checked out for just this lookup
+    """
     awb = row_data['awb']
     provider = row_data['provider']
     
@@ -175,8 +176,14 @@ def process_single_shipment(row_data, provider_func, driver, progress, is_fedex=
                 result = {'awb': awb, 'status': 'Error', 'error': api_result.get('error', 'API Error')}
                 status = 'Error'
         else:
-            # Use Selenium for non-FedEx or fallback
-            result = provider_func(awb, driver)
+            # HTTP-first providers skip Chrome unless the HTTP lookup comes back empty
+            tracker = PROVIDERS.get(canonical)
+            result = tracker.http_track(awb) if tracker is not None and tracker.http_track else None
+            if result is None:
+                # Use Selenium for non-FedEx or fallback
+                with browsers.checkout() as driver:
+                    apply_resource_blocking(driver, canonical)
+                    result = provider_func(awb, driver)
             status = result.get('status', 'Unknown')
         
         progress.update(success=True)
@@ -203,14 +210,70 @@ def process_single_shipment(row_data, provider_func, driver, progress, is_fedex=
             'error': str(e)
         }
 
-def process_provider_batch(provider_name, shipments, progress, workers_per_provider=3):
-    """Process all shipments for a single provider with multiple workers"""
+def process_shipment_chunk(rows, tracker, provider_func, browsers, progress, canonical=None):
+    """
+    Look up a chunk of one provider's shipments with a single multi-number
+    query (``tracker.track_many``) in one tab; shipments the page had no
+    result for are processed one at a time
+    """
+    found = {}
+    try:
+        time.sleep(random.uniform(0.5, 2.0))
+        with browsers.checkout() as driver:
+            apply_resource_blocking(driver, canonical)
+            found = tracker.track_many([row['awb'] for row in rows], driver)
+    except Exception as e:
+        print(f"\n⚠️ {tracker.name} multi-number lookup failed, tracking one at a time: {str(e)[:100]}")
+    
+    results = []
+    for row in rows:
+        result = found.get(row['awb'])
+        if result is None:
+            results.append(process_single_shipment(row, provider_func, browsers, progress, False, canonical))
+            continue
+        progress.update(success=True)
+        results.append({
+            'index': row['index'],
+            'awb': row['awb'],
+            'provider': row['provider'],
+            'status': result.get('status', 'Unknown'),
+            'success': True,
+            'result': result
+        })
+    return results
+
+def process_fedex_api_batch(shipments, progress):
+    """FedEx shipments over the REST API, many tracking numbers per request"""
+    rows_by_awb = {}
+    for row in shipments:
+        rows_by_awb.setdefault(str(row['awb']).strip(), []).append(row)
+    
+    results = []
+    for awb, api_result in fedex_api_track_many(rows_by_awb):
+        result = fedex_api_to_tracking_result(awb, api_result)
+        for row in rows_by_awb.get(awb, []):
+            progress.update(success=True)
+            results.append({
+                'index': row['index'],
+                'awb': row['awb'],
+                'provider': row['provider'],
+                'status': result['status'],
+                'success': True,
+                'result': result
+            })
+    return results
+
+def process_provider_batch(provider_name, shipments, progress, browsers, workers_per_provider=3):
+    """
+    Process all shipments for a single provider with multiple workers.
+    Workers share the tabs of ``browsers`` with the other providers.
+    """
     is_fedex = 'FEDEX' in provider_name.upper() and 'ICL' not in provider_name.upper()
     
-    # FedEx API doesn't need parallel drivers - use sequential processing
+    # FedEx API doesn't need drivers - tracking numbers go out in chunked requests
     if is_fedex and USE_FEDEX_API:
         print(f"\n� Starting {provider_name}: {len(shipments)} shipments via REST API (no Selenium)")
-        workers = 1  # API calls are fast, don't need parallelization
+        return process_fedex_api_batch(shipments, progress)
     else:
         print(f"\n�🔷 Starting {provider_name}: {len(shipments)} shipments with {workers_per_provider} workers")
         workers = workers_per_provider
@@ -222,35 +285,31 @@ def process_provider_batch(provider_name, shipments, progress, workers_per_provi
         return []
     
     results = []
-    
-    # Create drivers only if needed (not for FedEx API)
-    if is_fedex and USE_FEDEX_API:
-        drivers = [None]  # No driver needed for API
-    else:
-        drivers = [create_driver() for _ in range(workers)]
-    
-    try:
-        with ThreadPoolExecutor(max_workers=workers) as executor:
-            futures = []
-            
-            for i, shipment in enumerate(shipments):
-                # Assign driver in round-robin fashion (or None for FedEx API)
-                driver = drivers[i % workers]
-                future = executor.submit(process_single_shipment, shipment, provider_func, driver, progress, is_fedex)
-                futures.append(future)
-            
+    canonical = resolve_provider_name(provider_name)
+    tracker = PROVIDERS.get(canonical)
+    
+    # Providers whose site takes several AWBs at once get one page load per chunk
+    if not is_fedex and tracker is not None and tracker.track_many and tracker.max_batch > 1 and len(shipments) > 1:
+        chunks = chunked(shipments, tracker.max_batch)
+        print(f"   {len(chunks)} multi-number lookups of up to {tracker.max_batch} AWBs")
+        with ThreadPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+            futures = [
+                executor.submit(process_shipment_chunk, chunk, tracker, provider_func, browsers, progress, canonical)
+                for chunk in chunks
+            ]
             for future in as_completed(futures):
-                result = future.result()
-                results.append(result)
-    
-    finally:
-        # Clean up drivers (skip None for FedEx API)
-        for driver in drivers:
-            if driver is not None:
-                try:
-                    driver.quit()
-                except:
-                    pass
+                results.extend(future.result())
+        return results
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(process_single_shipment, shipment, provider_func, browsers, progress, is_fedex, canonical)
+            for shipment in shipments
+        ]
+        
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
     
     return results
 
@@ -299,7 +358,7 @@ def main():
     processed_indices = set(checkpoint['processed_indices'])
     
     # Group by provider
-    provider_groups = defaultdict(list)
+    pending_shipments = []
     
     for idx, row in df.iterrows():
         if idx in processed_indices:
@@ -309,12 +368,14 @@ def main():
         provider = row[provider_col]
         
         if pd.notna(awb) and pd.notna(provider):
-            provider_groups[provider].append({
+            pending_shipments.append({
                 'index': idx,
                 'awb': str(awb).strip(),
                 'provider': provider
             })
     
+    provider_groups = group_by_provider(pending_shipments)
+    
     print(f"\n🔍 Provider Distribution:")
     for provider, shipments in provider_groups.items():
         print(f"   {provider}: {len(shipments)} shipments")
@@ -341,31 +402,44 @@ def main():
     
     start_time = time.time()
     
-    # Process each provider in parallel
-    with ThreadPoolExecutor(max_workers=len(provider_groups)) as executor:
-        provider_futures = {}
+    # A few Chrome instances serve every provider's workers as tabs, instead
+    # of one Chrome process per worker
+    browsers = BrowserManager(
+        browsers=BATCH_BROWSERS,
+        tabs_per_browser=BATCH_TABS_PER_BROWSER,
+        checkout_timeout=BATCH_CHECKOUT_TIMEOUT,
+        factory=lambda: create_driver(tabs=BATCH_TABS_PER_BROWSER)
+    )
+    
+    try:
+        # Process each provider in parallel
+        with ThreadPoolExecutor(max_workers=len(provider_groups)) as executor:
+            provider_futures = {}
         
-        for provider_name, shipments in provider_groups.items():
-            future = executor.submit(process_provider_batch, provider_name, shipments, progress, WORKERS_PER_PROVIDER)
-            provider_futures[future] = provider_name
+            for provider_name, shipments in provider_groups.items():
+                future = executor.submit(process_provider_batch, provider_name, shipments, progress, browsers, WORKERS_PER_PROVIDER)
+                provider_futures[future] = provider_name
         
-        for future in as_completed(provider_futures):
-            provider_name = provider_futures[future]
-            try:
-                results = future.result()
-                all_results.extend(results)
+            for future in as_completed(provider_futures):
+                provider_name = provider_futures[future]
+                try:
+                    results = future.result()
+                    all_results.extend(results)
                 
-                # Update checkpoint
-                processed_indices.update([r['index'] for r in results])
-                save_checkpoint({
-                    'processed_indices': list(processed_indices),
-                    'results': all_results
-                })
+                    # Update checkpoint
+                    processed_indices.update([r['index'] for r in results])
+                    save_checkpoint({
+                        'processed_indices': list(processed_indices),
+                        'results': all_results
+                    })
                 
-                print(f"\n✅ Completed {provider_name}")
+                    print(f"\n✅ Completed {provider_name}")
             
-            except Exception as e:
-                print(f"\n❌ Provider {provider_name} failed: {e}")
+                except Exception as e:
+                    print(f"\n❌ Provider {provider_name} failed: {e}")
+    
+    finally:
+        browsers.close()
     
     print("\n\n" + "=" * 80)
     print("UPDATING EXCEL FILE...")
@@ -385,6 +459,7 @@ def main():
     print(f"✓ Successful: {progress.completed}")
     print(f"✗ Failed: {progress.failed}")
     print(f"📁 Updated: DataSet.xlsx")
+    print_latency_report()
     
     # Clean up checkpoint
     if os.path.exists(CHECKPOINT_FILE):
@@ -0,0 +1,102 @@
+"""
+Benchmark memory held by normalized FedEx results: the old shape (dict per
+event/location, raw shipment object kept) vs slotted records with interned
+strings and no raw payload. Uses synthetic Track API responses, no network.
+
+Usage:
+    python benchmark_fedex_memory.py          # 3000 responses
+    python benchmark_fedex_memory.py 10000
+"""
+import gc
+import json
+import random
+import sys
+import tracemalloc
+
+sys.path.append('.')
+from fedex_api import FedExTrackingService, to_dict
+
+CITIES = [("MEMPHIS", "TN", "US"), ("INDIANAPOLIS", "IN", "US"), ("MUMBAI", "MH", "IN"),
+          ("NEW DELHI", "DL", "IN"), ("DUBAI", "", "AE"), ("PARIS", "", "FR"),
+          ("BENGALURU", "KA", "IN"), ("FRANKFURT", "", "DE")]
+SCANS = [("PU", "Picked up"), ("AR", "Arrived at FedEx location"), ("DP", "Departed FedEx location"),
+         ("IT", "In transit"), ("OD", "On FedEx vehicle for delivery"), ("DL", "Delivered")]
+
+
+def address(rng):
+    city, state, country = rng.choice(CITIES)
+    return {"city": city, "stateOrProvinceCode": state, "countryCode": country,
+            "residential": False, "countryName": country}
+
+
+def synthetic_response(rng, tracking_number):
+    """JSON text shaped like a Track API answer for one number"""
+    scans = [
+        {
+            "date": f"2024-01-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00-06:00",
+            "eventType": code,
+            "eventDescription": description,
+            "exceptionCode": "", "exceptionDescription": "",
+            "scanLocation": dict(address(rng), streetLines=[""], postalCode=str(rng.randint(10000, 99999))),
+            "locationType": "FEDEX_FACILITY",
+            "derivedStatusCode": code, "derivedStatus": description
+        }
+        for code, description in (rng.choice(SCANS) for _ in range(rng.randint(8, 20)))
+    ]
+    shipment = {
+        "trackingNumberInfo": {"trackingNumber": tracking_number, "trackingNumberUniqueId": "12029~" + tracking_number,
+                               "carrierCode": "FDXE"},
+        "latestStatusDetail": {"code": "IT", "derivedCode": "IT", "statusByLocale": "In transit",
+                               "description": "In transit", "scanLocation": address(rng)},
+        "dateAndTimes": [{"type": "ACTUAL_PICKUP", "dateTime": "2024-01-02T10:00:00-06:00"},
+                         {"type": "SHIP", "dateTime": "2024-01-02T00:00:00-06:00"}],
+        "availableImages": [{"type": "SIGNATURE_PROOF_OF_DELIVERY"}],
+        "packageDetails": {"packagingDescription": {"type": "YOUR_PACKAGING", "description": "Your Packaging"},
+                           "count": "1", "weightAndDimensions": {"weight": [{"value": "2.0", "unit": "LB"}]}},
+        "shipmentDetails": {"possessionStatus": True},
+        "originLocation": address(rng),
+        "destinationLocation": address(rng),
+        "serviceDetail": {"type": "FEDEX_INTERNATIONAL_PRIORITY", "description": "FedEx International Priority"},
+        "serviceType": "FEDEX_INTERNATIONAL_PRIORITY",
+        "packageCount": 1,
+        "packageWeight": {"value": "2.0", "unit": "LB"},
+        "scanEvents": scans
+    }
+    return json.dumps({"output": {"completeTrackResults": [
+        {"trackingNumber": tracking_number, "trackResults": [shipment]}
+    ]}})
+
+
+def retained(keep_raw, payloads, legacy_dicts):
+    """Bytes still allocated by the normalized results once payloads are parsed and dropped"""
+    service = FedExTrackingService(keep_raw=keep_raw)
+    gc.collect()
+    tracemalloc.start()
+    results = []
+    for number, text in payloads:
+        result = service._normalize_response(json.loads(text), number)
+        results.append(to_dict(result) if legacy_dicts else result)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    checkpoint = len(json.dumps([to_dict(r) for r in results]))
+    return size, checkpoint, results
+
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+rng = random.Random(42)
+payloads = [(str(700000000000 + i), synthetic_response(rng, str(700000000000 + i))) for i in range(count)]
+
+before, before_json, old = retained(keep_raw=True, payloads=payloads, legacy_dicts=True)
+dicts, dicts_json, _ = retained(keep_raw=False, payloads=payloads, legacy_dicts=True)
+after, after_json, new = retained(keep_raw=False, payloads=payloads, legacy_dicts=False)
+
+# Records expand back to exactly the old shape (minus raw_data)
+assert all(to_dict(n) == {k: v for k, v in o.items() if k != 'raw_data'} for n, o in zip(new, old))
+
+print(f"FedEx result memory benchmark: {count} synthetic responses")
+print("=" * 100)
+print(f"  before (dicts + raw_data)   {before / 1024 / 1024:>8.1f} MB held | {before_json / 1024 / 1024:>7.1f} MB as JSON")
+print(f"  dicts, no raw_data          {dicts / 1024 / 1024:>8.1f} MB held | {dicts_json / 1024 / 1024:>7.1f} MB as JSON")
+print(f"  after  (records, no raw)    {after / 1024 / 1024:>8.1f} MB held | {after_json / 1024 / 1024:>7.1f} MB as JSON")
+print(f"  saved  {1 - after / before:.0%} of memory, {1 - after_json / before_json:.0%} of serialized size")
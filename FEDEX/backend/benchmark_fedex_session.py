@@ -0,0 +1,82 @@
+"""
+Benchmark FedEx API per-call latency: a fresh connection per request
+(module-level requests.post, the old behaviour) vs the shared keep-alive
+session in fedex_api.session.
+
+Usage:
+    python benchmark_fedex_session.py                        # 20 Track API calls each way
+    python benchmark_fedex_session.py 50 794887278605        # call count, tracking number
+    python benchmark_fedex_session.py 50 --url https://apis-sandbox.fedex.com/   # plain GETs, no credentials
+"""
+import statistics
+import sys
+import time
+
+import requests
+from dotenv import load_dotenv
+
+sys.path.append('.')
+load_dotenv()
+from fedex_api.session import FEDEX_TIMEOUT, http_session
+
+
+def track_call(post):
+    """One Track API request through ``post`` (requests.post or the session's)"""
+    from fedex_api import get_fedex_access_token
+    from fedex_api.tracking_service import tracking_service
+
+    def call(tracking_number):
+        headers = {
+            'Authorization': f'Bearer {get_fedex_access_token()}',
+            'Content-Type': 'application/json',
+            'X-locale': 'en_US'
+        }
+        payload = {
+            "trackingInfo": [{"trackingNumberInfo": {"trackingNumber": tracking_number}}],
+            "includeDetailedScans": True
+        }
+        return post(tracking_service.tracking_url, headers=headers, json=payload, timeout=FEDEX_TIMEOUT)
+    return call
+
+
+def get_call(get):
+    return lambda url: get(url, timeout=FEDEX_TIMEOUT)
+
+
+def measure(call, target, count):
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        call(target).content
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summary(timings):
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return (f"mean {statistics.mean(timings) * 1000:>7.1f} ms | p50 {statistics.median(timings) * 1000:>7.1f} ms | "
+            f"p95 {p95 * 1000:>7.1f} ms | first {timings[0] * 1000:>7.1f} ms")
+
+
+args = sys.argv[1:]
+count = int(args.pop(0)) if args and args[0].isdigit() else 20
+
+if '--url' in args:
+    target = args[args.index('--url') + 1]
+    before_call, after_call = get_call(requests.get), get_call(http_session().get)
+else:
+    target = args[0] if args else '794887278605'
+    before_call, after_call = track_call(requests.post), track_call(http_session().post)
+    before_call(target)  # fetch the OAuth token outside the timings
+
+print(f"FedEx HTTP session benchmark: {count} calls each to {target}")
+print("=" * 100)
+
+before = measure(before_call, target, count)
+after = measure(after_call, target, count)
+
+print(f"  before (new connection per call) {summary(before)}")
+print(f"  after  (pooled keep-alive)       {summary(after)}")
+print(f"  saved  {(statistics.mean(before) - statistics.mean(after)) * 1000:.1f} ms per call "
+      f"({1 - statistics.mean(after) / statistics.mean(before):.0%})")
@@ -0,0 +1,89 @@
+"""
+Benchmark the scraping browser profile: bytes transferred, requests and
+time-to-result per provider with the old full page loads vs the eager
+page-load strategy plus resource blocking.
+
+Usage:
+    python benchmark_resource_blocking.py                    # one AWB per provider from DataSet.xlsx
+    python benchmark_resource_blocking.py DHL=1234567890 "Courier Wala=CW123"
+"""
+import json
+import sys
+import time
+
+import pandas as pd
+
+sys.path.append('.')
+from driver_pool import create_chrome_driver
+from providers import PROVIDERS, resolve_provider_name
+
+
+def sample_awbs(path='DataSet.xlsx'):
+    """First AWB per provider in the dataset"""
+    df = pd.read_excel(path)
+    awb_col = next(col for col in df.columns if 'AWB' in col.upper())
+    provider_col = next(col for col in df.columns if 'SERVICE' in col.upper() or 'PROVIDER' in col.upper())
+
+    samples = {}
+    for _, row in df.iterrows():
+        if pd.isna(row[awb_col]) or pd.isna(row[provider_col]):
+            continue
+        try:
+            provider = resolve_provider_name(row[provider_col])
+        except ValueError:
+            continue
+        samples.setdefault(provider, str(row[awb_col]).strip())
+    return samples
+
+
+def network_totals(driver):
+    """Bytes, finished requests and blocked requests since the log was last read"""
+    totals = {"bytes": 0, "requests": 0, "blocked": 0}
+    for entry in driver.get_log('performance'):
+        message = json.loads(entry['message'])['message']
+        if message['method'] == 'Network.loadingFinished':
+            totals["bytes"] += message['params'].get('encodedDataLength', 0)
+            totals["requests"] += 1
+        elif message['method'] == 'Network.loadingFailed' and message['params'].get('blockedReason'):
+            totals["blocked"] += 1
+    return totals
+
+
+def run(provider, awb, optimized):
+    driver = create_chrome_driver(provider=provider, performance_log=True, optimized=optimized)
+    try:
+        network_totals(driver)  # drop start-up traffic
+        start = time.perf_counter()
+        result = PROVIDERS[provider].track(awb, driver)
+        elapsed = time.perf_counter() - start
+        totals = network_totals(driver)
+    finally:
+        driver.quit()
+    totals.update(seconds=elapsed, status=result.get('status'), events=len(result.get('timeline', [])))
+    return totals
+
+
+if len(sys.argv) > 1:
+    samples = dict(arg.split('=', 1) for arg in sys.argv[1:])
+else:
+    samples = sample_awbs()
+
+browser_providers = {name: awb for name, awb in samples.items()
+                     if name in PROVIDERS and PROVIDERS[name].needs_browser}
+
+print("Resource blocking benchmark (before = full page loads, after = eager + blocking)")
+print("=" * 100)
+
+for provider, awb in browser_providers.items():
+    before = run(provider, awb, optimized=False)
+    after = run(provider, awb, optimized=True)
+
+    saved = 1 - after["bytes"] / before["bytes"] if before["bytes"] else 0
+    print(f"\n{provider} ({awb})")
+    for label, row in (("before", before), ("after", after)):
+        print(f"  {label:<6} {row['bytes'] / 1024:>9.0f} KB | {row['requests']:>4} requests | "
+              f"{row['blocked']:>4} blocked | {row['seconds']:>6.2f}s | "
+              f"{row['status']} ({row['events']} events)")
+    print(f"  saved  {saved:.0%} of bytes, {before['seconds'] - after['seconds']:.2f}s to result")
+    if before["status"] != after["status"] or before["events"] != after["events"]:
+        print(f"  ⚠️ Results differ with blocking on; add the resource it needs to RESOURCE_ALLOWLIST")
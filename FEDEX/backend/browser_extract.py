@@ -0,0 +1,270 @@
+"""
+Browser Extractors
+In-page scripts that read a provider's rendered results (shadow roots
+included) into one JSON object, so extraction is a single execute_script
+call instead of a WebDriver round trip per element
+"""
+
+EVENT_FIELDS = ("date_time", "activity", "location")
+SUMMARY_FIELDS = ("status", "origin", "destination")
+
+
+class ExtractionError(ValueError):
+    """An extractor script returned something that isn't a tracking object"""
+
+
+# Helpers shared by the extractor scripts. deepAll() runs a selector in the
+# document and in every open shadow root below it.
+_JS_HELPERS = """
+    function deepAll(selector, root, out) {
+        root = root || document;
+        out = out || [];
+        root.querySelectorAll(selector).forEach(el => out.push(el));
+        root.querySelectorAll('*').forEach(el => {
+            if (el.shadowRoot) deepAll(selector, el.shadowRoot, out);
+        });
+        return out;
+    }
+    function textOf(node) {
+        if (!node) return '';
+        const text = node.innerText !== undefined ? node.innerText : node.textContent;
+        return (text || '').trim();
+    }
+    function linesOf(node) {
+        return textOf(node).split('\\n').map(s => s.trim()).filter(Boolean);
+    }
+    // Drop matches nested inside another match so text isn't read twice
+    function outermost(els) {
+        return els.filter(el => !els.some(other => other !== el && other.contains(el)));
+    }
+    function firstText(selector, root) {
+        for (const el of deepAll(selector, root)) {
+            const text = textOf(el);
+            if (text) return text;
+        }
+        return null;
+    }
+    // Text of every node below root, shadow roots included, one line per text node
+    function deepLines(root, out) {
+        out = out || [];
+        if (!root || root.nodeName === 'SCRIPT' || root.nodeName === 'STYLE') return out;
+        if (root.nodeType === Node.TEXT_NODE) {
+            const text = root.textContent.trim();
+            if (text) out.push(text);
+            return out;
+        }
+        if (root.shadowRoot) deepLines(root.shadowRoot, out);
+        root.childNodes.forEach(child => deepLines(child, out));
+        return out;
+    }
+"""
+
+
+# ---------------------------------------------------------------------------
+# DHL
+# ---------------------------------------------------------------------------
+
+DHL_RESULT_CSS = ".c-tracking-result"  # One card per shipment on a multi-number page
+DHL_STATUS_CSS = ".c-tracking-result--status-copy h3, .c-tracking-result--status-copy h2, [class*='status-copy']"
+DHL_SUMMARY_CSS = ".c-tracking-result--summary-content dl div, .c-tracking-result--summary-content p"
+DHL_STATUS_WORDS = ['delivered', 'transit', 'shipment picked up', 'returned', 'arrived']
+
+_DHL_EXTRACT_FN = """
+    function extractDhl(root, checkpointsCss, statusCss, summaryCss, statusWords) {
+        const result = {status: firstText(statusCss, root), origin: null, destination: null, events: []};
+
+        if (!result.status) {
+            // Fallback: a short heading that reads like a status
+            for (const heading of deepAll('h2, h3, h4', root)) {
+                const text = textOf(heading);
+                if (text.length < 50 && statusWords.some(w => text.toLowerCase().includes(w))) {
+                    result.status = text;
+                    break;
+                }
+            }
+        }
+
+        for (const item of deepAll(summaryCss, root)) {
+            const text = textOf(item);
+            if (text.includes('Origin')) {
+                result.origin = text.split('Origin').join('').split(':').join('').trim();
+            } else if (text.includes('Destination')) {
+                result.destination = text.split('Destination').join('').split(':').join('').trim();
+            }
+        }
+
+        // Checkpoint cards read: date/time, activity, location
+        for (const checkpoint of deepAll(checkpointsCss, root)) {
+            const lines = linesOf(checkpoint);
+            if (lines.length >= 2) {
+                result.events.push({date_time: lines[0], activity: lines[1], location: lines[2] || ''});
+            }
+        }
+        return result;
+    }
+"""
+
+DHL_EXTRACT_JS = _JS_HELPERS + _DHL_EXTRACT_FN + """
+    const [checkpointsCss, statusCss, summaryCss, statusWords] = arguments;
+    return extractDhl(document, checkpointsCss, statusCss, summaryCss, statusWords);
+"""
+
+# Multi-number page: each AWB's result card is the one whose text names it
+DHL_EXTRACT_MANY_JS = _JS_HELPERS + _DHL_EXTRACT_FN + """
+    const [awbs, resultCss, checkpointsCss, statusCss, summaryCss, statusWords] = arguments;
+    const cards = outermost(deepAll(resultCss));
+    const escape = s => s.replace(/[.*+?^${}()|[\\]\\\\]/g, '\\\\$&');
+    const results = {};
+    for (const awb of awbs) {
+        const named = new RegExp('(^|[^A-Za-z0-9])' + escape(awb) + '([^A-Za-z0-9]|$)');
+        const card = cards.find(c => named.test(textOf(c)));
+        if (card) results[awb] = extractDhl(card, checkpointsCss, statusCss, summaryCss, statusWords);
+    }
+    return results;
+"""
+
+
+# ---------------------------------------------------------------------------
+# FedEx
+# ---------------------------------------------------------------------------
+
+# Tracking app sections; when one isn't rendered (or the markup changes) the
+# script falls back to the text of the whole page for that field
+FEDEX_STATUS_CSS = "trk-shared-stylized-status, [data-test-id*='status'], [class*='shipment-status']"
+FEDEX_HISTORY_CSS = "trk-shared-travel-history, [data-test-id*='travel-history'], [class*='travel-history']"
+
+FEDEX_UI_NOISE = ['obtain proof of delivery', 'view details', 'view travel history',
+                  'track another', 'help', 'sign up', 'log in', 'fedex home',
+                  'shipping', 'tracking', 'locations', 'support']
+
+FEDEX_EXTRACT_JS = _JS_HELPERS + """
+    const [statusCss, historyCss, statusWords, uiNoise] = arguments;
+    const isNoise = text => uiNoise.some(n => text.toLowerCase().includes(n));
+    const datePattern = /\\w+,\\s*\\d{1,2}\\/\\d{1,2}\\/\\d{2,4}/;
+    const timePattern = /\\d{1,2}:\\d{2}\\s*(?:AM|PM)/i;
+
+    const pageLines = deepLines(document.body).filter(l => !uiNoise.includes(l.toLowerCase()));
+    const pageText = pageLines.join('\\n').toLowerCase();
+    const result = {status: null, origin: null, destination: null, events: [], source: 'dom'};
+
+    if (pageLines.join('').length < 100 || pageText.includes("we're sorry") || pageText.includes('permission')) {
+        result.blocked = true;
+        return result;
+    }
+
+    // Status: the status banner if rendered, else the first short line naming one
+    const findStatus = lines => {
+        for (const line of lines.slice(0, 200)) {
+            const upper = line.toUpperCase();
+            if (line.length < 100 && statusWords.some(w => upper.includes(w))) return line;
+        }
+        return null;
+    };
+    const statusBlocks = outermost(deepAll(statusCss));
+    result.status = statusBlocks.length ? findStatus(statusBlocks.flatMap(linesOf)) : null;
+    if (!result.status) {
+        result.status = findStatus(pageLines);
+        result.source = 'text';
+    }
+
+    // From/To: first 'City, Region' style line after the label
+    const locationAfter = (lines, i) => {
+        for (let j = i + 1; j < Math.min(i + 5, lines.length); j++) {
+            const c = lines[j];
+            if (c.includes(',') && c.length > 5 && c.length < 60 && !/view|click|button|link/i.test(c)) return c;
+        }
+        return null;
+    };
+    pageLines.forEach((line, i) => {
+        const upper = line.toUpperCase();
+        if (upper === 'FROM' || upper.includes('ORIGIN')) result.origin = locationAfter(pageLines, i) || result.origin;
+        if (upper === 'TO' || upper.includes('DESTINATION')) result.destination = locationAfter(pageLines, i) || result.destination;
+    });
+
+    // Travel history: a date line, then time / activity / location per event
+    const history = outermost(deepAll(historyCss)).flatMap(linesOf);
+    const eventLines = history.some(l => timePattern.test(l)) ? history : pageLines;
+    if (eventLines === pageLines) result.source = 'text';
+    let currentDate = '';
+    eventLines.forEach((line, i) => {
+        if (datePattern.test(line)) {
+            currentDate = line;
+            return;
+        }
+        if (!timePattern.test(line)) return;
+        const activity = eventLines[i + 1] || '';
+        let location = eventLines[i + 2] || '';
+        if (!activity || timePattern.test(activity) || activity.length <= 3 || isNoise(activity)) return;
+        if (location.length <= 5 || location.length >= 100 || isNoise(location)) location = '';
+        result.events.push({date_time: (currentDate + ' ' + line).trim(), activity: activity, location: location});
+    });
+    return result;
+"""
+
+
+def check_extraction(data):
+    """
+    Validate and normalise an extractor's return value.
+
+    Returns:
+        dict: status, origin and destination (str or None), events (list
+        of dicts with str date_time/activity/location) plus any extra
+        flags the script set (e.g. ``blocked``, ``source``)
+    Raises:
+        ExtractionError: if the shape doesn't match
+    """
+    if not isinstance(data, dict):
+        raise ExtractionError(f"Extractor returned {type(data).__name__}, expected an object")
+
+    result = dict(data)
+    for key in SUMMARY_FIELDS:
+        value = data.get(key)
+        if value is not None and not isinstance(value, str):
+            raise ExtractionError(f"'{key}' should be text, got {type(value).__name__}")
+        result[key] = (value.strip() or None) if value else None
+
+    events = data.get("events")
+    if not isinstance(events, list):
+        raise ExtractionError("'events' should be a list")
+
+    result["events"] = []
+    for i, event in enumerate(events):
+        if not isinstance(event, dict):
+            raise ExtractionError(f"Event {i} should be an object")
+        clean = {}
+        for key in EVENT_FIELDS:
+            value = event.get(key)
+            if value is not None and not isinstance(value, str):
+                raise ExtractionError(f"Event {i} '{key}' should be text")
+            clean[key] = (value or "").strip()
+        result["events"].append(clean)
+
+    return result
+
+
+def extract(driver, script, *args):
+    """Run an extractor script in the page and return its checked result"""
+    return check_extraction(driver.execute_script(script, *args))
+
+
+def extract_dhl(driver, checkpoints_css):
+    return extract(driver, DHL_EXTRACT_JS, checkpoints_css, DHL_STATUS_CSS, DHL_SUMMARY_CSS, DHL_STATUS_WORDS)
+
+
+def extract_dhl_many(driver, awb_numbers, checkpoints_css):
+    """
+    Per-AWB results of a multi-number DHL page, as {awb: checked result};
+    AWBs without a result card on the page are left out
+    """
+    awbs = [str(awb) for awb in awb_numbers]
+    data = driver.execute_script(DHL_EXTRACT_MANY_JS, awbs, DHL_RESULT_CSS, checkpoints_css,
+                                 DHL_STATUS_CSS, DHL_SUMMARY_CSS, DHL_STATUS_WORDS)
+    if not isinstance(data, dict):
+        raise ExtractionError(f"Extractor returned {type(data).__name__}, expected an object")
+    return {awb: check_extraction(data[awb]) for awb in awbs if awb in data}
+
+
+def extract_fedex(driver, status_words):
+    """``status_words``: upper-case phrases that mark a status line"""
+    return extract(driver, FEDEX_EXTRACT_JS, FEDEX_STATUS_CSS, FEDEX_HISTORY_CSS,
+                   list(status_words), FEDEX_UI_NOISE)
@@ -0,0 +1,169 @@
+"""
+Browser Lifecycle
+When to recycle a long-lived Chrome session (page loads, age, memory of its
+process tree) and cleanup of chromedriver/chrome processes left behind
+after a browser is retired
+"""
+
+import os
+import signal
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None  # Falls back to /proc (Linux only)
+
+# Recycle a browser after this many page loads across its tabs (0 = never)
+BROWSER_MAX_NAVIGATIONS = int(os.getenv('BROWSER_MAX_NAVIGATIONS', '500'))
+# ...or after this many seconds (0 = never)
+BROWSER_MAX_AGE = float(os.getenv('BROWSER_MAX_AGE', '3600'))
+# ...or once chromedriver + chrome use more than this many MB of RSS (0 = never)
+BROWSER_MAX_RSS_MB = float(os.getenv('BROWSER_MAX_RSS_MB', '1500'))
+# Seconds between recycle checks
+BROWSER_MAINTENANCE_INTERVAL = float(os.getenv('BROWSER_MAINTENANCE_INTERVAL', '30'))
+
+
+def driver_pid(driver):
+    """PID of the chromedriver process behind a Selenium driver, if local"""
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+def _proc_children():
+    """{ppid: [pid, ...]} for every process, read from /proc"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # The command name may contain spaces; fields resume after ')'
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def process_tree(pid):
+    """``pid`` and all its descendants (empty if it's gone or unknown)"""
+    if not pid:
+        return []
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            return [pid] + [child.pid for child in root.children(recursive=True)]
+        except psutil.Error:
+            return []
+
+    if not os.path.isdir('/proc'):
+        return []
+    children = _proc_children()
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, []))
+    return tree if os.path.exists(f'/proc/{pid}') else []
+
+
+def _rss_bytes(pid):
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return 0
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+def tree_rss_mb(pid):
+    """Resident memory of a process and its descendants in MB (None if unknown)"""
+    pids = process_tree(pid)
+    if not pids:
+        return None
+    return sum(_rss_bytes(p) for p in pids) / (1024 * 1024)
+
+
+def _name(pid):
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).name()
+        except psutil.Error:
+            return ''
+    try:
+        with open(f'/proc/{pid}/comm') as f:
+            return f.read().strip()
+    except OSError:
+        return ''
+
+
+def driver_exited(driver):
+    """True if the local chromedriver process behind ``driver`` has exited"""
+    try:
+        return driver.service.process.poll() is not None
+    except AttributeError:
+        return False
+
+
+def _alive(pid):
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+        except psutil.Error:
+            return False
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except (OSError, IndexError):
+        return False
+
+
+def reap(pids, grace=5.0):
+    """
+    Kill whatever is left of ``pids`` after ``grace`` seconds. Only
+    chrome/chromedriver processes are touched, in case a PID was reused.
+
+    Returns: the PIDs that had to be killed
+    """
+    deadline = time.monotonic() + grace
+    remaining = [pid for pid in set(pids) if _alive(pid) and 'chrom' in _name(pid).lower()]
+    while remaining and time.monotonic() < deadline:
+        time.sleep(0.2)
+        remaining = [pid for pid in remaining if _alive(pid)]
+
+    for pid in remaining:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
+            pass
+    return remaining
+
+
+class RecyclePolicy:
+    """Limits after which a browser is replaced; 0 disables a limit"""
+
+    def __init__(self, max_navigations=BROWSER_MAX_NAVIGATIONS, max_age=BROWSER_MAX_AGE,
+                 max_rss_mb=BROWSER_MAX_RSS_MB):
+        self.max_navigations = max_navigations
+        self.max_age = max_age
+        self.max_rss_mb = max_rss_mb
+
+    def reason(self, navigations, age, rss_mb):
+        """Why a browser with these figures should be recycled, or None"""
+        if self.max_navigations and navigations >= self.max_navigations:
+            return 'navigations'
+        if self.max_age and age >= self.max_age:
+            return 'age'
+        if self.max_rss_mb and rss_mb is not None and rss_mb >= self.max_rss_mb:
+            return 'memory'
+        return None
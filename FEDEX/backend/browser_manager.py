@@ -0,0 +1,516 @@
+"""
+Browser Manager
+A few Chrome instances shared as many tabs: each checkout gets its own tab
+(in its own browser context where Chrome allows it, so cookies aren't
+shared), and a crashed tab is replaced without restarting the browser.
+Browsers are recycled in the background after too many page loads, too
+long or too much memory (see browser_lifecycle)
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.switch_to import SwitchTo
+
+from browser_lifecycle import (
+    BROWSER_MAINTENANCE_INTERVAL, RecyclePolicy, driver_exited, driver_pid, process_tree, reap, tree_rss_mb
+)
+from driver_pool import DriverPoolTimeout, create_chrome_driver, is_driver_alive, is_session_error, is_tab_error
+from xhr_capture import discard_network_log
+
+BROWSER_INSTANCES = int(os.getenv('BROWSER_INSTANCES', '1'))
+BROWSER_TABS = int(os.getenv('BROWSER_TABS', '4'))
+# Give every tab its own browser context (separate cookies/storage)
+BROWSER_ISOLATE_TABS = os.getenv('BROWSER_ISOLATE_TABS', 'true').lower() != 'false'
+# Tabs opened at start-up, before the first lookup asks for one
+BROWSER_PREWARM_TABS = int(os.getenv('BROWSER_PREWARM_TABS', '1'))
+
+
+class TabDriver(webdriver.Chrome):
+    """
+    WebDriver bound to one tab of a shared Chrome session.
+
+    It shares the session (and HTTP connection to chromedriver) with the
+    browser's other tabs. Every command takes the browser's command lock and
+    switches to this tab first if another tab was active, so scrapers can
+    use it exactly like a dedicated driver. chromedriver runs one command
+    per session at a time anyway, so a ``get`` holds the lock until the
+    page is interactive (eager load strategy) and other tabs wait for it.
+    Tabs only overlap between commands: while late resources and XHRs
+    finish loading and while scrapers wait for results.
+    """
+
+    @classmethod
+    def attach(cls, browser, handle, context_id=None):
+        tab = cls.__new__(cls)
+        tab.__dict__.update(browser.driver.__dict__)
+        tab._switch_to = SwitchTo(tab)
+        tab._shared_browser = browser
+        tab.handle = handle
+        tab.context_id = context_id
+        return tab
+
+    def execute(self, driver_command, params=None):
+        browser = self._shared_browser
+        with browser.lock:
+            # Only provider page loads count towards recycling, not the
+            # about:blank reset on release
+            if driver_command == Command.GET and (params or {}).get('url') != 'about:blank':
+                browser.navigations += 1
+            if browser.active_handle != self.handle:
+                webdriver.Chrome.execute(self, Command.SWITCH_TO_WINDOW, {"handle": self.handle})
+                browser.active_handle = self.handle
+            return super().execute(driver_command, params)
+
+    def quit(self):
+        """Close this tab only; the browser belongs to the manager"""
+        self._shared_browser.close_tab(self)
+
+    def __repr__(self):
+        return f"<TabDriver {self.handle[:8]} of browser {self._shared_browser.number}>"
+
+
+class SharedBrowser:
+    """One Chrome session and the tabs open in it"""
+
+    def __init__(self, number, driver):
+        self.number = number
+        self.driver = driver
+        self.lock = threading.RLock()
+        self.active_handle = driver.current_window_handle
+        self.blank_handle = self.active_handle  # the start-up tab, kept so the window never closes
+        self.tabs = 0
+        self.alive = True
+        self.retiring = False  # Replaced; closes once its checked-out tabs come back
+        self.started_at = time.monotonic()
+        self.navigations = 0
+        self.pid = driver_pid(driver)
+        self.known_pids = process_tree(self.pid)  # Refreshed by maintenance, for reaping
+
+    def responsive(self):
+        """
+        Whether the session still answers. Lists the window handles instead
+        of running a script, which would hit whichever tab is current -
+        often the one that just crashed or closed.
+        """
+        with self.lock:
+            try:
+                self.driver.window_handles
+                return True
+            except Exception:
+                return False
+
+    def open_tab(self, isolate=BROWSER_ISOLATE_TABS):
+        """Open a tab, in a fresh browser context if ``isolate`` and Chrome supports it"""
+        with self.lock:
+            if isolate:
+                try:
+                    context_id = self.driver.execute_cdp_cmd(
+                        'Target.createBrowserContext', {'disposeOnDetach': False}
+                    )['browserContextId']
+                    target_id = self.driver.execute_cdp_cmd(
+                        'Target.createTarget', {'url': 'about:blank', 'browserContextId': context_id}
+                    )['targetId']
+                    handle = self._handle_for(target_id)
+                    if handle:
+                        self.tabs += 1
+                        return TabDriver.attach(self, handle, context_id)
+                    self._dispose_context(context_id)
+                except (WebDriverException, KeyError) as e:
+                    print(f"Warning: isolated tab unavailable ({str(e)[:80]}), sharing cookies instead")
+
+            self.driver.switch_to.new_window('tab')
+            self.active_handle = self.driver.current_window_handle
+            self.tabs += 1
+            return TabDriver.attach(self, self.active_handle)
+
+    def _handle_for(self, target_id):
+        # chromedriver window handles are DevTools target ids
+        for handle in self.driver.window_handles:
+            if handle == target_id or handle.endswith(target_id):
+                return handle
+        return None
+
+    def _dispose_context(self, context_id):
+        try:
+            self.driver.execute_cdp_cmd('Target.disposeBrowserContext', {'browserContextId': context_id})
+        except WebDriverException:
+            pass
+
+    def close_tab(self, tab):
+        with self.lock:
+            self.tabs -= 1
+            if not self.alive:
+                return
+            try:
+                self.driver.switch_to.window(tab.handle)
+                self.driver.close()
+            except WebDriverException:
+                pass
+            if tab.context_id:
+                self._dispose_context(tab.context_id)
+            try:
+                self.driver.switch_to.window(self.blank_handle)
+                self.active_handle = self.blank_handle
+            except WebDriverException:
+                self.active_handle = None
+
+    def quit(self):
+        """Quit the browser; returns the PIDs of its processes, to reap any that linger"""
+        with self.lock:
+            pids = set(self.known_pids) | set(process_tree(self.pid))
+            self.alive = False
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            return pids
+
+
+class BrowserManager:
+    """
+    Thread-safe pool of tabs over at most ``browsers`` Chrome instances,
+    ``tabs_per_browser`` each.
+
+    ``acquire``/``release``, or ``checkout`` as a context manager, hand out
+    a TabDriver; ``stats`` feeds /health. Tabs are opened lazily and reused between checkouts. A dead tab is
+    closed and replaced on its own; if the whole browser session is gone,
+    its tabs are dropped and a new browser is started on demand.
+
+    A maintenance thread checks every ``maintenance_interval`` seconds for
+    browsers past ``policy`` (or whose chromedriver exited), starts their
+    replacement with the same number of idle tabs first, then retires the
+    old browser once its checked-out tabs are released. Processes of quit
+    browsers that don't exit are killed. ``prewarm`` tabs are opened at
+    start-up so the first lookups don't wait for Chrome to launch.
+    """
+
+    def __init__(self, browsers=BROWSER_INSTANCES, tabs_per_browser=BROWSER_TABS,
+                 checkout_timeout=30, factory=None, isolate=BROWSER_ISOLATE_TABS,
+                 policy=None, maintenance_interval=BROWSER_MAINTENANCE_INTERVAL, prewarm=0):
+        if browsers < 1 or tabs_per_browser < 1:
+            raise ValueError("Need at least one browser with one tab")
+
+        self.browsers = browsers
+        self.tabs_per_browser = tabs_per_browser
+        self.size = browsers * tabs_per_browser
+        self.checkout_timeout = checkout_timeout
+        self.isolate = isolate
+        self._factory = factory or (lambda: create_chrome_driver(tabs=tabs_per_browser))
+
+        self._browsers = []
+        self._browser_count = 0
+        self._idle = []
+        self._total = 0  # Tabs open or being opened
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._spawn_lock = threading.Lock()
+
+        # Counters for /health reporting
+        self._checkouts = 0
+        self._timeouts = 0
+        self._replaced_tabs = 0
+        self._restarted_browsers = 0
+        self._recycled = {}  # reason -> browsers recycled
+        self._reaped = 0
+
+        self.policy = policy or RecyclePolicy()
+        self._orphans = set()  # PIDs of quit browsers, killed if still running
+        self._stop = threading.Event()
+        self._maintainer = None
+        if maintenance_interval > 0 or prewarm:
+            self._maintainer = threading.Thread(
+                target=self._maintain, args=(maintenance_interval, prewarm),
+                name='browser-maintenance', daemon=True
+            )
+            self._maintainer.start()
+
+    def acquire(self, timeout=None):
+        """
+        Check a healthy tab out of the pool.
+
+        Raises:
+            DriverPoolTimeout: If no tab is free within the timeout
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Browser manager is closed")
+                if self._idle:
+                    tab = self._idle.pop()
+                    break
+                if self._total < self.size:
+                    self._total += 1
+                    tab = None
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise DriverPoolTimeout(
+                        f"No browser tab available after {timeout:g}s ({self.size} in use)"
+                    )
+                self._cond.wait(remaining)
+
+            self._in_use += 1
+            self._checkouts += 1
+
+        try:
+            if tab is not None and not (tab._shared_browser.alive and is_driver_alive(tab)):
+                print("Browser tab is dead, replacing...")
+                self._drop(tab)
+                tab = None
+
+            if tab is None:
+                tab = self._open_tab()
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        return tab
+
+    def _open_tab(self):
+        with self._spawn_lock:
+            with self._cond:
+                self._browsers = [b for b in self._browsers if b.alive]
+                serving = [b for b in self._browsers if not b.retiring]
+                # Fill existing browsers before starting another one
+                browser = next((b for b in serving if b.tabs < self.tabs_per_browser), None)
+                if browser is None and len(serving) >= self.browsers:
+                    raise RuntimeError("Every browser is full")
+
+            if browser is None:
+                browser = self._start_browser()
+            return browser.open_tab(self.isolate)
+
+    def _start_browser(self):
+        # Callers hold _spawn_lock
+        self._browser_count += 1
+        browser = SharedBrowser(self._browser_count, self._factory())
+        with self._cond:
+            self._browsers.append(browser)
+        return browser
+
+    def _drop(self, tab):
+        """Close a broken tab; if its browser is gone, retire the browser and its idle tabs"""
+        browser = tab._shared_browser
+        if browser.alive and browser.responsive():
+            browser.close_tab(tab)
+            with self._cond:
+                self._replaced_tabs += 1
+            return
+
+        with self._cond:
+            if browser.alive:
+                self._restarted_browsers += 1
+            stale = [t for t in self._idle if t._shared_browser is browser]
+            self._idle = [t for t in self._idle if t._shared_browser is not browser]
+            self._total -= len(stale)
+            self._cond.notify_all()
+        pids = browser.quit()
+        with self._cond:
+            self._orphans |= pids
+
+    def release(self, tab, discard=False):
+        """Return a tab to the pool, or close it if it's no longer usable"""
+        if discard or not tab._shared_browser.alive:
+            self._drop(tab)
+            with self._cond:
+                self._in_use -= 1
+                self._total -= 1
+                self._cond.notify()
+            return
+
+        if tab._shared_browser.retiring:
+            # Its replacement is already running; the maintenance thread quits the browser
+            tab._shared_browser.close_tab(tab)
+            with self._cond:
+                self._in_use -= 1
+                self._total -= 1
+                self._cond.notify()
+            return
+
+        try:
+            # Stop the last page's scripts and free its memory while idle
+            tab.get('about:blank')
+        except WebDriverException:
+            pass
+
+        with self._cond:
+            self._in_use -= 1
+            if self._closed:
+                self._total -= 1
+            else:
+                self._idle.append(tab)
+            self._cond.notify()
+
+    @contextmanager
+    def checkout(self, timeout=None):
+        """
+        Context manager around acquire/release.
+
+        A tab that crashed or closed during the block is replaced; a dead
+        browser session takes its other tabs with it.
+        """
+        tab = self.acquire(timeout)
+        try:
+            yield tab
+        except Exception as e:
+            discard = is_tab_error(e) or is_session_error(e)
+            if discard:
+                print("🔄 Browser tab error detected, replacing tab...")
+            self.release(tab, discard=discard)
+            raise
+        else:
+            self.release(tab)
+
+    def _maintain(self, interval, prewarm):
+        try:
+            self.prewarm(prewarm)
+        except Exception as e:
+            print(f"⚠️ Browser pre-warm failed: {str(e)[:100]}")
+        while interval > 0 and not self._stop.wait(interval):
+            try:
+                self.maintain()
+            except Exception as e:
+                print(f"⚠️ Browser maintenance failed: {str(e)[:100]}")
+
+    def prewarm(self, tabs):
+        """Open up to ``tabs`` idle tabs ahead of demand"""
+        for _ in range(tabs):
+            with self._cond:
+                if self._closed or self._total >= self.size:
+                    return
+                self._total += 1
+            try:
+                tab = self._open_tab()
+            except Exception:
+                with self._cond:
+                    self._total -= 1
+                raise
+            with self._cond:
+                self._idle.append(tab)
+                self._cond.notify()
+
+    def maintain(self):
+        """
+        One maintenance pass: recycle browsers past the policy, quit retired
+        browsers whose tabs have all come back, and kill leftover processes
+        """
+        with self._cond:
+            browsers = [b for b in self._browsers if b.alive]
+
+        for browser in browsers:
+            if browser.retiring:
+                if browser.tabs <= 0:
+                    self._retire(browser)
+                continue
+            browser.known_pids = process_tree(browser.pid) or browser.known_pids
+            with browser.lock:
+                discard_network_log(browser.driver)
+            reason = 'exited' if driver_exited(browser.driver) else self.policy.reason(
+                browser.navigations, time.monotonic() - browser.started_at, tree_rss_mb(browser.pid)
+            )
+            if reason:
+                self._recycle(browser, reason)
+
+        with self._cond:
+            orphans, self._orphans = self._orphans, set()
+        killed = reap(orphans)
+        if killed:
+            print(f"🧹 Killed {len(killed)} leftover browser process(es)")
+            with self._cond:
+                self._reaped += len(killed)
+
+    def _recycle(self, old, reason):
+        """Start a replacement for ``old`` with as many idle tabs, then retire ``old``"""
+        print(f"♻️ Recycling browser {old.number} ({reason}, {old.navigations} page loads)")
+        with self._spawn_lock:
+            with self._cond:
+                if self._closed:
+                    return
+                spare = len([t for t in self._idle if t._shared_browser is old])
+
+            try:
+                new = self._start_browser()
+                fresh = [new.open_tab(self.isolate) for _ in range(min(spare, self.tabs_per_browser))]
+            except Exception as e:
+                print(f"⚠️ Replacement browser failed to start, keeping browser {old.number}: {str(e)[:100]}")
+                return
+
+            with self._cond:
+                old.retiring = True
+                self._recycled[reason] = self._recycled.get(reason, 0) + 1
+                stale = [t for t in self._idle if t._shared_browser is old]
+                # Fresh tabs take over the idle slots of the old browser's tabs
+                keep, extra = fresh[:len(stale)], fresh[len(stale):]
+                self._idle = [t for t in self._idle if t._shared_browser is not old] + keep
+                self._total -= len(stale) - len(keep)
+                self._cond.notify_all()
+
+        for tab in extra:
+            tab.quit()
+        if reason == 'exited':
+            # Its tabs are gone with it; checked-out ones fail and are dropped
+            with self._cond:
+                self._restarted_browsers += 1
+            pids = old.quit()
+            with self._cond:
+                self._orphans |= pids
+            return
+        for tab in stale:
+            old.close_tab(tab)
+        if old.tabs <= 0:
+            self._retire(old)
+
+    def _retire(self, browser):
+        pids = browser.quit()
+        with self._cond:
+            self._browsers = [b for b in self._browsers if b is not browser]
+            self._orphans |= pids
+
+    def stats(self):
+        """Snapshot of browser and tab usage"""
+        with self._cond:
+            return {
+                "size": self.size,
+                "browsers": len([b for b in self._browsers if b.alive]),
+                "tabs_per_browser": self.tabs_per_browser,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "created": self._total,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "replaced": self._replaced_tabs,
+                "restarted_browsers": self._restarted_browsers,
+                "recycled": dict(self._recycled),
+                "reaped_processes": self._reaped,
+                "navigations": sum(b.navigations for b in self._browsers if b.alive)
+            }
+
+    def close(self):
+        """Quit every browser; tabs still checked out fail on their next command"""
+        self._stop.set()
+        with self._cond:
+            self._closed = True
+            browsers, self._browsers = self._browsers, []
+            self._total -= len(self._idle)
+            self._idle = []
+            orphans, self._orphans = self._orphans, set()
+            self._cond.notify_all()
+
+        for browser in browsers:
+            orphans |= browser.quit()
+        reap(orphans, grace=2.0)
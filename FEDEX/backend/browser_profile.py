@@ -0,0 +1,117 @@
+"""
+Browser Profile
+Page-load strategy and DevTools resource blocking for the scraping
+browsers: images, media, fonts and known trackers are never downloaded
+unless a provider's allowlist says it needs them
+"""
+
+import fnmatch
+import os
+
+from selenium.common.exceptions import WebDriverException
+
+# 'eager' returns from driver.get() at DOMContentLoaded instead of waiting for
+# every subresource; the scrapers wait for their own readiness conditions
+PAGE_LOAD_STRATEGY = os.getenv('PAGE_LOAD_STRATEGY', 'eager')
+BLOCK_RESOURCES = os.getenv('BLOCK_RESOURCES', 'true').lower() != 'false'
+
+
+def _extensions(*exts):
+    # Network.setBlockedURLs matches the whole URL, so cover query strings too
+    return [p for ext in exts for p in (f'*.{ext}', f'*.{ext}?*')]
+
+
+# Network.setBlockedURLs patterns ('*' matches any run of characters)
+BLOCKED_IMAGES = _extensions('png', 'jpg', 'jpeg', 'gif', 'webp', 'avif', 'bmp', 'ico', 'svg')
+BLOCKED_MEDIA = _extensions('mp4', 'webm', 'ogg', 'mp3', 'wav', 'm4a')
+BLOCKED_FONTS = _extensions('woff', 'woff2', 'ttf', 'otf', 'eot')
+BLOCKED_TRACKERS = [
+    '*google-analytics.com*',
+    '*googletagmanager.com*',
+    '*doubleclick.net*',
+    '*googlesyndication.com*',
+    '*connect.facebook.net*',
+    '*facebook.com/tr*',
+    '*hotjar.com*',
+    '*clarity.ms*',
+    '*demdex.net*',
+    '*omtrdc.net*',
+    '*nr-data.net*',
+    '*newrelic.com*',
+    '*tawk.to*',
+    '*linkedin.com/px*',
+    '*snap.licdn.com*',
+    '*bing.com/bat*'
+]
+DEFAULT_BLOCKED = BLOCKED_IMAGES + BLOCKED_MEDIA + BLOCKED_FONTS + BLOCKED_TRACKERS
+
+
+def _parse_allowlist(spec):
+    """'FedEx=*.svg,*demdex.net*;DHL=*.woff2' -> {'FedEx': [...], 'DHL': [...]}"""
+    allow = {}
+    for entry in filter(None, (e.strip() for e in spec.split(';'))):
+        provider, _, patterns = entry.partition('=')
+        allow[provider.strip()] = [p.strip() for p in patterns.split(',') if p.strip()]
+    return allow
+
+
+# Block patterns a provider's page needs, which are left unblocked for it
+# ('*' turns blocking off for the provider). Extend with RESOURCE_ALLOWLIST,
+# e.g. 'FedEx=*.svg,*demdex.net*;DHL=*'
+PROVIDER_ALLOWLIST = _parse_allowlist(os.getenv('RESOURCE_ALLOWLIST', ''))
+
+
+def blocked_patterns(provider=None):
+    """URL patterns to block for a provider's pages, minus its allowlist"""
+    if not BLOCK_RESOURCES:
+        return []
+    allowed = PROVIDER_ALLOWLIST.get(provider, [])
+    if '*' in allowed:
+        return []
+    return [p for p in DEFAULT_BLOCKED if p not in allowed and p.replace('?*', '') not in allowed]
+
+
+def is_blocked(url, provider=None):
+    """Whether the browser would refuse to load ``url`` for ``provider``"""
+    return any(fnmatch.fnmatchcase(url, p) for p in blocked_patterns(provider))
+
+
+def apply_page_load_strategy(chrome_options):
+    chrome_options.page_load_strategy = PAGE_LOAD_STRATEGY
+    return chrome_options
+
+
+def apply_multi_tab_flags(chrome_options, tabs):
+    """
+    Flags for one browser serving several concurrent tabs: background tabs
+    keep full-speed timers (their pages are being scraped, not ignored) and
+    renderer processes are capped at one per tab
+    """
+    chrome_options.add_argument('--disable-background-timer-throttling')
+    chrome_options.add_argument('--disable-backgrounding-occluded-windows')
+    chrome_options.add_argument('--disable-renderer-backgrounding')
+    chrome_options.add_argument(f'--renderer-process-limit={tabs}')
+    return chrome_options
+
+
+def apply_resource_blocking(driver, provider=None):
+    """
+    Point the browser's network blocking at ``provider``'s patterns.
+
+    Cheap to call before every lookup: the DevTools commands are only sent
+    when the provider differs from the one the driver is set up for.
+    Returns: True if blocking is active for the provider
+    """
+    patterns = blocked_patterns(provider)
+    if getattr(driver, '_blocking_provider', object()) == provider:
+        return bool(patterns)
+
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+    except (WebDriverException, AttributeError) as e:
+        # Not Chrome/Chromium, or DevTools unavailable: load everything
+        print(f"Warning: resource blocking unavailable ({str(e)[:80]})")
+        patterns = []
+    driver._blocking_provider = provider
+    return bool(patterns)
@@ -0,0 +1,212 @@
+"""
+Tracking Result Cache
+TTL cache with a bounded in-memory LRU tier and an optional SQLite tier
+that survives gunicorn restarts
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Thread-safe key/value cache where every entry carries its own TTL.
+
+    Values must be JSON-serializable when a ``db_path`` is given, since the
+    disk tier stores them as JSON. Lookups check memory first, then disk,
+    and promote disk hits back into memory.
+    """
+
+    def __init__(self, max_entries=1000, db_path=None, table='cache'):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.table = table
+
+        self._memory = OrderedDict()  # key -> (value, stored_at, expires_at)
+        self._lock = threading.Lock()
+        self._db = None
+
+        self._hits = 0
+        self._misses = 0
+        self._disk_hits = 0
+        self._evictions = 0
+
+        if db_path:
+            self._open_db()
+
+    def _open_db(self):
+        directory = os.path.dirname(os.path.abspath(self.db_path))
+        os.makedirs(directory, exist_ok=True)
+
+        # One shared connection guarded by self._lock; each gunicorn worker
+        # process opens its own and SQLite serializes writers between them
+        self._db = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "stored_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, key):
+        """
+        Look up a key.
+
+        Returns:
+            tuple: (value, age_seconds) on a hit, or None on a miss/expiry
+        """
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, stored_at, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._hits += 1
+                    return value, now - stored_at
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    f"SELECT value, stored_at, expires_at FROM {self.table} WHERE key = ?",
+                    (key,)
+                ).fetchone()
+                if row and row[2] > now:
+                    value = json.loads(row[0])
+                    self._remember(key, value, row[1], row[2])
+                    self._hits += 1
+                    self._disk_hits += 1
+                    return value, now - row[1]
+
+            self._misses += 1
+            return None
+
+    def set(self, key, value, ttl):
+        """Store a value for ``ttl`` seconds (non-positive TTLs are not stored)"""
+        if ttl <= 0:
+            return
+
+        stored_at = time.time()
+        expires_at = stored_at + ttl
+
+        with self._lock:
+            self._remember(key, value, stored_at, expires_at)
+
+            if self._db is not None:
+                self._db.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, stored_at, expires_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value, default=str), stored_at, expires_at)
+                )
+                # Opportunistically drop expired rows so the file stays small
+                self._db.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (stored_at,))
+                self._db.commit()
+
+    def delete(self, key):
+        """Remove a key from both tiers"""
+        with self._lock:
+            self._memory.pop(key, None)
+            if self._db is not None:
+                self._db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._db.commit()
+
+    def clear(self):
+        """Empty both tiers"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute(f"DELETE FROM {self.table}")
+                self._db.commit()
+
+    def _remember(self, key, value, stored_at, expires_at):
+        # Caller must hold self._lock
+        self._memory[key] = (value, stored_at, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._evictions += 1
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "disk_hits": self._disk_hits,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "persistent": self._db is not None
+            }
+
+
+# TTL tiers (seconds), overridable from the environment
+TERMINAL_TTL = int(os.getenv('TRACKING_CACHE_TERMINAL_TTL', str(24 * 3600)))
+ACTIVE_TTL = int(os.getenv('TRACKING_CACHE_ACTIVE_TTL', '600'))
+NEGATIVE_TTL = int(os.getenv('TRACKING_CACHE_NEGATIVE_TTL', '120'))
+
+TERMINAL_KEYWORDS = ['delivered', 'returned', 'return to sender']
+# 'Not Delivered', 'Undelivered', 'Delivery exception - not delivered' are
+# failed attempts that will change, not terminal states
+NEGATED_TERMINAL = re.compile(
+    r"\b(?:not|never|cannot|can't|could not|couldn't|unable to|un|non)[\s-]*"
+    r"(?:(?:yet|be|been)\s+)*(?:delivered|returned)\b"
+)
+NEGATIVE_KEYWORDS = ['error', 'not found', 'no tracking', 'unknown', 'incomplete']
+
+
+def normalize_awb(awb):
+    """Canonical form of an AWB for cache keys: no whitespace, upper case"""
+    return re.sub(r'\s+', '', str(awb)).upper()
+
+
+def status_ttl(status):
+    """
+    Pick a TTL tier from a provider's status string.
+
+    Terminal statuses (Delivered, Returned) never change, so they're kept
+    for a long time. Failed lookups (Not Found, Error, Unknown) are cached
+    briefly so a hammered bad AWB doesn't re-scrape on every request.
+    Everything else is treated as in transit.
+    """
+    s = str(status or '').strip().lower()
+
+    if not s or any(k in s for k in NEGATIVE_KEYWORDS):
+        return NEGATIVE_TTL
+    if any(k in s for k in TERMINAL_KEYWORDS) and not NEGATED_TERMINAL.search(s):
+        return TERMINAL_TTL
+    return ACTIVE_TTL
+
+
+class TrackingCache:
+    """Provider lookup results keyed by (provider, normalized AWB)"""
+
+    def __init__(self, max_entries=500, db_path=None):
+        self._cache = TTLCache(max_entries=max_entries, db_path=db_path, table='tracking_results')
+
+    @staticmethod
+    def _key(provider, awb):
+        return f"{provider}|{normalize_awb(awb)}"
+
+    def get(self, provider, awb):
+        """Returns (result, age_seconds) or None"""
+        return self._cache.get(self._key(provider, awb))
+
+    def put(self, provider, awb, result):
+        """Cache a provider result with a TTL chosen from its status"""
+        self._cache.set(self._key(provider, awb), result, status_ttl(result.get('status')))
+
+    def invalidate(self, provider, awb):
+        self._cache.delete(self._key(provider, awb))
+
+    def stats(self):
+        return self._cache.stats()
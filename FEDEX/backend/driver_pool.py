@@ -0,0 +1,108 @@
+"""
+Chrome Drivers
+Creates the headless Chrome drivers behind BrowserManager and the scrapers,
+plus the health and error checks the tab pool uses to replace dead sessions
+"""
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+from browser_profile import apply_page_load_strategy, apply_resource_blocking, apply_multi_tab_flags
+from xhr_capture import apply_network_capture
+
+
+class DriverPoolTimeout(Exception):
+    """Raised when no browser tab becomes free within the checkout timeout"""
+
+
+def create_chrome_driver(provider=None, performance_log=False, optimized=True, tabs=1):
+    """
+    Create a headless Chrome driver configured for the tracking scrapers.
+
+    Page loads use the eager strategy and images, media, fonts and trackers
+    are blocked (see browser_profile); ``provider`` picks the allowlist to
+    start with. ``optimized=False`` gives the old full-load profile and
+    ``performance_log`` records DevTools network events, both for
+    benchmarking. ``tabs`` > 1 sets the browser up to host that many
+    concurrent tabs (see browser_manager) instead of running single-process.
+    """
+    print("Initializing Chrome Driver...")
+    chrome_options = Options()
+    if optimized:
+        apply_page_load_strategy(chrome_options)
+
+    # Headless mode
+    chrome_options.add_argument('--headless=new')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')  # Important for Docker
+    chrome_options.add_argument('--disable-software-rasterizer')
+    chrome_options.add_argument('--window-size=1920,1080')
+    chrome_options.add_argument('--no-zygote')
+    chrome_options.add_argument('--disable-features=VizDisplayCompositor')
+
+    # Memory optimization
+    chrome_options.add_argument('--disable-extensions')
+    chrome_options.add_argument('--disable-setuid-sandbox')
+    if tabs > 1:
+        apply_multi_tab_flags(chrome_options, tabs)
+    else:
+        chrome_options.add_argument('--single-process')  # Use single process
+    chrome_options.add_argument('--disable-dev-tools')
+
+    # Stealth mode
+    chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+    chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+
+    if performance_log:
+        chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    elif optimized:
+        apply_network_capture(chrome_options)  # see xhr_capture (XHR_CAPTURE)
+
+    try:
+        driver = webdriver.Chrome(options=chrome_options)
+        # Keep health checks from hanging on a wedged renderer
+        driver.set_script_timeout(5)
+        # Hide webdriver flag
+        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        if optimized:
+            apply_resource_blocking(driver, provider)
+        print("✅ Chrome driver initialized successfully")
+        return driver
+    except Exception as e:
+        print(f"❌ Failed to initialize Chrome driver: {str(e)}")
+        raise
+
+
+def is_driver_alive(driver):
+    """Round-trip a trivial script through the browser to confirm the session still works"""
+    try:
+        return driver.execute_script("return document.readyState") is not None
+    except Exception:
+        return False
+
+
+def is_tab_error(error):
+    """True if an exception means one tab died (crashed or closed) but the browser is fine"""
+    message = str(error).lower()
+    return any(marker in message for marker in (
+        'tab crashed',
+        'no such window',
+        'target window already closed',
+        'target frame detached',
+    ))
+
+
+def is_session_error(error):
+    """True if an exception means the WebDriver session itself is gone"""
+    message = str(error).lower()
+    return any(marker in message for marker in (
+        'invalid session id',
+        'session deleted',
+        'no such window',
+        'chrome not reachable',
+        'disconnected',
+    ))
+
@@ -4,11 +4,22 @@ Production-ready FedEx REST API integration for automated tracking
 """
 
 from .token_manager import get_fedex_access_token, FedExTokenManager
-from .tracking_service import track_shipment, FedExTrackingService
+from .tracking_service import track_shipment, track_many, FedExTrackingService
+from .session import http_session, close_http_session, fedex_post
+from .rate_limit import fedex_limiter
+from .records import Location, TrackingEvent, to_dict
 
 __all__ = [
     'get_fedex_access_token',
     'FedExTokenManager',
     'track_shipment',
-    'FedExTrackingService'
+    'track_many',
+    'FedExTrackingService',
+    'http_session',
+    'close_http_session',
+    'fedex_post',
+    'fedex_limiter',
+    'Location',
+    'TrackingEvent',
+    'to_dict'
 ]
@@ -0,0 +1,152 @@
+"""
+FedEx Rate Limiting
+Token-bucket rate limiter paired with an AIMD concurrency controller,
+shared by every FedEx API call in the process: both back off on 429/5xx
+(honouring Retry-After) and ramp back up while calls succeed
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Starting rate (requests/second) and the bounds AIMD moves it between
+FEDEX_RATE_LIMIT = float(os.getenv('FEDEX_RATE_LIMIT', '5'))
+FEDEX_RATE_MIN = float(os.getenv('FEDEX_RATE_MIN', '0.5'))
+FEDEX_RATE_MAX = float(os.getenv('FEDEX_RATE_MAX', '20'))
+# Starting and maximum requests in flight
+FEDEX_CONCURRENCY = int(os.getenv('FEDEX_CONCURRENCY', '4'))
+FEDEX_CONCURRENCY_MAX = int(os.getenv('FEDEX_CONCURRENCY_MAX', '10'))
+# Retries of a throttled (429) or failed (5xx) call
+FEDEX_MAX_RETRIES = int(os.getenv('FEDEX_MAX_RETRIES', '3'))
+
+# Multiplicative decrease on throttling, at most once per cooldown so one
+# wave of in-flight 429s only halves the limits once
+DECREASE_FACTOR = 0.5
+DECREASE_COOLDOWN = 1.0
+# Additive increase: about +RATE_STEP req/s and +1 in flight per
+# limit's worth of successful calls
+RATE_STEP = 1.0
+
+
+def is_throttled(status_code: Optional[int]) -> bool:
+    """429 and 5xx mean back off; None stands for a network failure"""
+    return status_code is None or status_code == 429 or status_code >= 500
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveLimiter:
+    """
+    Gate for outgoing API calls: ``slot()`` waits for a free concurrency
+    slot and a rate token, ``record()`` reports how the call went.
+
+    Successes raise the rate and the concurrency limit additively; 429,
+    5xx and network failures halve both, and a Retry-After pauses every
+    caller until it has passed.
+    """
+
+    def __init__(self, rate=FEDEX_RATE_LIMIT, min_rate=FEDEX_RATE_MIN, max_rate=FEDEX_RATE_MAX,
+                 concurrency=FEDEX_CONCURRENCY, max_concurrency=FEDEX_CONCURRENCY_MAX):
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, min_rate)
+        self.max_concurrency = max(1, max_concurrency)
+        self.rate = min(max(rate, self.min_rate), self.max_rate)
+        self.concurrency = float(min(max(1, concurrency), self.max_concurrency))
+
+        self._cond = threading.Condition()
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._in_flight = 0
+        self._stats = {"calls": 0, "throttled": 0, "backoffs": 0}
+
+    def _take_token(self):
+        while True:
+            with self._cond:
+                now = time.monotonic()
+                # A bucket holds at most one second's worth of requests
+                self._tokens = min(max(1.0, self.rate), self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    @contextmanager
+    def slot(self):
+        """Hold a concurrency slot, waiting for a rate token, around one call"""
+        with self._cond:
+            while self._in_flight >= int(self.concurrency):
+                self._cond.wait()
+            self._in_flight += 1
+        try:
+            self._take_token()
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    def record(self, status_code: Optional[int], retry_after: Optional[float] = None):
+        """Adjust the limits after a call (``status_code`` None = network failure)"""
+        with self._cond:
+            self._stats["calls"] += 1
+            now = time.monotonic()
+            if not is_throttled(status_code):
+                self.rate = min(self.max_rate, self.rate + RATE_STEP / self.rate)
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+                self._cond.notify_all()
+                return
+
+            self._stats["throttled"] += 1
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+            if now - self._last_decrease >= DECREASE_COOLDOWN:
+                self._last_decrease = now
+                self._stats["backoffs"] += 1
+                self.rate = max(self.min_rate, self.rate * DECREASE_FACTOR)
+                self.concurrency = max(1.0, self.concurrency * DECREASE_FACTOR)
+                self._tokens = 0.0
+                logger.warning(
+                    f"FedEx API {'network failure' if status_code is None else f'HTTP {status_code}'}: "
+                    f"backing off to {self.rate:.1f} req/s, {int(self.concurrency)} in flight"
+                    + (f", paused {retry_after:.1f}s" if retry_after else "")
+                )
+
+    def stats(self) -> Dict:
+        """Current rate, concurrency limit, calls in flight and throttling counts"""
+        with self._cond:
+            return dict(
+                self._stats,
+                rate=round(self.rate, 2),
+                concurrency=int(self.concurrency),
+                in_flight=self._in_flight,
+                paused_for=round(max(0.0, self._paused_until - time.monotonic()), 1)
+            )
+
+
+# Shared by every FedEx call in the process
+fedex_limiter = AdaptiveLimiter()
@@ -0,0 +1,98 @@
+"""
+FedEx Result Records
+Compact slotted records for normalized locations and scan events, with
+interned place/status strings, so thousands of results held by a batch run
+don't carry a dict per event and per location
+"""
+
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+def intern_text(value: Any) -> str:
+    """Interned string for values that repeat across shipments (cities, codes)"""
+    return sys.intern(value) if isinstance(value, str) else ''
+
+
+class _MappingAccess:
+    """
+    ``record['city']`` / ``record.get('city')`` like the dicts results used
+    to hold, so existing callers keep working
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.keys():
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.keys() else default
+
+    def keys(self):
+        return self.__match_args__  # The dataclass field names
+
+
+@dataclass(slots=True)
+class Location(_MappingAccess):
+    city: str = ''
+    state: str = ''
+    country: str = ''
+
+    @classmethod
+    def from_api(cls, location: Optional[Dict]) -> 'Location':
+        """From a FedEx address/scanLocation object"""
+        location = location or {}
+        return cls(
+            intern_text(location.get('city', '')),
+            intern_text(location.get('stateOrProvinceCode', '')),
+            intern_text(location.get('countryCode', ''))
+        )
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"city": self.city, "state": self.state, "country": self.country}
+
+
+@dataclass(slots=True)
+class TrackingEvent(_MappingAccess):
+    timestamp: str = ''
+    status: str = ''
+    status_code: str = ''
+    location: Optional[Location] = None
+
+    @classmethod
+    def from_scan(cls, scan: Dict) -> 'TrackingEvent':
+        """From one FedEx scanEvents entry"""
+        return cls(
+            scan.get('date', ''),
+            intern_text(scan.get('eventDescription', '')),
+            intern_text(scan.get('eventType', '')),
+            Location.from_api(scan.get('scanLocation'))
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "timestamp": self.timestamp,
+            "status": self.status,
+            "status_code": self.status_code,
+            "location": (self.location or Location()).to_dict()
+        }
+
+
+def to_dict(result: Dict) -> Dict:
+    """
+    Plain-dict copy of a normalized result (records expanded), e.g. for
+    JSON responses; nothing is dropped
+    """
+    plain = dict(result)
+    for key in ('origin', 'destination'):
+        if isinstance(plain.get(key), Location):
+            plain[key] = plain[key].to_dict()
+    if 'events' in plain:
+        plain['events'] = [
+            event.to_dict() if isinstance(event, TrackingEvent) else event
+            for event in plain['events']
+        ]
+    return plain
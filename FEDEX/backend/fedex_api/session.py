@@ -0,0 +1,105 @@
+"""
+FedEx HTTP Session
+Shared keep-alive requests.Session for the OAuth and Track API calls, so
+lookups reuse pooled TCP+TLS connections to apis.fedex.com instead of
+handshaking on every request
+"""
+
+import logging
+import os
+import threading
+import time
+from http import cookiejar
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .rate_limit import FEDEX_MAX_RETRIES, fedex_limiter, is_throttled, retry_after_seconds
+
+logger = logging.getLogger(__name__)
+
+# Connections kept open to the FedEx host; size it for the batch tracker's
+# and the web workers' threads together (extra threads open throwaway connections)
+FEDEX_HTTP_POOL_SIZE = int(os.getenv('FEDEX_HTTP_POOL_SIZE', '20'))
+FEDEX_CONNECT_TIMEOUT = float(os.getenv('FEDEX_CONNECT_TIMEOUT', '5'))
+FEDEX_READ_TIMEOUT = float(os.getenv('FEDEX_READ_TIMEOUT', '15'))
+
+# (connect, read) timeout for every FedEx request
+FEDEX_TIMEOUT = (FEDEX_CONNECT_TIMEOUT, FEDEX_READ_TIMEOUT)
+
+
+class _NoCookies(cookiejar.DefaultCookiePolicy):
+    """The API is stateless; keeping no cookies leaves nothing shared between threads but the pool"""
+
+    def set_ok(self, cookie, request):
+        return False
+
+    def return_ok(self, cookie, request):
+        return False
+
+
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+_lock = threading.Lock()
+
+
+def _new_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=FEDEX_HTTP_POOL_SIZE)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.cookies.set_policy(_NoCookies())
+    return session
+
+
+def http_session() -> requests.Session:
+    """
+    The process-wide FedEx session. Safe to share across threads as long as
+    callers pass per-request headers instead of changing the session's.
+    A forked worker (e.g. gunicorn --preload) gets its own session rather
+    than the parent's sockets.
+    """
+    global _session, _session_pid
+    with _lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = _new_session()
+            _session_pid = os.getpid()
+        return _session
+
+
+def fedex_post(url: str, **kwargs) -> requests.Response:
+    """
+    POST to the FedEx API over the shared session, within the process-wide
+    rate and concurrency limits (see rate_limit). 429/5xx answers are
+    retried up to FEDEX_MAX_RETRIES times, after their Retry-After or an
+    exponential backoff.
+    Returns: the last response; network errors are raised as before
+    """
+    kwargs.setdefault('timeout', FEDEX_TIMEOUT)
+    for attempt in range(FEDEX_MAX_RETRIES + 1):
+        with fedex_limiter.slot():
+            try:
+                response = http_session().post(url, **kwargs)
+            except requests.exceptions.RequestException:
+                fedex_limiter.record(None)
+                raise
+        retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+        fedex_limiter.record(response.status_code, retry_after)
+
+        if not is_throttled(response.status_code) or attempt == FEDEX_MAX_RETRIES:
+            return response
+        logger.warning(f"FedEx API HTTP {response.status_code}, retry {attempt + 1}/{FEDEX_MAX_RETRIES}")
+        # A Retry-After pauses the limiter itself; otherwise back off here
+        if retry_after is None:
+            time.sleep(min(30.0, 0.5 * 2 ** attempt))
+    return response
+
+
+def close_http_session():
+    """Close pooled connections; the next request opens a new session"""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -4,26 +4,44 @@ Handles secure token generation, caching, and automatic refresh
 """
 
 import os
+import threading
 import time
 import requests
-from datetime import datetime, timedelta
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 import logging
+from .session import fedex_post
+from .token_store import TokenStore
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Tokens are treated as expired this many seconds early
+TOKEN_EXPIRY_BUFFER = 60
+# Renew in the background once a token has less than this left, so callers
+# keep using the current token instead of waiting on OAuth
+FEDEX_TOKEN_REFRESH_MARGIN = int(os.getenv('FEDEX_TOKEN_REFRESH_MARGIN', '300'))
+# Token shared by every process on the host (empty = per-process only)
+FEDEX_TOKEN_STORE = os.getenv(
+    'FEDEX_TOKEN_STORE',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'fedex_token.db')
+)
+
 
 class FedExTokenManager:
     """
     Manages FedEx OAuth tokens with automatic caching and refresh.
     Thread-safe singleton implementation for production use.
+    
+    Refreshes are single-flight: one thread fetches while the others wait
+    for its token, and with a token store only one process fetches while
+    the others pick its token up from the store. A token close to expiry
+    is renewed on a background thread while callers keep using it.
     """
     
     _instance = None
     _token_cache: Optional[Dict] = None
-    _token_expiry: Optional[datetime] = None
+    _token_expiry: Optional[float] = None  # time.time() when the token expires
     
     def __new__(cls):
         """Singleton pattern to ensure single token manager instance"""
@@ -56,6 +74,18 @@ class FedExTokenManager:
                 
                 logger.info(f"FedEx Token Manager initialized in {self.mode.upper()} mode")
             
+            self._lock = threading.Lock()          # held while a token is fetched
+            self._renew_lock = threading.Lock()    # guards _renewing only, never waits on OAuth
+            self._renewing = False
+            self._store = None
+            self._store_key = f"{self.mode}:{self.client_id}"
+            if FEDEX_TOKEN_STORE:
+                try:
+                    self._store = TokenStore(FEDEX_TOKEN_STORE)
+                except Exception as e:
+                    logger.warning(f"FedEx token store unavailable, keeping the token per process: {e}")
+            self._stats = {"fetched": 0, "from_store": 0, "background_renewals": 0, "renewal_failures": 0}
+            
             self.initialized = True
     
     def get_access_token(self) -> str:
@@ -77,21 +107,84 @@ class FedExTokenManager:
             )
         
         # Check if cached token is still valid
-        if self._is_token_valid():
+        token = self._valid_token()
+        if token:
             logger.debug("Using cached access token")
-            return self._token_cache['access_token']
+            if self._expires_in() < FEDEX_TOKEN_REFRESH_MARGIN:
+                self._renew_in_background()
+            return token
         
-        # Request new token
-        logger.info("Requesting new FedEx access token")
-        return self._request_new_token()
+        # Single-flight: whoever gets the lock first fetches, the rest reuse its token
+        with self._lock:
+            token = self._valid_token()
+            if token:
+                return token
+            logger.info("Requesting new FedEx access token")
+            return self._refresh(TOKEN_EXPIRY_BUFFER)
+    
+    def _valid_token(self) -> Optional[str]:
+        """The cached token if it exists and isn't within the expiry buffer"""
+        cache, expiry = self._token_cache, self._token_expiry
+        if cache is None or expiry is None or time.time() >= expiry - TOKEN_EXPIRY_BUFFER:
+            return None
+        return cache['access_token']
     
     def _is_token_valid(self) -> bool:
         """Check if cached token exists and hasn't expired"""
-        if self._token_cache is None or self._token_expiry is None:
-            return False
+        return self._valid_token() is not None
+    
+    def _expires_in(self) -> float:
+        expiry = self._token_expiry
+        return expiry - time.time() if expiry is not None else 0
+    
+    def _refresh(self, min_remaining: float) -> str:
+        """
+        Get a token with more than ``min_remaining`` seconds left: from the
+        store if another process already refreshed, else from FedEx.
+        Caller must hold self._lock.
+        """
+        if self._store is None:
+            token, expires_at = self._fetch_token()
+        else:
+            fetched = []
+            
+            def fetch():
+                fetched.append(True)
+                return self._fetch_token()
+            
+            token, expires_at = self._store.refresh(
+                self._store_key, lambda stored_expiry: stored_expiry - time.time() > min_remaining, fetch
+            )
+            if not fetched:
+                self._stats["from_store"] += 1
+                logger.info("Using FedEx access token refreshed by another process")
         
-        # Add 60 second buffer before expiry
-        return datetime.now() < (self._token_expiry - timedelta(seconds=60))
+        self._token_cache = {'access_token': token}
+        self._token_expiry = expires_at
+        return token
+    
+    def _renew_in_background(self):
+        """Start one background renewal unless one is already running"""
+        with self._renew_lock:
+            if self._renewing:
+                return
+            self._renewing = True
+        threading.Thread(target=self._renew, name='fedex-token-renewal', daemon=True).start()
+    
+    def _renew(self):
+        try:
+            with self._lock:
+                if self._expires_in() >= FEDEX_TOKEN_REFRESH_MARGIN:
+                    return  # Renewed meanwhile
+                self._refresh(FEDEX_TOKEN_REFRESH_MARGIN)
+                self._stats["background_renewals"] += 1
+        except Exception as e:
+            # The current token is still good; the next call past the margin retries
+            self._stats["renewal_failures"] += 1
+            logger.warning(f"Background FedEx token renewal failed: {e}")
+        finally:
+            with self._renew_lock:
+                self._renewing = False
     
     def _request_new_token(self) -> str:
         """
@@ -100,6 +193,19 @@ class FedExTokenManager:
         Returns:
             str: New access token
             
+        Raises:
+            Exception: If token request fails
+        """
+        with self._lock:
+            return self._refresh(TOKEN_EXPIRY_BUFFER)
+    
+    def _fetch_token(self) -> Tuple[str, float]:
+        """
+        POST to the OAuth endpoint
+        
+        Returns:
+            tuple: (access token, time.time() when it expires)
+            
         Raises:
             Exception: If token request fails
         """
@@ -116,11 +222,10 @@ class FedExTokenManager:
             }
             
             # Make OAuth request
-            response = requests.post(
+            response = fedex_post(
                 self.oauth_url,
                 headers=headers,
-                data=data,
-                timeout=10
+                data=data
             )
             
             # Handle errors
@@ -137,12 +242,9 @@ class FedExTokenManager:
             if not access_token:
                 raise Exception("No access_token in FedEx OAuth response")
             
-            # Cache token
-            self._token_cache = token_data
-            self._token_expiry = datetime.now() + timedelta(seconds=expires_in)
-            
+            self._stats["fetched"] += 1
             logger.info(f"New token obtained, expires in {expires_in}s")
-            return access_token
+            return access_token, time.time() + int(expires_in)
             
         except requests.exceptions.RequestException as e:
             logger.error(f"Network error during OAuth: {type(e).__name__}")
@@ -172,11 +274,26 @@ class FedExTokenManager:
         except:
             return f"HTTP {response.status_code}"
     
-    def invalidate_token(self):
-        """Force token refresh on next request"""
-        self._token_cache = None
-        self._token_expiry = None
+    def invalidate_token(self, rejected_token: Optional[str] = None):
+        """
+        Force token refresh on next request. Pass the token the API
+        rejected so that concurrent 401s don't also throw away the fresh
+        token another thread already fetched.
+        """
+        with self._lock:
+            current = self._token_cache['access_token'] if self._token_cache else None
+            if rejected_token is not None and current is not None and current != rejected_token:
+                return
+            self._token_cache = None
+            self._token_expiry = None
+            if self._store is not None and (rejected_token or current):
+                self._store.discard(self._store_key, rejected_token or current)
         logger.info("Token cache invalidated")
+    
+    def stats(self) -> Dict:
+        """Token fetches, tokens taken from the store, background renewals"""
+        return dict(self._stats, expires_in=max(0, round(self._expires_in())),
+                    shared_store=self._store is not None)
 
 
 # Global instance
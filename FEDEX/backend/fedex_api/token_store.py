@@ -0,0 +1,146 @@
+"""
+FedEx Token Store
+Small SQLite file holding the current OAuth token, so gunicorn workers and
+the batch tracker share one token and only one process refreshes it at a time
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Optional, Tuple
+
+from .rate_limit import FEDEX_MAX_RETRIES
+from .session import FEDEX_CONNECT_TIMEOUT, FEDEX_READ_TIMEOUT
+
+# SQLite busy timeout; transactions only read or write a row, never span a fetch
+TOKEN_STORE_LOCK_TIMEOUT = 30
+# How long a refreshing process holds its lease before others may take over:
+# the OAuth request's timeouts across its retries, plus backoff. Outliving it
+# only costs a second fetch. Waiters poll the store meanwhile.
+TOKEN_STORE_LEASE = (FEDEX_CONNECT_TIMEOUT + FEDEX_READ_TIMEOUT) * (FEDEX_MAX_RETRIES + 1) + 30
+TOKEN_STORE_POLL_INTERVAL = 0.2
+
+
+class TokenStore:
+    """
+    Tokens by key (mode + client id) with their expiry as a Unix timestamp.
+
+    ``refresh`` takes a lease row before fetching, so a process that finds
+    the token stale waits for a refresh already under way in another
+    process and then picks up its token instead of fetching again. The
+    fetch itself runs outside any transaction; a lease left by a crashed
+    or stuck process expires after ``lease`` seconds.
+    """
+
+    def __init__(self, path: str, lease: float = TOKEN_STORE_LEASE):
+        self.path = path
+        self.lease = lease
+        self._lock = threading.Lock()
+        self._holder = uuid.uuid4().hex
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Autocommit mode, so each step controls its own BEGIN IMMEDIATE
+        self._db = sqlite3.connect(path, timeout=TOKEN_STORE_LOCK_TIMEOUT,
+                                   check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tokens ("
+            "key TEXT PRIMARY KEY, token TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS leases ("
+            "key TEXT PRIMARY KEY, holder TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        try:
+            os.chmod(path, 0o600)  # The token is a credential
+        except OSError:
+            pass
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """(token, expires_at) for a key, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT token, expires_at FROM tokens WHERE key = ?", (key,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def _transaction(self, step: Callable):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                result = step()
+                self._db.execute("COMMIT")
+                return result
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _check_or_lease(self, key: str, is_fresh: Callable[[float], bool]):
+        """
+        ('token', (token, expires_at)) if the stored token is fresh, else
+        ('leased', None) once this process holds the lease, or ('wait', None)
+        while another process does
+        """
+        def step():
+            now = time.time()
+            row = self._db.execute(
+                "SELECT token, expires_at FROM tokens WHERE key = ?", (key,)
+            ).fetchone()
+            if row and is_fresh(row[1]):
+                return 'token', (row[0], row[1])
+            lease = self._db.execute(
+                "SELECT holder, expires_at FROM leases WHERE key = ?", (key,)
+            ).fetchone()
+            if lease and lease[0] != self._holder and lease[1] > now:
+                return 'wait', None
+            self._db.execute(
+                "INSERT OR REPLACE INTO leases (key, holder, expires_at) VALUES (?, ?, ?)",
+                (key, self._holder, now + self.lease)
+            )
+            return 'leased', None
+        return self._transaction(step)
+
+    def _store(self, key: str, token: str, expires_at: float):
+        def step():
+            self._db.execute(
+                "INSERT OR REPLACE INTO tokens (key, token, expires_at) VALUES (?, ?, ?)",
+                (key, token, expires_at)
+            )
+            self._db.execute("DELETE FROM tokens WHERE expires_at <= ?", (time.time(),))
+            self._db.execute("DELETE FROM leases WHERE key = ? AND holder = ?", (key, self._holder))
+        self._transaction(step)
+
+    def _release(self, key: str):
+        with self._lock:
+            self._db.execute("DELETE FROM leases WHERE key = ? AND holder = ?", (key, self._holder))
+
+    def refresh(self, key: str, is_fresh: Callable[[float], bool],
+                fetch: Callable[[], Tuple[str, float]]) -> Tuple[str, float]:
+        """
+        Return the stored token if ``is_fresh(expires_at)`` accepts it, else
+        store and return ``fetch()``'s (token, expires_at). Waits while
+        another process holds the lease, then re-checks the store.
+        """
+        while True:
+            state, stored = self._check_or_lease(key, is_fresh)
+            if state == 'token':
+                return stored
+            if state == 'wait':
+                time.sleep(TOKEN_STORE_POLL_INTERVAL)
+                continue
+
+            try:
+                token, expires_at = fetch()
+            except BaseException:
+                # Let a waiting process try instead of sitting out the lease
+                self._release(key)
+                raise
+            self._store(key, token, expires_at)
+            return token, expires_at
+
+    def discard(self, key: str, token: str):
+        """Drop a token the API rejected (a newer one stored meanwhile is kept)"""
+        with self._lock:
+            self._db.execute("DELETE FROM tokens WHERE key = ? AND token = ?", (key, token))
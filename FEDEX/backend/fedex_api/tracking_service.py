@@ -5,14 +5,28 @@ Production-ready shipment tracking using FedEx REST API
 
 import os
 import requests
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import logging
 from .token_manager import get_fedex_access_token, token_manager
+from .session import fedex_post
+from .rate_limit import FEDEX_CONCURRENCY_MAX
+from .records import Location, TrackingEvent, intern_text
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# The Track API accepts up to 30 tracking numbers per request
+FEDEX_MAX_TRACKING_NUMBERS = 30
+FEDEX_TRACK_BATCH_SIZE = min(int(os.getenv('FEDEX_TRACK_BATCH_SIZE', '30')), FEDEX_MAX_TRACKING_NUMBERS)
+# Keep each shipment's raw API object in results as 'raw_data' (debugging only;
+# it is most of a result's memory)
+FEDEX_KEEP_RAW_DATA = os.getenv('FEDEX_KEEP_RAW_DATA', 'false').lower() == 'true'
+# Threads sending chunk requests; the shared rate limiter decides how many
+# are actually in flight
+FEDEX_TRACK_WORKERS = int(os.getenv('FEDEX_TRACK_WORKERS', str(FEDEX_CONCURRENCY_MAX)))
+
 
 class FedExTrackingService:
     """
@@ -20,9 +34,15 @@ class FedExTrackingService:
     and comprehensive error handling
     """
     
-    def __init__(self):
-        """Initialize with environment-based configuration"""
+    def __init__(self, keep_raw: bool = FEDEX_KEEP_RAW_DATA):
+        """
+        Initialize with environment-based configuration
+        
+        Args:
+            keep_raw: Include the raw API shipment object as 'raw_data'
+        """
         self.mode = os.getenv('FEDEX_MODE', 'sandbox').lower()
+        self.keep_raw = keep_raw
         
         # Set API endpoint based on mode
         if self.mode == 'production':
@@ -41,7 +61,11 @@ class FedExTrackingService:
             retry_on_auth_error: Retry once if token expires (default: True)
             
         Returns:
-            dict: Normalized tracking data with status, events, locations
+            dict: Normalized tracking data with status, events, locations.
+            origin/destination are Location records and events are
+            TrackingEvent records; both read like the dicts shown below,
+            and fedex_api.to_dict(result) expands them. 'raw_data' is only
+            included when the service was created with keep_raw=True.
             
         Example response:
             {
@@ -62,43 +86,10 @@ class FedExTrackingService:
             }
         """
         try:
-            # Get valid access token
-            access_token = get_fedex_access_token()
-            
-            # Prepare request
-            headers = {
-                'Authorization': f'Bearer {access_token}',
-                'Content-Type': 'application/json',
-                'X-locale': 'en_US'
-            }
-            
-            payload = {
-                "trackingInfo": [
-                    {
-                        "trackingNumberInfo": {
-                            "trackingNumber": tracking_number
-                        }
-                    }
-                ],
-                "includeDetailedScans": True
-            }
-            
-            # Make API request
             logger.debug(f"Tracking shipment: {tracking_number}")
-            response = requests.post(
-                self.tracking_url,
-                headers=headers,
-                json=payload,
-                timeout=15
-            )
-            
-            # Handle authentication errors
-            if response.status_code == 401 and retry_on_auth_error:
-                logger.warning("Token expired, refreshing and retrying")
-                token_manager.invalidate_token()
-                return self.track_shipment(tracking_number, retry_on_auth_error=False)
+            response = self._request([tracking_number], retry_on_auth_error)
             
-            # Handle other errors
+            # Handle errors
             if response.status_code != 200:
                 return self._handle_error(response, tracking_number)
             
@@ -119,19 +110,140 @@ class FedExTrackingService:
     
     def track_multiple(self, tracking_numbers: List[str]) -> List[Dict]:
         """
-        Track multiple shipments (sequential processing)
+        Track multiple shipments, packing up to FEDEX_TRACK_BATCH_SIZE
+        numbers into each API request (see track_many)
         
         Args:
             tracking_numbers: List of tracking numbers
             
         Returns:
-            list: List of tracking results
+            list: Tracking results in the same order as tracking_numbers
+        """
+        results = dict(self.track_many(tracking_numbers))
+        return [results[str(number).strip()] for number in tracking_numbers]
+    
+    def track_many(self, tracking_numbers: Iterable[str],
+                   batch_size: int = FEDEX_TRACK_BATCH_SIZE,
+                   max_workers: int = FEDEX_TRACK_WORKERS) -> Iterator[Tuple[str, Dict]]:
+        """
+        Track shipments in chunks of up to ``batch_size`` numbers per API
+        request, sent from up to ``max_workers`` threads (the shared rate
+        limiter decides how many are in flight)
+        
+        Args:
+            tracking_numbers: Tracking numbers (duplicates are tracked once)
+            batch_size: Numbers per request (at most 30)
+            max_workers: Concurrent requests
+            
+        Yields:
+            (tracking_number, result) as each chunk completes; every number
+            gets a result, failed ones an error response
+        """
+        numbers = list(dict.fromkeys(str(number).strip() for number in tracking_numbers))
+        size = max(1, min(batch_size, FEDEX_MAX_TRACKING_NUMBERS))
+        chunks = [numbers[i:i + size] for i in range(0, len(numbers), size)]
+        if not chunks:
+            return
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as executor:
+            futures = [executor.submit(self._track_chunk, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                yield from future.result().items()
+    
+    def _request(self, tracking_numbers: List[str], retry_on_auth_error: bool = True) -> requests.Response:
+        """
+        POST one tracking request for up to 30 numbers over the shared
+        keep-alive session and rate limiter, refreshing the token once on a 401
         """
-        results = []
-        for tracking_num in tracking_numbers:
-            result = self.track_shipment(tracking_num)
-            results.append(result)
-        return results
+        access_token = get_fedex_access_token()
+        
+        headers = {
+            'Authorization': f'Bearer {access_token}',
+            'Content-Type': 'application/json',
+            'X-locale': 'en_US'
+        }
+        
+        payload = {
+            "trackingInfo": [
+                {
+                    "trackingNumberInfo": {
+                        "trackingNumber": number
+                    }
+                }
+                for number in tracking_numbers
+            ],
+            "includeDetailedScans": True
+        }
+        
+        response = fedex_post(
+            self.tracking_url,
+            headers=headers,
+            json=payload
+        )
+        
+        # Handle authentication errors
+        if response.status_code == 401 and retry_on_auth_error:
+            logger.warning("Token expired, refreshing and retrying")
+            token_manager.invalidate_token(access_token)
+            return self._request(tracking_numbers, retry_on_auth_error=False)
+        
+        return response
+    
+    def _track_chunk(self, tracking_numbers: List[str]) -> Dict[str, Dict]:
+        """
+        Track one chunk of numbers with a single request
+        
+        Returns:
+            dict: {tracking_number: result} for every number in the chunk
+        """
+        try:
+            logger.debug(f"Tracking {len(tracking_numbers)} shipments in one request")
+            response = self._request(tracking_numbers)
+            
+            # One malformed number can get the whole request rejected;
+            # track the chunk one by one so only that number fails
+            if response.status_code == 400 and len(tracking_numbers) > 1:
+                logger.warning(f"Chunk of {len(tracking_numbers)} rejected, tracking individually")
+                return {number: self.track_shipment(number) for number in tracking_numbers}
+            
+            if response.status_code != 200:
+                error = self._handle_error(response, tracking_numbers[0])
+                return {
+                    number: dict(error, tracking_number=number)
+                    for number in tracking_numbers
+                }
+            
+            return self._demultiplex(response.json(), tracking_numbers)
+            
+        except requests.exceptions.Timeout:
+            logger.error(f"Timeout tracking {len(tracking_numbers)} shipments")
+            error_type = "Request timeout"
+        
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Network error tracking {len(tracking_numbers)} shipments: {type(e).__name__}")
+            error_type = f"Network error: {type(e).__name__}"
+        
+        except Exception as e:
+            logger.error(f"Unexpected error tracking {len(tracking_numbers)} shipments: {str(e)}")
+            error_type = "System error"
+        
+        return {number: self._error_response(number, error_type) for number in tracking_numbers}
+    
+    def _demultiplex(self, raw_data: Dict, tracking_numbers: List[str]) -> Dict[str, Dict]:
+        """
+        Split a multi-number response into a normalized result per number,
+        matched on each completeTrackResults entry's trackingNumber
+        """
+        complete_tracks = {}
+        for track_result in raw_data.get('output', {}).get('completeTrackResults', []):
+            complete_tracks.setdefault(str(track_result.get('trackingNumber', '')).strip(), track_result)
+        
+        return {
+            number: self._normalize_track_result(complete_tracks[number], number)
+            if number in complete_tracks
+            else self._error_response(number, "No tracking data found")
+            for number in tracking_numbers
+        }
     
     def _normalize_response(self, raw_data: Dict, tracking_number: str) -> Dict:
         """
@@ -144,15 +256,32 @@ class FedExTrackingService:
         Returns:
             dict: Normalized tracking data
         """
-        try:
-            # Extract tracking info
-            output = raw_data.get('output', {})
-            complete_tracks = output.get('completeTrackResults', [])
-            
-            if not complete_tracks:
-                return self._error_response(tracking_number, "No tracking data found")
+        # Extract tracking info
+        output = raw_data.get('output', {})
+        complete_tracks = output.get('completeTrackResults', [])
+        
+        if not complete_tracks:
+            return self._error_response(tracking_number, "No tracking data found")
+        
+        track_result = next(
+            (t for t in complete_tracks if str(t.get('trackingNumber', '')).strip() == str(tracking_number).strip()),
+            complete_tracks[0]
+        )
+        return self._normalize_track_result(track_result, tracking_number)
+    
+    def _normalize_track_result(self, track_result: Dict, tracking_number: str) -> Dict:
+        """
+        Normalize one completeTrackResults entry
+        
+        Args:
+            track_result: completeTrackResults entry for tracking_number
+            tracking_number: Tracking number being queried
             
-            track_result = complete_tracks[0]
+        Returns:
+            dict: Normalized tracking data, or an error response when FedEx
+            reported an error for this number
+        """
+        try:
             track_results = track_result.get('trackResults', [])
             
             if not track_results:
@@ -160,6 +289,18 @@ class FedExTrackingService:
             
             shipment_data = track_results[0]
             
+            # Per-number errors (e.g. not found) come back inside a 200 response
+            if shipment_data.get('error'):
+                error = shipment_data['error']
+                code = error.get('code', '')
+                if 'NOTFOUND' in code:
+                    error_type = "Tracking not found"
+                elif 'INVALID' in code:
+                    error_type = "Invalid tracking number"
+                else:
+                    error_type = f"API error ({code or 'unknown'})"
+                return self._error_response(tracking_number, error_type, error.get('message', ''))
+            
             # Extract status
             latest_status = shipment_data.get('latestStatusDetail', {})
             status = latest_status.get('description', 'Unknown')
@@ -177,50 +318,29 @@ class FedExTrackingService:
             origin_location = shipment_data.get('originLocation', {})
             destination_location = shipment_data.get('destinationLocation', {})
             
-            origin = {
-                "city": origin_location.get('city', ''),
-                "state": origin_location.get('stateOrProvinceCode', ''),
-                "country": origin_location.get('countryCode', '')
-            }
-            
-            destination = {
-                "city": destination_location.get('city', ''),
-                "state": destination_location.get('stateOrProvinceCode', ''),
-                "country": destination_location.get('countryCode', '')
-            }
+            origin = Location.from_api(origin_location)
+            destination = Location.from_api(destination_location)
             
-            # Extract scan events
-            events = []
-            scan_events = shipment_data.get('scanEvents', [])
-            
-            for scan in scan_events:
-                event_location = scan.get('scanLocation', {})
-                events.append({
-                    "timestamp": scan.get('date', ''),
-                    "status": scan.get('eventDescription', ''),
-                    "status_code": scan.get('eventType', ''),
-                    "location": {
-                        "city": event_location.get('city', ''),
-                        "state": event_location.get('stateOrProvinceCode', ''),
-                        "country": event_location.get('countryCode', '')
-                    }
-                })
+            # Extract scan events (slotted records; records.to_dict gives plain dicts)
+            events = [TrackingEvent.from_scan(scan) for scan in shipment_data.get('scanEvents', [])]
             
             # Build normalized response
-            return {
+            result = {
                 "success": True,
                 "tracking_number": tracking_number,
-                "status": status,
-                "status_code": status_code,
+                "status": intern_text(status),
+                "status_code": intern_text(status_code),
                 "delivery_date": delivery_date,
                 "origin": origin,
                 "destination": destination,
                 "events": events,
                 "service_type": shipment_data.get('serviceType', ''),
                 "package_count": shipment_data.get('packageCount', 1),
-                "weight": shipment_data.get('packageWeight', {}),
-                "raw_data": shipment_data  # Include for debugging if needed
+                "weight": shipment_data.get('packageWeight', {})
             }
+            if self.keep_raw:
+                result["raw_data"] = shipment_data
+            return result
             
         except Exception as e:
             logger.error(f"Error normalizing response: {str(e)}")
@@ -298,3 +418,16 @@ def track_shipment(tracking_number: str) -> Dict:
         dict: Normalized tracking data
     """
     return tracking_service.track_shipment(tracking_number)
+
+
+def track_many(tracking_numbers: Iterable[str]) -> Iterator[Tuple[str, Dict]]:
+    """
+    Convenience function to track many FedEx shipments in chunked requests
+    
+    Args:
+        tracking_numbers: FedEx tracking numbers
+        
+    Yields:
+        (tracking_number, normalized tracking data) as chunks complete
+    """
+    return tracking_service.track_many(tracking_numbers)
@@ -1,12 +1,37 @@
 import time
 import pandas as pd
 import os
-import re
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from wait_engine import wait_for, deep_text_present
+from browser_extract import extract_fedex
+from session_state import restore_session, save_session, record_banner
+
+# The tracking app renders inside shadow roots, so readiness is judged on
+# the deep text: shipment details shown, or an error/blocked page
+FEDEX_READY = {
+    "results": deep_text_present("travel history", "shipment facts", "delivered", "in transit", "on the way"),
+    "error": deep_text_present("we're sorry", "cannot locate", "not found")
+}
+FEDEX_RESULT_TIMEOUT = 25
+FEDEX_BANNER_CSS = "#onetrust-accept-btn-handler"
+
+# Status phrases FedEx shows prominently at the top, and what they mean
+FEDEX_STATUS_KEYWORDS = {
+    "DELIVERED": "Delivered",
+    "IN TRANSIT": "In Transit",
+    "ON THE WAY": "In Transit",
+    "OUT FOR DELIVERY": "Out for Delivery",
+    "PICKED UP": "In Transit",
+    "SHIPMENT EXCEPTION": "Exception",
+    "DELIVERY EXCEPTION": "Exception",
+    "PENDING": "In Transit",
+    "AT LOCAL FEDEX FACILITY": "In Transit",
+    "ARRIVED AT FEDEX LOCATION": "In Transit"
+}
 
 def get_fedex_tracking_scraper(awb_number, driver):
     """
@@ -16,6 +41,8 @@ def get_fedex_tracking_scraper(awb_number, driver):
     print(f"🔍 Tracking: {awb_number}")
     
     url = f"https://www.fedex.com/fedextrack/?trknbr={awb_number}"
+    # Saved cookie consent keeps the OneTrust banner from covering the page
+    restore_session(driver, 'FedEx')
     driver.get(url)
     
     result = {
@@ -28,154 +55,43 @@ def get_fedex_tracking_scraper(awb_number, driver):
     }
     
     try:
-        # Wait for page to load
-        time.sleep(15)
-        
-        # Extract ALL text from page (including Shadow DOM)
-        page_text = driver.execute_script("""
-            function extractAllText(root) {
-                let text = "";
-                if (!root) return text;
-                
-                if (root.nodeType === Node.TEXT_NODE) {
-                    return root.textContent.trim() + "\\n";
-                }
-                
-                if (root.shadowRoot) {
-                    text += extractAllText(root.shadowRoot);
-                }
-                
-                if (root.childNodes) {
-                    root.childNodes.forEach(child => {
-                        text += extractAllText(child);
-                    });
-                }
-                
-                return text;
-            }
-            return extractAllText(document.body);
-        """)
-        
-        if not page_text or len(page_text) < 100:
-            print(f"⚠️ Page content too short or empty")
+        # Wait for the tracking app to render
+        wait_for(driver, FEDEX_READY, FEDEX_RESULT_TIMEOUT, provider='FedEx')
+        
+        # Accept the cookie banner if it's still up, and remember the consent
+        banners = [b for b in driver.find_elements(By.CSS_SELECTOR, FEDEX_BANNER_CSS) if b.is_displayed()]
+        if banners:
+            banners[0].click()
+            save_session(driver, 'FedEx')
+        record_banner('FedEx', bool(banners))
+        
+        # Status, from/to and travel history in one script call (the
+        # tracking app lives in shadow roots)
+        extracted = extract_fedex(driver, FEDEX_STATUS_KEYWORDS)
+        
+        if extracted.get("blocked"):
+            print(f"⚠️ Access blocked, error page or empty page detected")
             return result
-            
-        # Check for error messages
-        if "we're sorry" in page_text.lower() or "permission" in page_text.lower():
-            print(f"⚠️ Access blocked or error page detected")
-            return result
-        
-        # Debug: Show snippet of extracted text
-        # print(f"   📄 Text preview: {page_text[:500]}")
-        
-        lines = [line.strip() for line in page_text.split('\n') if line.strip()]
-        
-        # Filter out common UI noise
-        ui_noise = ['obtain proof of delivery', 'view details', 'view travel history', 
-                    'track another', 'help', 'sign up', 'log in', 'fedex home',
-                    'shipping', 'tracking', 'locations', 'support']
         
-        lines = [line for line in lines if line.lower() not in ui_noise]
-        
-        # === STATUS EXTRACTION ===
-        # FedEx shows status prominently at the top
-        status_keywords = {
-            "DELIVERED": "Delivered",
-            "IN TRANSIT": "In Transit", 
-            "ON THE WAY": "In Transit",
-            "OUT FOR DELIVERY": "Out for Delivery",
-            "PICKED UP": "In Transit",
-            "SHIPMENT EXCEPTION": "Exception",
-            "DELIVERY EXCEPTION": "Exception",
-            "PENDING": "In Transit",
-            "AT LOCAL FEDEX FACILITY": "In Transit",
-            "ARRIVED AT FEDEX LOCATION": "In Transit"
-        }
-        
-        for i, line in enumerate(lines[:200]):  # Check first 200 lines
-            line_upper = line.upper()
-            for keyword, normalized in status_keywords.items():
-                if keyword in line_upper and len(line) < 100:  # Avoid long paragraphs
-                    result["status"] = normalized
-                    print(f"   Status: {normalized}")
-                    break
-            if result["status"] != "Unknown":
+        # Normalise the status line FedEx shows
+        status_line = (extracted["status"] or "").upper()
+        for keyword, normalized in FEDEX_STATUS_KEYWORDS.items():
+            if keyword in status_line:
+                result["status"] = normalized
+                print(f"   Status: {normalized}")
                 break
         
-        # === ORIGIN/DESTINATION EXTRACTION ===
-        # Look for "FROM" and "TO" patterns
-        for i, line in enumerate(lines):
-            if line.upper() == "FROM" or "ORIGIN" in line.upper():
-                # Check next few lines for location
-                for j in range(1, 5):
-                    if i + j < len(lines):
-                        candidate = lines[i + j]
-                        # Location must have comma, reasonable length, not be a button
-                        if ("," in candidate and 5 < len(candidate) < 60 and 
-                            not any(noise in candidate.lower() for noise in ['view', 'click', 'button', 'link'])):
-                            result["origin"] = candidate
-                            break
-            
-            if line.upper() == "TO" or "DESTINATION" in line.upper():
-                for j in range(1, 5):
-                    if i + j < len(lines):
-                        candidate = lines[i + j]
-                        if ("," in candidate and 5 < len(candidate) < 60 and
-                            not any(noise in candidate.lower() for noise in ['view', 'click', 'button', 'link'])):
-                            result["destination"] = candidate
-                            break
-        
-        # === TIMELINE EXTRACTION ===
-        # FedEx format: Date (e.g., "Monday, 12/15/24") followed by Time (e.g., "3:45 PM")
-        # then Activity description, then Location
-        
-        date_pattern = re.compile(r'\w+,\s*\d{1,2}/\d{1,2}/\d{2,4}')
-        time_pattern = re.compile(r'\d{1,2}:\d{2}\s*(?:AM|PM)', re.IGNORECASE)
-        
-        current_date = ""
-        timeline = []
-        
-        for i, line in enumerate(lines):
-            # Capture date context
-            if date_pattern.search(line):
-                current_date = line
-                continue
-            
-            # When we find a time, it's likely an event
-            if time_pattern.search(line):
-                event_time = line
-                
-                # Next line is usually the activity
-                activity = lines[i + 1] if i + 1 < len(lines) else ""
-                # Line after that is usually location
-                location = lines[i + 2] if i + 2 < len(lines) else ""
-                
-                # Validate: activity shouldn't be another time, and should be meaningful
-                if (activity and not time_pattern.search(activity) and len(activity) > 3 and
-                    not any(noise in activity.lower() for noise in ui_noise)):
-                    
-                    # Validate location - should be reasonable length and not UI noise
-                    # Accept locations with OR without commas (e.g., "HYDERABAD, TG, IN" or "HYDERABAD TG IN")
-                    if (location and len(location) > 5 and len(location) < 100 and
-                        not any(noise in location.lower() for noise in ui_noise)):
-                        pass  # Location is valid
-                    else:
-                        location = ""  # Invalid location
-                    
-                    timeline.append({
-                        "date_time": f"{current_date} {event_time}".strip(),
-                        "activity": activity,
-                        "location": location
-                    })
-        
+        result["origin"] = extracted["origin"] or ""
+        result["destination"] = extracted["destination"] or ""
+        timeline = extracted["events"]
         result["timeline"] = timeline
         
         # === CURRENT LOCATION (from most recent event) ===
         if timeline:
             # Get location from first event (most recent)
             loc = timeline[0].get("location", "")
-            # Validate it's not empty and not UI noise
-            if loc and len(loc) > 2 and not any(noise in loc.lower() for noise in ui_noise):
+            # UI noise was already dropped by the extractor
+            if loc and len(loc) > 2:
                 result["current_location"] = loc
         
         # === FALLBACK: Extract origin/dest from timeline if missing ===
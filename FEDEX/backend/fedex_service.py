@@ -1,10 +1,13 @@
-import requests
 import time
 import json
 import os
+import threading
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from fedex_api.rate_limit import FEDEX_CONCURRENCY_MAX
+from fedex_api.session import fedex_post
+
 class FedExTrackingService:
     def __init__(self, client_id, client_secret, env='production'):
         self.client_id = client_id
@@ -18,12 +21,21 @@ class FedExTrackingService:
             
         self.token = None
         self.token_expiry = 0
+        self._token_lock = threading.Lock()
 
     def _get_token(self):
         """Authenticates with FedEx API and caches the token."""
         if self.token and time.time() < self.token_expiry:
             return self.token
 
+        # One worker refreshes; the others wait here and reuse its token
+        with self._token_lock:
+            if self.token and time.time() < self.token_expiry:
+                return self.token
+            return self._request_token()
+
+    def _request_token(self):
+        """POSTs for a new token (caller holds _token_lock)."""
         url = f"{self.base_url}/oauth/token"
         payload = {
             'grant_type': 'client_credentials',
@@ -33,7 +45,7 @@ class FedExTrackingService:
         headers = {'Content-Type': 'application/x-www-form-urlencoded'}
 
         try:
-            response = requests.post(url, data=payload, headers=headers, timeout=10)
+            response = fedex_post(url, data=payload, headers=headers)
             response.raise_for_status()
             data = response.json()
             
@@ -93,7 +105,7 @@ class FedExTrackingService:
                 'Authorization': f'Bearer {token}'
             }
 
-            response = requests.post(url, headers=headers, json=payload, timeout=10)
+            response = fedex_post(url, headers=headers, json=payload)
             response.raise_for_status()
             data = response.json()
             
@@ -159,8 +171,12 @@ class FedExTrackingService:
                 'error': str(e)
             }
 
-    def track_batch(self, awb_list, max_workers=5):
-        """Concurrent batch tracking."""
+    def track_batch(self, awb_list, max_workers=FEDEX_CONCURRENCY_MAX):
+        """
+        Concurrent batch tracking. Calls go through the shared FedEx rate
+        limiter, which sets the real pace and concurrency (backing off on
+        429/5xx), so no sleeps between batches are needed.
+        """
         results = []
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             future_to_awb = {executor.submit(self.get_tracking_info, awb): awb for awb in awb_list}
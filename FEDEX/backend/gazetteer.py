@@ -0,0 +1,273 @@
+"""
+Offline Gazetteer
+Resolves the recurring hub, city and country names seen in tracking
+timelines to coordinates from a bundled index, without touching the network
+"""
+
+import difflib
+import json
+import os
+import re
+import threading
+import unicodedata
+from functools import lru_cache
+
+GAZETTEER_PATH = os.getenv(
+    'GAZETTEER_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gazetteer.json')
+)
+# Minimum similarity (0-1) for a misspelled name to count as a match
+GAZETTEER_FUZZY_CUTOFF = float(os.getenv('GAZETTEER_FUZZY_CUTOFF', '0.85'))
+
+# Short names (ISO codes, airport codes like HYD/MEM) only match on their own
+# or as the last word of a part, so words like 'IN' or 'ID' inside free
+# text don't turn into countries
+SHORT_NAME_LEN = 3
+# Parts shorter than this are never fuzzy matched
+FUZZY_MIN_LEN = 5
+
+# US state and Canadian province codes: in 'PORTLAND, OR' or 'FRESNO, CA'
+# they point to the US or Canada, not to the country sharing the ISO2 code
+REGION_CODES = dict.fromkeys(
+    "AL AK AZ AR CA CO CT DE DC FL GA HI ID IL IN IA KS KY LA ME MD MA MI MN MS MO "
+    "MT NE NV NH NJ NM NY NC ND OH OK OR PA RI SC SD TN TX UT VT VA WA WV WI WY".split(), 'US'
+)
+REGION_CODES.update(dict.fromkeys("AB BC MB NB NL NS NT NU ON PE QC SK YT".split(), 'CA'))
+
+
+def fold_name(text):
+    """
+    Canonical form for index keys and lookups: accents stripped, upper case,
+    dots/apostrophes dropped ('U.A.E.' -> 'UAE') and any other punctuation
+    turned into spaces. Commas and parentheses are kept as part separators.
+    """
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(c for c in text if not unicodedata.combining(c)).upper()
+    text = re.sub(r"[.'`]", '', text)
+    text = re.sub(r'[^\w,()]+', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def split_parts(folded):
+    """'DUBAI(AE)' -> ['DUBAI', 'AE'], 'MEMPHIS,UNITED STATES' -> ['MEMPHIS', 'UNITED STATES']"""
+    parts = re.split(r'[,()]', folded)
+    return [p.strip() for p in parts if p.strip() and not p.strip().isdigit()]
+
+
+class Gazetteer:
+    """
+    In-memory name index over country centroids and major city/hub centroids.
+
+    Entries are loaded from a JSON file with a ``countries`` map keyed by
+    ISO2 code and a ``places`` list. Every name and alias is indexed twice:
+    as folded text and with spaces removed, so 'NEWZEALAND' and 'SOUTHKOREA'
+    match exactly.
+    """
+
+    def __init__(self, path=GAZETTEER_PATH, fuzzy_cutoff=GAZETTEER_FUZZY_CUTOFF):
+        self.path = path
+        self.fuzzy_cutoff = fuzzy_cutoff
+
+        self._countries = {}  # key -> country entry
+        self._places = {}     # key -> [place entries]
+        self._fuzzy_keys = []
+
+        self._load()
+
+    def _load(self):
+        with open(self.path, encoding='utf-8') as f:
+            data = json.load(f)
+
+        for code, info in data.get('countries', {}).items():
+            entry = {
+                "name": info["name"],
+                "country": code,
+                "kind": "country",
+                "lat": info["lat"],
+                "lng": info["lng"]
+            }
+            for name in [code, info["name"]] + info.get("aliases", []):
+                for key in self._keys(name):
+                    self._countries.setdefault(key, entry)
+
+        for info in data.get('places', []):
+            entry = {
+                "name": info["name"],
+                "country": info["country"],
+                "kind": info.get("kind", "city"),
+                "lat": info["lat"],
+                "lng": info["lng"]
+            }
+            for name in [info["name"]] + info.get("aliases", []):
+                for key in self._keys(name):
+                    bucket = self._places.setdefault(key, [])
+                    if entry not in bucket:
+                        bucket.append(entry)
+
+        self._fuzzy_keys = sorted(
+            k for k in set(self._countries) | set(self._places) if len(k) > SHORT_NAME_LEN
+        )
+        # Next to other parts a misspelling only matches places, so a city
+        # doesn't turn into a country ('PORTLAND, OR' is close to 'POLAND')
+        self._fuzzy_place_keys = sorted(k for k in self._places if len(k) > SHORT_NAME_LEN)
+
+    @staticmethod
+    def _keys(name):
+        key = fold_name(name).replace(',', ' ').replace('(', ' ').replace(')', ' ')
+        key = re.sub(r'\s+', ' ', key).strip()
+        return {key, key.replace(' ', '')} if key else set()
+
+    def __len__(self):
+        return len({id(e) for e in self._countries.values()}) + \
+            len({id(e) for bucket in self._places.values() for e in bucket})
+
+    @staticmethod
+    def _compact(key):
+        # 'NEWZEALAND' style keys; skipped for short keys so 'N A' isn't 'NA'
+        compact = key.replace(' ', '')
+        return compact if compact != key and len(compact) > SHORT_NAME_LEN else None
+
+    def _place(self, key, country=None):
+        candidates = self._places.get(key) or self._places.get(self._compact(key))
+        if not candidates:
+            return None
+        if country:
+            for entry in candidates:
+                if entry["country"] == country:
+                    return entry
+        return candidates[0]
+
+    def _country(self, key):
+        return self._countries.get(key) or self._countries.get(self._compact(key))
+
+    def _scan(self, part, find):
+        """
+        Longest run of words in a part that ``find`` recognises, so
+        'GERMANY FRANKFURT' and 'ERFTSTADT LECHEN' still resolve
+        """
+        words = part.split()
+        for size in range(len(words), 0, -1):
+            for start in range(len(words) - size + 1):
+                key = ' '.join(words[start:start + size])
+                if len(key) <= SHORT_NAME_LEN and size != len(words):
+                    continue
+                entry = find(key)
+                if entry:
+                    return entry
+        return None
+
+    def _fuzzy(self, part, countries=True):
+        if len(part) < FUZZY_MIN_LEN:
+            return None
+        keys = self._fuzzy_keys if countries else self._fuzzy_place_keys
+        for probe in (part, part.replace(' ', '')):
+            close = difflib.get_close_matches(probe, keys, n=1, cutoff=self.fuzzy_cutoff)
+            if close:
+                return self._place(close[0]) or self._country(close[0])
+        return None
+
+    def lookup(self, location_name):
+        """
+        Resolve a location string.
+
+        Returns:
+            dict: name, country (ISO2), kind ('country', 'region', 'city' or
+            'hub'), lat, lng, fuzzy (matched a misspelling) and partial
+            (some part of the string wasn't recognised, or the place isn't
+            in the state/province's country, so only a coarser or doubtful
+            match was found) - or None if nothing matched
+        """
+        parts = split_parts(fold_name(location_name))
+        if not parts:
+            return None
+
+        # A trailing ISO2/short code ('NEW DELHI IN', 'ERSKINE PARK AU') only
+        # disambiguates a place, it is never a result on its own
+        code_hint = None
+        region_codes = []
+        resolved = []
+        for part in parts:
+            if len(parts) > 1 and part in REGION_CODES:
+                region_codes.append(part)
+                continue
+            words = part.split()
+            if len(words) > 1 and len(words[-1]) <= SHORT_NAME_LEN:
+                country = self._country(words[-1])
+                if country:
+                    code_hint = code_hint or country
+                    part = ' '.join(words[:-1])
+            resolved.append(part)
+
+        region = self._country(REGION_CODES[region_codes[0]]) if region_codes else None
+        hint = None
+        hint_fuzzy = False
+        best = None
+        fuzzy = False
+        unmatched = 0
+        for part in resolved:
+            country = self._scan(part, self._country)
+            if country:
+                hint = hint or country
+
+            entry = self._scan(part, self._place)
+            is_fuzzy = False
+            if entry is None and country is None:
+                entry = self._fuzzy(part, countries=len(parts) == 1)
+                is_fuzzy = entry is not None
+                if entry is not None and entry["kind"] == "country":
+                    hint, hint_fuzzy = entry, True
+                    continue
+            if entry is None:
+                if country is None and re.search(r'[A-Z]{3}', part):
+                    unmatched += 1
+                continue
+
+            if best is None or (best["kind"] == "region" and entry["kind"] != "region"):
+                best, fuzzy = entry, is_fuzzy
+
+        if best is not None:
+            # Prefer a same-named place in the hinted country
+            preferred = hint or region or code_hint
+            if preferred and best["country"] != preferred["country"]:
+                best = self._place(fold_name(best["name"]), preferred["country"]) or best
+            # 'PARIS, TX' found only Paris, France: let the network geocoder
+            # look for the Texan one ('MUMBAI, IN' is fine, IN is also India)
+            doubtful = region is not None and best["country"] not in [region["country"]] + region_codes
+            match = dict(best)
+            match.update(fuzzy=fuzzy, partial=doubtful)
+            return match
+
+        hint = hint or region
+        if hint is not None:
+            match = dict(hint)
+            match.update(fuzzy=hint_fuzzy, partial=unmatched > 0)
+            return match
+
+        return None
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer():
+    """Shared index, loaded on first use (None if the data file is missing)"""
+    global _gazetteer
+    with _gazetteer_lock:
+        if _gazetteer is None:
+            try:
+                _gazetteer = Gazetteer()
+                print(f"✅ Gazetteer loaded: {len(_gazetteer)} locations")
+            except (OSError, ValueError) as e:
+                print(f"Warning: gazetteer unavailable ({str(e)}); geocoding will use the network only")
+                _gazetteer = False
+    return _gazetteer or None
+
+
+@lru_cache(maxsize=4096)
+def lookup_location(location_name):
+    """Cached ``Gazetteer.lookup`` on the shared index (treat the result as read-only)"""
+    gazetteer = get_gazetteer()
+    if not gazetteer or not location_name:
+        return None
+    return gazetteer.lookup(location_name)
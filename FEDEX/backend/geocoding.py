@@ -0,0 +1,335 @@
+"""
+Geocoding
+Converts tracking location names to map coordinates: the bundled gazetteer
+first, then a persistent cache in front of Nominatim
+"""
+
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from cache import TTLCache
+from gazetteer import lookup_location
+from singleflight import SingleFlight
+
+try:
+    from geopy.geocoders import Nominatim
+    from geopy.exc import GeocoderTimedOut, GeocoderServiceError
+except ImportError:
+    print("Warning: geopy not installed. Map coordinates will not be generated.")
+    Nominatim = None
+
+# Cache configuration (TTLs in seconds)
+GEOCODE_CACHE_SIZE = int(os.getenv('GEOCODE_CACHE_SIZE', '2000'))
+GEOCODE_CACHE_DB = os.getenv(
+    'GEOCODE_CACHE_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'geocode_cache.db')
+)
+GEOCODE_TTL = int(os.getenv('GEOCODE_CACHE_TTL', str(30 * 24 * 3600)))
+# Places Nominatim doesn't know
+GEOCODE_NEGATIVE_TTL = int(os.getenv('GEOCODE_NEGATIVE_TTL', str(24 * 3600)))
+# Timeouts/service errors, kept short so an outage doesn't stick
+GEOCODE_ERROR_TTL = int(os.getenv('GEOCODE_ERROR_TTL', '300'))
+
+# Nominatim's usage policy allows at most 1 request per second per client;
+# the limit is shared by every thread in the process
+GEOCODE_RATE_PER_SEC = float(os.getenv('GEOCODE_RATE_PER_SEC', '1'))
+GEOCODE_WORKERS = int(os.getenv('GEOCODE_WORKERS', '4'))
+
+NOT_FOUND = {"found": False}
+
+# Initialize geocoder
+geolocator = None
+if Nominatim:
+    geolocator = Nominatim(user_agent="fedex_tracking_app")
+
+geocode_cache = TTLCache(
+    max_entries=GEOCODE_CACHE_SIZE,
+    db_path=GEOCODE_CACHE_DB or None,
+    table='geocodes'
+)
+
+
+
+class RateLimiter:
+    """Spaces calls at least ``1 / rate`` seconds apart across all threads"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block until this caller's slot comes up"""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+nominatim_limiter = RateLimiter(GEOCODE_RATE_PER_SEC)
+_remote_lookups = SingleFlight()
+_executor = ThreadPoolExecutor(max_workers=GEOCODE_WORKERS, thread_name_prefix='geocode')
+
+_stats_lock = threading.Lock()
+_network_lookups = 0
+_network_failures = 0
+_gazetteer_hits = 0
+_gazetteer_fallbacks = 0
+
+
+def normalize_location(location_name):
+    """
+    Cache key for a location string.
+    'MEMPHIS,United States', 'Memphis, United States ' and
+    'memphis , united states.' all map to 'memphis,united states'
+    """
+    key = str(location_name).lower()
+    key = re.sub(r'[^\w\s,]', ' ', key)
+    key = re.sub(r'\s*,\s*', ',', key)
+    key = re.sub(r'\s+', ' ', key)
+    return key.strip(' ,')
+
+
+def _count_network_lookup(failed=False):
+    global _network_lookups, _network_failures
+    with _stats_lock:
+        _network_lookups += 1
+        if failed:
+            _network_failures += 1
+
+
+def _count_gazetteer(fallback=False):
+    global _gazetteer_hits, _gazetteer_fallbacks
+    with _stats_lock:
+        if fallback:
+            _gazetteer_fallbacks += 1
+        else:
+            _gazetteer_hits += 1
+
+
+def _geocode_remote(location_name, max_retries):
+    """
+    Query Nominatim with retry logic.
+    Returns: (coords or None, ttl) - the TTL depends on whether the place
+    was not found (long) or the service failed (short)
+    """
+    for attempt in range(max_retries):
+        nominatim_limiter.wait()
+        try:
+            location = geolocator.geocode(location_name, timeout=10)
+            _count_network_lookup()
+            if location:
+                return {
+                    "lat": location.latitude,
+                    "lng": location.longitude
+                }, GEOCODE_TTL
+            return None, GEOCODE_NEGATIVE_TTL
+        except (GeocoderTimedOut, GeocoderServiceError) as e:
+            if attempt < max_retries - 1:
+                time.sleep(1)
+                continue
+            _count_network_lookup(failed=True)
+            print(f"Geocoding failed for {location_name}: {str(e)}")
+            return None, GEOCODE_ERROR_TTL
+    return None, GEOCODE_ERROR_TTL
+
+
+def _gazetteer_coords(match, fallback=False):
+    _count_gazetteer(fallback=fallback)
+    return {"lat": match["lat"], "lng": match["lng"]}
+
+
+def _resolve_offline(location_name, key):
+    """
+    Try the gazetteer and the cache.
+    Returns: (done, coords) - done is False when Nominatim still needs asking
+    """
+    match = lookup_location(location_name)
+    if match and not match["partial"]:
+        return True, _gazetteer_coords(match)
+
+    cached = geocode_cache.get(key)
+    if cached is not None:
+        coords, _age = cached
+        if coords != NOT_FOUND:
+            return True, coords
+    elif geolocator:
+        return False, None
+
+    # Cached miss, or no network geocoder: the country centroid is the best we have
+    return True, _gazetteer_coords(match, fallback=True) if match else None
+
+
+def _geocode_and_cache(location_name, key, max_retries):
+    coords, ttl = _geocode_remote(location_name, max_retries)
+    geocode_cache.set(key, coords if coords else NOT_FOUND, ttl)
+    return coords
+
+
+def _resolve_remote(location_name, key, max_retries):
+    # Concurrent requests for the same place share one Nominatim call
+    coords, _shared = _remote_lookups.do(key, _geocode_and_cache, location_name, key, max_retries)
+    if coords is None:
+        match = lookup_location(location_name)
+        if match:
+            return _gazetteer_coords(match, fallback=True)
+    return coords
+
+
+def geocode_location(location_name, max_retries=3):
+    """
+    Convert location name to coordinates.
+
+    Gazetteer matches are returned straight away. When the gazetteer only
+    recognised the country of a more specific place ('SOMEWHERE,United
+    States'), the cache/Nominatim get a chance first and the country
+    centroid is used if they come up empty.
+    Returns: dict with lat and lng, or None if failed
+    """
+    if not location_name or location_name == 'N/A':
+        return None
+
+    key = normalize_location(location_name)
+    if not key:
+        return None
+
+    done, coords = _resolve_offline(location_name, key)
+    if done:
+        return coords
+    return _resolve_remote(location_name, key, max_retries)
+
+
+def geocode_many(location_names, max_retries=3):
+    """
+    Geocode a batch of location names (e.g. every stop on a timeline).
+
+    Names are deduplicated by their normalized form, gazetteer/cache hits
+    are answered inline and only the rest go to Nominatim, concurrently
+    but still under the shared rate limit.
+    Returns: dict mapping each usable input name to coords or None
+    """
+    names_by_key = {}
+    for name in location_names:
+        if not name or name == 'N/A':
+            continue
+        key = normalize_location(name)
+        if key:
+            names_by_key.setdefault(key, []).append(name)
+
+    results = {}
+    remote = {}
+    for key, names in names_by_key.items():
+        done, coords = _resolve_offline(names[0], key)
+        if done:
+            results.update((name, coords) for name in names)
+        else:
+            remote[key] = names
+
+    futures = {
+        key: _executor.submit(_resolve_remote, names[0], key, max_retries)
+        for key, names in remote.items()
+    }
+    for key, future in futures.items():
+        coords = future.result()
+        results.update((name, coords) for name in remote[key])
+
+    return results
+
+
+def _event_time(date_str):
+    """
+    Parse a timeline date, or None: ISO timestamps from the FedEx API
+    (compared in UTC) or scraped dates ('10/11/2025 6:21 PM', day first)
+    """
+    try:
+        parsed = datetime.fromisoformat(str(date_str or '').strip())
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+    except ValueError:
+        pass
+    match = re.search(
+        r'(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})\s+(\d{1,2}):(\d{2})\s*([APap][Mm])?',
+        re.sub(r'(\d+)(st|nd|rd|th)', r'\1', str(date_str or ''))
+    )
+    if not match:
+        return None
+    day, month, year, hour, minute = (int(g) for g in match.groups()[:5])
+    meridian = (match.group(6) or '').upper()
+    if meridian == 'PM' and hour < 12:
+        hour += 12
+    if meridian == 'AM' and hour == 12:
+        hour = 0
+    try:
+        return datetime(year, month, day, hour, minute)
+    except ValueError:
+        return None
+
+
+def _event_date(event):
+    # Scrapers and the FedEx transform emit date_time/activity; Courier Wala date/status
+    return event.get('date_time') or event.get('date')
+
+
+def _event_status(event):
+    return event.get('activity') or event.get('status')
+
+
+def chronological_order(timeline):
+    """
+    Indexes of timeline events from oldest to newest. Sorted by date when
+    every event has a parseable one, otherwise the provider's newest-first
+    order is reversed.
+    """
+    times = [_event_time(_event_date(event)) for event in timeline]
+    if timeline and all(t is not None for t in times):
+        return sorted(range(len(timeline)), key=lambda i: times[i])
+    return list(reversed(range(len(timeline))))
+
+
+def build_route(timeline, coords_by_name):
+    """
+    Map route for a timeline: geocoded checkpoints oldest first, plus a
+    polyline of [lat, lng] pairs with consecutive repeats collapsed
+    """
+    checkpoints = []
+    polyline = []
+    for index in chronological_order(timeline):
+        event = timeline[index]
+        coords = coords_by_name.get(event.get('location'))
+        if not coords:
+            continue
+        checkpoints.append({
+            "timelineIndex": index,
+            "location": event.get('location'),
+            "status": _event_status(event),
+            "date": _event_date(event),
+            # Timeline events have all happened (as TrackShipment.jsx marks them)
+            "completed": event.get('completed', True),
+            "lat": coords["lat"],
+            "lng": coords["lng"]
+        })
+        point = [coords["lat"], coords["lng"]]
+        if not polyline or polyline[-1] != point:
+            polyline.append(point)
+
+    return {"checkpoints": checkpoints, "polyline": polyline}
+
+
+def geocode_stats():
+    """Cache hit rate plus how many lookups the gazetteer answered and how many went to Nominatim"""
+    stats = geocode_cache.stats()
+    with _stats_lock:
+        stats["gazetteer_hits"] = _gazetteer_hits
+        stats["gazetteer_fallbacks"] = _gazetteer_fallbacks
+        stats["network_lookups"] = _network_lookups
+        stats["network_failures"] = _network_failures
+    return stats
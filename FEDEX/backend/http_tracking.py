@@ -0,0 +1,260 @@
+"""
+HTTP Tracking Engine
+Submits form-based provider tracking pages directly over pooled HTTP
+sessions and parses the returned HTML, so most lookups never start Chrome
+"""
+
+import os
+import threading
+import time
+from urllib.parse import urljoin
+
+import lxml.etree
+import lxml.html
+import requests
+from requests.adapters import HTTPAdapter
+
+from tracking_parsers import parse_atlantic, parse_courierwala, parse_pxc, parse_united
+
+HTTP_TRACKING_ENABLED = os.getenv('HTTP_TRACKING_ENABLED', 'true').lower() != 'false'
+HTTP_TRACKING_TIMEOUT = float(os.getenv('HTTP_TRACKING_TIMEOUT', '10'))
+HTTP_TRACKING_POOL_SIZE = int(os.getenv('HTTP_TRACKING_POOL_SIZE', '10'))
+# After this many structural misses in a row (no form, no data in the
+# response) a provider goes straight to the browser for HTTP_TRACKING_BACKOFF seconds
+HTTP_TRACKING_MAX_MISSES = int(os.getenv('HTTP_TRACKING_MAX_MISSES', '3'))
+HTTP_TRACKING_BACKOFF = int(os.getenv('HTTP_TRACKING_BACKOFF', '600'))
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+
+
+class HttpUnavailable(Exception):
+    """The HTTP path couldn't get tracking data; the browser should be used"""
+
+
+class FormProvider:
+    """
+    How to track one provider over plain HTTP.
+
+    The engine loads ``page_url``, finds the form around the ``input_id``
+    field and submits it with the AWB filled in (hidden fields such as
+    ASP.NET view state included). Sites that post to an AJAX endpoint
+    instead of a form can set ``endpoint`` and ``field`` to skip the form
+    lookup.
+
+    Args:
+        parse: ``parse(html, awb)`` returning a result dict, or None when
+            the response holds no tracking data
+        submit_id: id of the submit button, sent along when it has a name
+    """
+
+    def __init__(self, name, page_url, input_id, parse, submit_id=None,
+                 endpoint=None, field=None):
+        self.name = name
+        self.page_url = page_url
+        self.input_id = input_id
+        self.parse = parse
+        self.submit_id = submit_id
+        self.endpoint = endpoint
+        self.field = field
+
+    def __repr__(self):
+        return f"<FormProvider {self.name} {self.page_url}>"
+
+
+FORM_PROVIDERS = {
+    'Atlantic': FormProvider(
+        'Atlantic', "https://atlanticcourier.net/track/",
+        input_id="tracking", submit_id="track", parse=parse_atlantic
+    ),
+    'Courier Wala': FormProvider(
+        'Courier Wala', "https://courierwalaexpress.in/track-shipment.html",
+        input_id="txtawbno", submit_id="trackAwbNumber", parse=parse_courierwala
+    ),
+    'PXC Pacific': FormProvider(
+        'PXC Pacific', "https://www.pacificexp.net/tracking-details.html",
+        input_id="Tracking1_txtAwb", parse=parse_pxc
+    ),
+    'United Express': FormProvider(
+        'United Express', "https://unitedexpress.in/index",
+        input_id="tawbno", parse=parse_united
+    )
+}
+
+
+def form_payload(form, input_el, awb, submit_id=None):
+    """
+    Fields a browser would send for ``form``: every named input (hidden
+    ones included), selected options and textareas, with the AWB in the
+    tracking field and only the chosen submit button
+    """
+    payload = {}
+    for el in form.xpath('.//input[@name] | .//select[@name] | .//textarea[@name]'):
+        name = el.get('name')
+        if el.tag == 'input':
+            kind = (el.get('type') or 'text').lower()
+            if kind in ('submit', 'button', 'image', 'reset', 'file'):
+                continue
+            if kind in ('checkbox', 'radio') and el.get('checked') is None:
+                continue
+            payload[name] = el.get('value', '')
+        elif el.tag == 'select':
+            selected = el.xpath('.//option[@selected]') or el.xpath('.//option')
+            payload[name] = selected[0].get('value', selected[0].text or '') if selected else ''
+        else:
+            payload[name] = el.text or ''
+
+    payload[input_el.get('name')] = str(awb)
+
+    if submit_id:
+        button = form.xpath(f'.//*[@id="{submit_id}"][@name]')
+        if button:
+            payload[button[0].get('name')] = button[0].get('value', '')
+
+    return payload
+
+
+class HttpTrackingEngine:
+    """
+    Runs form lookups over one keep-alive ``requests.Session`` per provider,
+    so connections and site cookies are reused between lookups.
+    """
+
+    def __init__(self, providers=None, timeout=HTTP_TRACKING_TIMEOUT, pool_size=HTTP_TRACKING_POOL_SIZE):
+        self.providers = dict(FORM_PROVIDERS if providers is None else providers)
+        self.timeout = timeout
+        self.pool_size = pool_size
+
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._misses = {}       # provider -> consecutive HttpUnavailable count
+        self._skip_until = {}   # provider -> time.time() when HTTP is retried
+
+    def session(self, provider_name):
+        with self._lock:
+            session = self._sessions.get(provider_name)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers.update({
+                    "User-Agent": USER_AGENT,
+                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8"
+                })
+                self._sessions[provider_name] = session
+            return session
+
+    def supports(self, provider_name):
+        return provider_name in self.providers
+
+    def fetch(self, provider_name, awb):
+        """
+        Look up an AWB over HTTP.
+        Returns: the parsed tracking dict
+        Raises: HttpUnavailable when there's no usable form or the response
+        holds no tracking data; requests.RequestException on network errors
+        """
+        spec = self.providers.get(provider_name)
+        if spec is None:
+            raise HttpUnavailable(f"No HTTP form for {provider_name}")
+
+        session = self.session(provider_name)
+
+        if spec.endpoint:
+            response = session.post(spec.endpoint, data={spec.field: str(awb)},
+                                    headers={"Referer": spec.page_url}, timeout=self.timeout)
+        else:
+            page = session.get(spec.page_url, timeout=self.timeout)
+            page.raise_for_status()
+            doc = lxml.html.fromstring(page.content, base_url=page.url)
+
+            fields = doc.xpath(f'//*[@id="{spec.input_id}"]')
+            if not fields or not fields[0].get('name'):
+                raise HttpUnavailable(f"No named '{spec.input_id}' field on {spec.page_url}")
+            forms = fields[0].xpath('ancestor::form')
+            if not forms:
+                # Submitted by JavaScript only
+                raise HttpUnavailable(f"'{spec.input_id}' is not inside a form")
+
+            form = forms[-1]
+            action = urljoin(page.url, form.get('action') or page.url)
+            payload = form_payload(form, fields[0], awb, spec.submit_id)
+            headers = {"Referer": page.url}
+
+            if (form.get('method') or 'get').lower() == 'post':
+                response = session.post(action, data=payload, headers=headers, timeout=self.timeout)
+            else:
+                response = session.get(action, params=payload, headers=headers, timeout=self.timeout)
+
+        response.raise_for_status()
+        result = spec.parse(response.text, awb)
+        if result is None:
+            raise HttpUnavailable(f"No tracking data in {provider_name} response")
+        return result
+
+    def track(self, provider_name, awb):
+        """
+        HTTP-first lookup for the provider registry.
+        Returns: the tracking dict, or None if the browser path should run
+        """
+        with self._lock:
+            if self._skip_until.get(provider_name, 0) > time.time():
+                return None
+
+        start = time.perf_counter()
+        try:
+            result = self.fetch(provider_name, awb)
+        except HttpUnavailable as e:
+            self._record(provider_name, 'fallback', time.perf_counter() - start, structural=True)
+            print(f"↪️ {provider_name} HTTP lookup for {awb} unavailable ({str(e)[:100]}), using browser")
+            return None
+        except (requests.RequestException, lxml.etree.LxmlError, ValueError) as e:
+            self._record(provider_name, 'fallback', time.perf_counter() - start)
+            print(f"↪️ {provider_name} HTTP lookup for {awb} failed ({str(e)[:100]}), using browser")
+            return None
+
+        self._record(provider_name, 'ok', time.perf_counter() - start)
+        return result
+
+    def tracker_for(self, provider_name):
+        """``track`` bound to one provider, in the ``http_track(awb)`` form"""
+        return lambda awb: self.track(provider_name, awb)
+
+    def _record(self, provider_name, outcome, elapsed, structural=False):
+        with self._lock:
+            entry = self._stats.setdefault(provider_name, {"ok": 0, "fallback": 0, "seconds": 0.0})
+            entry[outcome] += 1
+            entry["seconds"] += elapsed
+
+            if not structural:
+                self._misses[provider_name] = 0
+                return
+            self._misses[provider_name] = self._misses.get(provider_name, 0) + 1
+            if self._misses[provider_name] >= HTTP_TRACKING_MAX_MISSES:
+                self._misses[provider_name] = 0
+                self._skip_until[provider_name] = time.time() + HTTP_TRACKING_BACKOFF
+                print(f"⏸️ {provider_name}: HTTP path keeps missing, browser only for {HTTP_TRACKING_BACKOFF}s")
+
+    def stats(self):
+        """HTTP successes vs browser fallbacks per provider"""
+        with self._lock:
+            return {
+                name: {
+                    "ok": entry["ok"],
+                    "fallback": entry["fallback"],
+                    "mean_seconds": round(entry["seconds"] / (entry["ok"] + entry["fallback"]), 3),
+                    "paused": self._skip_until.get(name, 0) > time.time()
+                }
+                for name, entry in self._stats.items()
+            }
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+http_engine = HttpTrackingEngine()
@@ -0,0 +1,114 @@
+"""
+Tracking Job Queue
+Runs tracking lookups on a background worker pool so HTTP requests can
+return a job id immediately and poll for the result
+"""
+
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class TrackingJobQueue:
+    """
+    In-process job store backed by a ThreadPoolExecutor.
+
+    Jobs live in memory, so they are only visible to the gunicorn worker
+    that accepted them (the backend runs a single worker process).
+    Finished jobs are kept for ``retention`` seconds and then pruned.
+    """
+
+    def __init__(self, workers=4, retention=3600, max_jobs=1000):
+        self.workers = workers
+        self.retention = retention
+        self.max_jobs = max_jobs
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tracking-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, meta=None, **kwargs):
+        """
+        Queue ``fn(*args, **kwargs)`` and return a snapshot of the new job.
+
+        Args:
+            meta: Extra fields (e.g. awb/provider) echoed back when polling
+        """
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": QUEUED,
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            "_finished": None
+        }
+        job.update(meta or {})
+
+        with self._lock:
+            self._prune()
+            if len(self._jobs) >= self.max_jobs:
+                raise RuntimeError("Too many tracking jobs in progress")
+            self._jobs[job_id] = job
+            snapshot = self._snapshot(job)
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return snapshot
+
+    def get(self, job_id):
+        """Snapshot of a job, or None if it doesn't exist (or was pruned)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._snapshot(job) if job else None
+
+    def _run(self, job, fn, args, kwargs):
+        with self._lock:
+            job["status"] = RUNNING
+            job["started_at"] = datetime.now().isoformat()
+
+        try:
+            result = fn(*args, **kwargs)
+            outcome = {"status": DONE, "result": result}
+        except Exception as e:
+            print(f"❌ Tracking job {job['job_id']} failed: {str(e)}")
+            traceback.print_exc()
+            outcome = {"status": FAILED, "error": str(e)}
+
+        with self._lock:
+            job.update(outcome)
+            job["finished_at"] = datetime.now().isoformat()
+            job["_finished"] = time.time()
+
+    def _prune(self):
+        # Caller must hold self._lock
+        cutoff = time.time() - self.retention
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job["_finished"] is not None and job["_finished"] < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    @staticmethod
+    def _snapshot(job):
+        return {k: v for k, v in job.items() if not k.startswith('_')}
+
+    def stats(self):
+        """Counts of jobs by state"""
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job["status"]] += 1
+            counts["workers"] = self.workers
+            return counts
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
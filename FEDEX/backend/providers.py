@@ -0,0 +1,226 @@
+"""
+Tracking Provider Registry
+Maps provider names to tracking functions and records which ones need a browser
+"""
+
+from collections import defaultdict
+
+from http_tracking import http_engine, HTTP_TRACKING_ENABLED
+
+
+class TrackingProvider:
+    """
+    A tracking backend for one courier.
+
+    Browser-backed providers are called as ``track(awb, driver)``; providers
+    with ``needs_browser=False`` (REST/HTTP lookups) are called as
+    ``track(awb)`` and must never be given a Selenium driver.
+
+    ``http_track(awb)``, when set, is tried first: it returns a result, or
+    None when it couldn't get data and ``track`` should run instead.
+
+    ``prepare(driver)``, when set, parks a browser tab on the provider's
+    tracking form; ``track(awb, driver, prepared=True)`` then skips the
+    navigation (see warm_slots).
+
+    ``track_many(awbs, driver)``, when set, looks up to ``max_batch`` AWBs
+    with one page load (``track_many(awbs)`` with one API request when the
+    provider needs no browser) and returns {awb: result}; AWBs it has no
+    result for are left out and should be tracked one at a time.
+    """
+
+    def __init__(self, name, track, needs_browser=True, http_track=None, prepare=None,
+                 track_many=None, max_batch=1):
+        self.name = name
+        self.track = track
+        self.needs_browser = needs_browser
+        self.http_track = http_track
+        self.prepare = prepare
+        self.track_many = track_many
+        self.max_batch = max_batch if track_many else 1
+
+    def __repr__(self):
+        if not self.needs_browser:
+            kind = "http"
+        elif self.http_track:
+            kind = "http, browser fallback"
+        else:
+            kind = "browser"
+        return f"<TrackingProvider {self.name} ({kind})>"
+
+
+PROVIDERS = {}
+
+
+def register_provider(name, track, needs_browser=True, http_track=None, prepare=None,
+                      track_many=None, max_batch=1):
+    """Register (or replace) the tracking function for a provider name"""
+    PROVIDERS[name] = TrackingProvider(name, track, needs_browser, http_track, prepare,
+                                       track_many, max_batch)
+    return PROVIDERS[name]
+
+
+def get_provider(name):
+    """Look up a registered provider by the name the frontend sends, or None"""
+    return PROVIDERS.get(name)
+
+
+def resolve_provider_name(provider_name):
+    """
+    Map Excel/free-form provider names to registry names
+    Handles variations like 'COURIER WALA' vs 'COURIERWALA', FEDEX(ICL), etc.
+    """
+    if provider_name in PROVIDERS:
+        return provider_name
+
+    provider_upper = str(provider_name).upper().strip()
+
+    # Atlantic
+    if 'ATLANTIC' in provider_upper:
+        return 'Atlantic'
+
+    # Courier Wala (handles both with and without space)
+    if 'COURIER' in provider_upper and 'WALA' in provider_upper:
+        return 'Courier Wala'
+
+    # DHL
+    if provider_upper == 'DHL':
+        return 'DHL'
+
+    # FedEx - handles FEDEX(564), FEDEX(3026), etc.
+    if 'FEDEX' in provider_upper and 'ICL' not in provider_upper:
+        return 'FedEx'
+
+    # ICL - handles FEDEX(ICL)
+    if 'ICL' in provider_upper:
+        return 'ICL'
+
+    # PXC Pacific
+    if 'PXC' in provider_upper:
+        return 'PXC Pacific'
+
+    # United Express (handles both with and without space)
+    if 'UNITED' in provider_upper:
+        return 'United Express'
+
+    raise ValueError(f"Unknown provider: {provider_name}")
+
+
+def group_by_provider(shipments, key='provider'):
+    """Group shipment dicts by their provider field, preserving input order"""
+    groups = defaultdict(list)
+    for shipment in shipments:
+        groups[shipment[key]].append(shipment)
+    return groups
+
+
+def chunked(items, size):
+    """Split a list into consecutive chunks of at most ``size`` items"""
+    size = max(1, size)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def fedex_api_to_tracking_result(awb, api_result):
+    """Transform a fedex_api response into the scraper result format"""
+    if api_result.get('success'):
+        return {
+            "awb": awb,
+            "status": api_result.get('status', 'Unknown'),
+            "origin": f"{api_result.get('origin', {}).get('city', '')}, {api_result.get('origin', {}).get('state', '')}".strip(', '),
+            "destination": f"{api_result.get('destination', {}).get('city', '')}, {api_result.get('destination', {}).get('state', '')}".strip(', '),
+            "timeline": [
+                {
+                    "date_time": event.get('timestamp', ''),
+                    "activity": event.get('status', ''),
+                    "location": f"{event.get('location', {}).get('city', '')}, {event.get('location', {}).get('state', '')}".strip(', ')
+                }
+                for event in api_result.get('events', [])
+            ]
+        }
+
+    return {
+        "awb": awb,
+        "status": "Error",
+        "origin": "",
+        "destination": "",
+        "timeline": [],
+        "error": api_result.get('error', 'Unknown error')
+    }
+
+
+def _http_first(name):
+    """HTTP form lookup for providers that have one, unless disabled"""
+    if HTTP_TRACKING_ENABLED and http_engine.supports(name):
+        return http_engine.tracker_for(name)
+    return None
+
+
+# Import functions
+# Note: Using generic try/except to allow partial functionality if some scripts break
+try:
+    from update_atlantic_tracking import get_atlantic_tracking_details, prepare_atlantic_form
+    register_provider('Atlantic', get_atlantic_tracking_details, http_track=_http_first('Atlantic'),
+                      prepare=prepare_atlantic_form)
+except ImportError:
+    print("Could not import Atlantic script")
+
+try:
+    from update_courierwala_tracking import get_courierwala_tracking_details, prepare_courierwala_form
+    register_provider('Courier Wala', get_courierwala_tracking_details, http_track=_http_first('Courier Wala'),
+                      prepare=prepare_courierwala_form)
+except ImportError:
+    print("Could not import Courier Wala script")
+
+try:
+    from update_dhl_tracking import get_dhl_tracking_details, get_dhl_tracking_many, DHL_MAX_BATCH
+    register_provider('DHL', get_dhl_tracking_details, track_many=get_dhl_tracking_many,
+                      max_batch=DHL_MAX_BATCH)
+except ImportError:
+    print("Could not import DHL script")
+
+try:
+    # Use new FedEx REST API instead of Selenium
+    from fedex_api import track_shipment as fedex_track_shipment, track_many as fedex_track_many
+    from fedex_api.tracking_service import FEDEX_TRACK_BATCH_SIZE
+    USE_FEDEX_API = True
+
+    def track_fedex_api(awb):
+        """FedEx lookup over the REST API (no Selenium driver needed)"""
+        return fedex_api_to_tracking_result(awb, fedex_track_shipment(awb))
+
+    def track_fedex_api_many(awbs, driver=None):
+        """Several FedEx lookups packed into chunked REST API requests"""
+        return {awb: fedex_api_to_tracking_result(awb, result) for awb, result in fedex_track_many(awbs)}
+
+    register_provider('FedEx', track_fedex_api, needs_browser=False, track_many=track_fedex_api_many,
+                      max_batch=FEDEX_TRACK_BATCH_SIZE)
+    print("✓ FedEx REST API loaded successfully")
+except ImportError:
+    USE_FEDEX_API = False
+    try:
+        # Fallback to old Selenium method
+        from update_fedex_tracking import get_fedex_tracking_details
+        register_provider('FedEx', get_fedex_tracking_details)
+        print("⚠️ Using legacy Selenium FedEx tracking (API not available)")
+    except ImportError:
+        print("Could not import FedEx tracking")
+
+try:
+    from update_icl_tracking import get_icl_tracking_details, prepare_icl_form
+    register_provider('ICL', get_icl_tracking_details, prepare=prepare_icl_form)
+except ImportError:
+    print("Could not import ICL script")
+
+try:
+    from update_pxc_tracking import get_pxc_tracking_details, prepare_pxc_form
+    register_provider('PXC Pacific', get_pxc_tracking_details, http_track=_http_first('PXC Pacific'),
+                      prepare=prepare_pxc_form)
+except ImportError:
+    print("Could not import PXC script")
+
+try:
+    from update_united_tracking import get_united_tracking_details, prepare_united_form
+    register_provider('United Express', get_united_tracking_details, http_track=_http_first('United Express'),
+                      prepare=prepare_united_form)
+except ImportError:
+    print("Could not import United Express script")
@@ -0,0 +1,202 @@
+"""
+Session State
+Per-provider cookies and localStorage saved to disk and restored into new
+browser tabs, so cookie-consent banners and site popups dismissed once stay
+dismissed across lookups, tabs and restarts
+"""
+
+import json
+import os
+import threading
+import time
+
+from selenium.common.exceptions import WebDriverException
+
+SESSION_STATE_ENABLED = os.getenv('SESSION_STATE_ENABLED', 'true').lower() != 'false'
+SESSION_STATE_DIR = os.getenv(
+    'SESSION_STATE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'session_state')
+)
+# Saved state older than this is ignored (consent cookies expire anyway)
+SESSION_STATE_MAX_AGE = int(os.getenv('SESSION_STATE_MAX_AGE', str(7 * 24 * 3600)))
+
+# Sites whose state is kept, per provider
+PROVIDER_ORIGINS = {
+    'DHL': ['https://www.dhl.com'],
+    'FedEx': ['https://www.fedex.com'],
+    'ICL': ['https://iclexpress.in']
+}
+
+# CookieParam fields Network.setCookies accepts back from Network.getCookies
+COOKIE_FIELDS = ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite', 'expires')
+
+# Seeds localStorage for the page's origin before any site script runs
+_LOCAL_STORAGE_JS = """
+(function () {
+    const items = (%s)[location.origin];
+    if (!items) return;
+    try {
+        for (const [key, value] of Object.entries(items)) {
+            if (localStorage.getItem(key) === null) localStorage.setItem(key, value);
+        }
+    } catch (e) {}
+})();
+"""
+
+
+class SessionStore:
+    """
+    Provider session state in ``directory/<provider>.json``.
+
+    ``restore`` runs once per tab and provider, before the first navigation;
+    ``save`` is called when a lookup had to click through a banner or popup,
+    so the next tab (or the next process) starts past it.
+    """
+
+    def __init__(self, directory=SESSION_STATE_DIR, origins=None, max_age=SESSION_STATE_MAX_AGE,
+                 enabled=SESSION_STATE_ENABLED):
+        self.directory = directory
+        self.origins = dict(PROVIDER_ORIGINS if origins is None else origins)
+        self.max_age = max_age
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._states = {}  # provider -> loaded state (None = nothing usable on disk)
+        self._stats = {}
+
+    def _count(self, provider, key):
+        with self._lock:
+            counts = self._stats.setdefault(provider, {
+                "lookups": 0, "banner_shown": 0, "restored": 0, "saved": 0
+            })
+            counts[key] += 1
+
+    def _path(self, provider):
+        return os.path.join(self.directory, provider.replace(' ', '_') + '.json')
+
+    def load(self, provider):
+        """Saved state for a provider, or None if there is none (or it's too old)"""
+        with self._lock:
+            if provider in self._states:
+                return self._states[provider]
+        state = None
+        try:
+            with open(self._path(provider), encoding='utf-8') as f:
+                state = json.load(f)
+            if time.time() - state.get('saved_at', 0) > self.max_age:
+                state = None
+        except (OSError, ValueError, AttributeError):
+            state = None
+        with self._lock:
+            self._states[provider] = state
+        return state
+
+    def restore(self, driver, provider):
+        """
+        Put a provider's saved cookies and localStorage into this tab, once
+        per tab. Call before the tab's first navigation to the site.
+        Returns: True if saved state was applied to the tab
+        """
+        if not self.enabled or provider not in self.origins:
+            return False
+        done = getattr(driver, '_restored_sessions', None)
+        if done is None:
+            done = driver._restored_sessions = {}
+        if provider in done:
+            return done[provider]
+
+        state = self.load(provider)
+        applied = False
+        if state:
+            now = time.time()
+            cookies = [c for c in state.get('cookies', []) if c.get('expires', -1) <= 0 or c['expires'] > now]
+            try:
+                if cookies:
+                    driver.execute_cdp_cmd('Network.setCookies', {'cookies': cookies})
+                if state.get('local_storage'):
+                    driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+                        'source': _LOCAL_STORAGE_JS % json.dumps(state['local_storage'])
+                    })
+                applied = bool(cookies or state.get('local_storage'))
+            except (WebDriverException, AttributeError) as e:
+                print(f"Warning: could not restore {provider} session state ({str(e)[:80]})")
+        if applied:
+            self._count(provider, "restored")
+        done[provider] = applied
+        return applied
+
+    def save(self, driver, provider):
+        """Save the tab's cookies and localStorage for the provider's sites"""
+        if not self.enabled or provider not in self.origins:
+            return False
+        origins = self.origins[provider]
+        try:
+            cookies = driver.execute_cdp_cmd('Network.getCookies', {'urls': origins}).get('cookies', [])
+            origin = driver.execute_script("return location.origin")
+            local = {}
+            if origin in origins:
+                local[origin] = json.loads(driver.execute_script(
+                    "return JSON.stringify(Object.assign({}, window.localStorage))"
+                ) or '{}')
+        except (WebDriverException, AttributeError, ValueError) as e:
+            print(f"Warning: could not save {provider} session state ({str(e)[:80]})")
+            return False
+
+        previous = self.load(provider) or {}
+        local_storage = dict(previous.get('local_storage', {}), **local)
+        state = {
+            'saved_at': time.time(),
+            'cookies': [{k: c[k] for k in COOKIE_FIELDS if k in c} for c in cookies],
+            'local_storage': local_storage
+        }
+        path = self._path(provider)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Warning: could not write {path} ({e})")
+            return False
+
+        with self._lock:
+            self._states[provider] = state
+        # This tab already has the state it just saved
+        getattr(driver, '_restored_sessions', {})[provider] = True
+        self._count(provider, "saved")
+        return True
+
+    def record_banner(self, provider, shown):
+        """Count a lookup, and whether it still had to dismiss a banner/popup"""
+        self._count(provider, "lookups")
+        if shown:
+            self._count(provider, "banner_shown")
+
+    def stats(self):
+        """Per provider: lookups, how many still hit the banner, tabs restored, saves"""
+        with self._lock:
+            return {provider: dict(counts) for provider, counts in self._stats.items()}
+
+
+session_store = SessionStore()
+
+
+def restore_session(driver, provider):
+    """Shortcut for ``session_store.restore``"""
+    return session_store.restore(driver, provider)
+
+
+def save_session(driver, provider):
+    """Shortcut for ``session_store.save``"""
+    return session_store.save(driver, provider)
+
+
+def record_banner(provider, shown):
+    """Shortcut for ``session_store.record_banner``"""
+    session_store.record_banner(provider, shown)
+
+
+def session_stats():
+    """Shortcut for ``session_store.stats``"""
+    return session_store.stats()
@@ -0,0 +1,142 @@
+"""
+Check BrowserManager tab handling against a fake chromedriver (no Chrome
+needed): the fake answers WebDriver commands per window, so TabDriver's
+tab switching and the manager's recovery paths run for real
+"""
+import itertools
+import sys
+import time
+
+from selenium import webdriver
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.errorhandler import ErrorHandler
+from selenium.webdriver.remote.switch_to import SwitchTo
+
+sys.path.append('.')
+from browser_manager import BrowserManager
+from warm_slots import WarmSlots
+
+
+class FakeChromedriver:
+    """Command executor holding a window list, like one chromedriver session"""
+
+    handles = itertools.count(1)
+
+    def __init__(self):
+        self.windows = {'blank': 'about:blank'}
+        self.current = 'blank'
+        self.alive = True
+        self.loads = []
+
+    @staticmethod
+    def error(name):
+        return {'status': 404, 'value': {'error': name, 'message': name}}
+
+    def execute(self, command, params):
+        if not self.alive:
+            return self.error('invalid session id')
+        if command == Command.W3C_GET_WINDOW_HANDLES:
+            return {'value': list(self.windows)}
+        if command == Command.SWITCH_TO_WINDOW:
+            if params['handle'] not in self.windows:
+                return self.error('no such window')
+            self.current = params['handle']
+            return {'value': None}
+        if command == Command.NEW_WINDOW:
+            handle = f"tab{next(self.handles)}"
+            self.windows[handle] = 'about:blank'
+            return {'value': {'handle': handle, 'type': 'tab'}}
+        if command == Command.QUIT:
+            self.alive = False
+            return {'value': None}
+
+        # Everything else runs in the current window
+        if self.current not in self.windows:
+            return self.error('no such window')
+        if command == Command.W3C_GET_CURRENT_WINDOW_HANDLE:
+            return {'value': self.current}
+        if command == Command.CLOSE:
+            del self.windows[self.current]
+            return {'value': list(self.windows)}
+        if command == Command.GET:
+            self.windows[self.current] = params['url']
+            self.loads.append(params['url'])
+            return {'value': None}
+        return {'value': 'complete'}
+
+    def close(self):
+        pass
+
+
+def fake_chrome():
+    driver = webdriver.Chrome.__new__(webdriver.Chrome)
+    driver.command_executor = FakeChromedriver()
+    driver.session_id = 'fake'
+    driver.error_handler = ErrorHandler()
+    driver._switch_to = SwitchTo(driver)
+    driver._websocket_connection = None
+    driver._request = None
+    driver.caps = {'browserName': 'chrome'}
+    return driver
+
+
+def new_manager(**kwargs):
+    return BrowserManager(browsers=1, tabs_per_browser=3, isolate=False, factory=fake_chrome,
+                          maintenance_interval=0, **kwargs)
+
+
+print("Testing browser manager...")
+print("=" * 70)
+
+# One tab closes under a scraper while a sibling tab stays checked out
+manager = new_manager()
+sibling = manager.acquire()
+chrome = sibling._shared_browser.driver.command_executor
+try:
+    with manager.checkout() as tab:
+        tab.get('https://example.com/track')
+        del chrome.windows[tab.handle]
+        tab.execute_script('return document.title')
+except Exception as e:
+    print(f"  Closed tab raised: {str(e).strip()}")
+
+stats = manager.stats()
+print(f"  Stats: {stats}")
+assert sibling._shared_browser.alive and chrome.alive
+assert stats["replaced"] == 1 and stats["restarted_browsers"] == 0
+assert sibling.execute_script('return 1') == 'complete'
+manager.release(sibling)
+
+# Resetting a released tab to about:blank isn't a page load for recycling
+with manager.checkout() as tab:
+    tab.get('https://example.com/track')
+assert chrome.loads[-1] == 'about:blank'
+assert manager.stats()["navigations"] == 2, manager.stats()["navigations"]
+
+# A dead session still takes the browser (and its tabs) with it
+with manager.checkout() as tab:
+    pass
+chrome.alive = False
+manager.release(manager.acquire(), discard=True)
+assert manager.stats()["restarted_browsers"] == 1
+manager.close()
+
+# A warm-slot tab moves to the replacement browser when its browser is
+# recycled, so the old Chrome can quit
+manager = new_manager()
+warm = WarmSlots(manager, {'ICL': lambda tab: tab.get('https://example.com/form')}).start()
+time.sleep(0.3)
+old = manager._browsers[0]
+manager._recycle(old, 'pages')
+with warm.checkout('ICL') as tab:
+    assert tab is None  # re-parking in the new browser
+time.sleep(0.3)
+manager.maintain()
+with warm.checkout('ICL') as tab:
+    print(f"  Warm tab after recycling: {tab}")
+    assert tab._shared_browser is not old
+assert not old.alive and manager.stats()["browsers"] == 1
+warm.close()
+manager.close()
+
+print("\n✅ Browser manager OK")
@@ -0,0 +1,36 @@
+"""
+Check the tracking cache's TTL tiers: terminal statuses are kept long,
+failed lookups briefly, and anything else (including failed delivery
+attempts) as in transit
+"""
+import sys
+
+sys.path.append('.')
+from cache import ACTIVE_TTL, NEGATIVE_TTL, TERMINAL_TTL, status_ttl
+
+print("Testing tracking cache TTLs...")
+print("=" * 70)
+
+expected = {
+    "Delivered": TERMINAL_TTL,
+    "DELIVERED TO CONSIGNEE": TERMINAL_TTL,
+    "Shipment delivered": TERMINAL_TTL,
+    "Returned to shipper": TERMINAL_TTL,
+    "Return to sender": TERMINAL_TTL,
+    "Not Delivered": ACTIVE_TTL,
+    "Undelivered": ACTIVE_TTL,
+    "Non-delivered": ACTIVE_TTL,
+    "Delivery exception - not delivered": ACTIVE_TTL,
+    "Delivery attempted, could not be delivered": ACTIVE_TTL,
+    "Not yet delivered": ACTIVE_TTL,
+    "Out for delivery": ACTIVE_TTL,
+    "In transit": ACTIVE_TTL,
+    "Not Found": NEGATIVE_TTL,
+    "Error: timeout": NEGATIVE_TTL,
+    "": NEGATIVE_TTL,
+}
+for status, ttl in expected.items():
+    print(f"  {status!r:<45} -> {status_ttl(status)}s")
+    assert status_ttl(status) == ttl, f"{status!r}: {status_ttl(status)} != {ttl}"
+
+print("\n✅ Tracking cache TTLs OK")
@@ -0,0 +1,55 @@
+"""
+Check offline gazetteer lookups, in particular US state / Canadian province
+codes that share an ISO2 code with a country ('FRESNO, CA' is not Canada)
+"""
+import sys
+
+sys.path.append('.')
+from gazetteer import Gazetteer
+
+gazetteer = Gazetteer()
+
+print("Testing gazetteer lookups...")
+print("=" * 70)
+
+# Unknown US cities with a state code: only a partial US match, so the
+# network geocoder gets asked first
+for name in ["PORTLAND, OR", "COLLIERVILLE, TN", "MOBILE, AL", "WILMINGTON, DE",
+             "FRESNO, CA", "OMAHA, NE", "BOISE, ID"]:
+    match = gazetteer.lookup(name)
+    print(f"  {name:<22} -> {match['name']} (partial={match['partial']})")
+    assert match["country"] == "US" and match["partial"], f"{name} resolved to {match['name']}"
+
+# Same-named places abroad are doubtful next to a state/province code
+for name in ["PARIS, TX", "LONDON, ON", "BIRMINGHAM, AL", "PERTH, WA"]:
+    match = gazetteer.lookup(name)
+    print(f"  {name:<22} -> {match['name']} ({match['country']}, partial={match['partial']})")
+    assert match["partial"], f"{name} resolved to {match['name']} ({match['country']})"
+
+# Known places still resolve next to state, province and country codes
+expected = {
+    "MEMPHIS, TN": "US",
+    "INDIANAPOLIS, IN": "US",
+    "LOS ANGELES, CA": "US",
+    "TORONTO, ON": "CA",
+    "MUMBAI, IN": "IN",
+    "NEW DELHI IN": "IN",
+    "DUBAI(AE)": "AE",
+    "FRANKFURT, DE": "DE",
+}
+for name, country in expected.items():
+    match = gazetteer.lookup(name)
+    print(f"  {name:<22} -> {match['name']} ({match['country']})")
+    assert match["country"] == country and not match["partial"]
+
+# A code on its own is still a country; misspelled countries (as they
+# appear in the sheets) match on their own, never next to other parts
+assert gazetteer.lookup("TN")["name"] == "Tunisia"
+assert gazetteer.lookup("MUMBAII, IN")["fuzzy"]
+for name, country in [("KYRGYSTHAN", "KG"), ("NEWZEALNAD", "NZ")]:
+    match = gazetteer.lookup(name)
+    print(f"  {name:<22} -> {match['name']} (fuzzy={match['fuzzy']})")
+    assert match["country"] == country and match["fuzzy"]
+assert gazetteer.lookup("PORTLAND, OR")["name"] != "Poland"
+
+print("\n✅ Gazetteer lookups OK")
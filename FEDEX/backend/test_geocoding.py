@@ -0,0 +1,65 @@
+"""
+Check map routes built from provider-shaped timelines: the FedEx transform
+and the scraper parsers emit date_time/activity (newest first), Courier
+Wala date/status. No network: coordinates are passed in directly.
+"""
+import sys
+
+sys.path.append('.')
+from geocoding import build_route
+from providers import fedex_api_to_tracking_result
+
+COORDS = {
+    "MEMPHIS, TN": {"lat": 35.15, "lng": -90.05},
+    "INDIANAPOLIS, IN": {"lat": 39.77, "lng": -86.16},
+    "LOS ANGELES, CA": {"lat": 34.05, "lng": -118.24},
+    "NEW DELHI": {"lat": 28.61, "lng": 77.21},
+    "LONDON": {"lat": 51.51, "lng": -0.13},
+}
+
+
+def location(city, state):
+    return {"city": city, "stateOrProvinceCode": state, "countryCode": "US"}
+
+
+print("Testing map routes from provider timelines...")
+print("=" * 70)
+
+# FedEx API result, scan events newest first, as fedex_api normalizes them
+api_result = {
+    "success": True,
+    "status": "Delivered",
+    "origin": {"city": "MEMPHIS", "state": "TN"},
+    "destination": {"city": "LOS ANGELES", "state": "CA"},
+    "events": [
+        {"timestamp": "2024-01-09T14:30:00-08:00", "status": "Delivered",
+         "location": {"city": "LOS ANGELES", "state": "CA"}},
+        {"timestamp": "2024-01-08T03:10:00-05:00", "status": "Departed FedEx hub",
+         "location": {"city": "INDIANAPOLIS", "state": "IN"}},
+        {"timestamp": "2024-01-07T18:00:00-06:00", "status": "Picked up",
+         "location": {"city": "MEMPHIS", "state": "TN"}},
+    ]
+}
+timeline = fedex_api_to_tracking_result("794887278605", api_result)["timeline"]
+route = build_route(timeline, COORDS)
+checkpoints = route["checkpoints"]
+for checkpoint in checkpoints:
+    print(f"  {checkpoint['date']} | {checkpoint['status']} | {checkpoint['location']} | completed={checkpoint['completed']}")
+
+assert [c["location"] for c in checkpoints] == ["MEMPHIS, TN", "INDIANAPOLIS, IN", "LOS ANGELES, CA"]
+assert [c["status"] for c in checkpoints] == ["Picked up", "Departed FedEx hub", "Delivered"]
+assert all(c["date"] and c["completed"] is True for c in checkpoints)
+assert route["polyline"][0] == [35.15, -90.05] and route["polyline"][-1] == [34.05, -118.24]
+
+# Scraper timeline out of order (day-first dates) still sorts by date
+scraped = [
+    {"date_time": "10/11/2025 18:21", "activity": "SHIPMENT SENT", "location": "NEW DELHI"},
+    {"date_time": "12/11/2025 10:00", "activity": "DELIVERED", "location": "LONDON"},
+]
+assert [c["status"] for c in build_route(scraped, COORDS)["checkpoints"]] == ["SHIPMENT SENT", "DELIVERED"]
+
+# Courier Wala keeps date/status
+courierwala = [{"date": "12/11/2025 10:00 AM", "status": "Delivered", "location": "LONDON"}]
+assert build_route(courierwala, COORDS)["checkpoints"][0]["status"] == "Delivered"
+
+print("\n✅ Map routes OK")
@@ -0,0 +1,136 @@
+"""
+Exercise the HTTP tracking engine against a local stub site:
+one form page that posts back with hidden fields, and one page whose
+form is missing so the engine has to fall back to the browser
+"""
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs
+
+sys.path.append('.')
+from http_tracking import FormProvider, HttpTrackingEngine
+from tracking_parsers import parse_atlantic, parse_courierwala, parse_pxc, parse_united
+
+FORM_PAGE = b"""
+<html><body>
+<form method="post" action="/results">
+  <input type="hidden" name="__VIEWSTATE" value="abc123">
+  <input type="text" id="tracking" name="awb">
+  <button id="track" name="submit" value="Track">Track</button>
+</form>
+</body></html>
+"""
+
+# A form that posts back to itself and comes back without results, wrapped
+# in generic markup the PXC and United parsers look for
+ECHO_PAGE = b"""
+<html><body>
+<div class="row"><div class="order-1"><h5>Track your shipment</h5></div></div>
+<table>
+  <tr><td>
+    <form method="post" action="/echo">
+      <input type="hidden" name="__VIEWSTATE" value="abc123">
+      <input type="text" id="tracking" name="awb">
+      <button id="track" name="submit" value="Track">Track</button>
+    </form>
+  </td></tr>
+  <tr><td>AWB number</td><td>10 digits</td></tr>
+  <tr><td>Reference</td><td>optional</td></tr>
+  <tr><td>Help</td><td>Call us</td></tr>
+</table>
+<table><tr><th>Date</th><th>Status</th><th>Activity</th><th>Location</th></tr></table>
+</body></html>
+"""
+
+NO_FORM_PAGE = b"<html><body><input id='tracking' name='awb'></body></html>"
+
+RESULTS_PAGE = """
+<html><body>
+<table class="table table-bordered">
+  <tr><td>Consignee Name</td><td>JOHN DOE</td><td>Destination: LONDON</td></tr>
+  <tr><td>Delivery Date</td><td>12/11/2025</td><td>Signing for: J DOE Fwd No: 12345</td></tr>
+  <tr><td>
+    <table class="table table-striped">
+      <tr><th>Date/Time</th><th>Activity</th><th>Location</th></tr>
+      <tr><td>12/11/2025 10:00</td><td>DELIVERED</td><td>LONDON</td></tr>
+      <tr><td>10/11/2025 18:21</td><td>SHIPMENT SENT</td><td>NEW DELHI</td></tr>
+    </table>
+  </td></tr>
+</table>
+<p>AWB {awb}, view state {state}</p>
+</body></html>
+"""
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send({"/broken": NO_FORM_PAGE, "/echo": ECHO_PAGE}.get(self.path, FORM_PAGE))
+
+    def do_POST(self):
+        if self.path == "/echo":
+            return self._send(ECHO_PAGE)
+        length = int(self.headers.get("Content-Length", 0))
+        fields = parse_qs(self.rfile.read(length).decode())
+        body = RESULTS_PAGE.format(awb=fields["awb"][0], state=fields["__VIEWSTATE"][0])
+        self._send(body.encode())
+
+
+server = HTTPServer(("127.0.0.1", 0), StubHandler)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+base = f"http://127.0.0.1:{server.server_port}"
+
+engine = HttpTrackingEngine(providers={
+    'Stub': FormProvider('Stub', f"{base}/track", input_id="tracking", submit_id="track", parse=parse_atlantic),
+    'Broken': FormProvider('Broken', f"{base}/broken", input_id="tracking", parse=parse_atlantic),
+    'EchoPXC': FormProvider('EchoPXC', f"{base}/echo", input_id="tracking", submit_id="track", parse=parse_pxc),
+    'EchoUnited': FormProvider('EchoUnited', f"{base}/echo", input_id="tracking", submit_id="track",
+                               parse=parse_united)
+})
+
+print("Testing HTTP tracking engine...")
+print("=" * 70)
+
+try:
+    result = engine.track('Stub', 9221060847)
+    print(f"  Status: {result['status']}")
+    print(f"  Consignee: {result['consignee_name']}")
+    print(f"  Timeline events: {len(result['timeline'])}")
+    assert result['status'] == "Delivered"
+    assert result['fwd_no'] == "12345"
+
+    fallback = engine.track('Broken', 9221060847)
+    print(f"  Broken form result: {fallback}")
+    assert fallback is None
+
+    # The form echoed back without results isn't a result either
+    for name in ('EchoPXC', 'EchoUnited'):
+        echoed = engine.track(name, 9221060847)
+        print(f"  {name} echoed form result: {echoed}")
+        assert echoed is None
+
+    print(f"  Stats: {engine.stats()}")
+    print("\n✅ HTTP tracking engine OK")
+finally:
+    engine.close()
+    server.shutdown()
+
+# Pages with a table but no shipment data fall back to Selenium
+assert parse_courierwala("<html><body><table><tr><td>Menu</td></tr></table></body></html>", "123") is None
+assert parse_courierwala("<table><tr><td>AWB No</td><td>123</td></tr></table>", "123") is None
+details = parse_courierwala("<table><tr><td>Destination</td><td>LONDON</td></tr></table>", "123")
+assert details["destination"] == "LONDON" and details["status"] == "Tracking Data Available"
+timeline = parse_courierwala(
+    "<table><tr><td>Date</td><td>Time</td><td>Location</td><td>Activity</td></tr>"
+    "<tr><td>12/11/2025</td><td>10:00</td><td>LONDON</td><td>DELIVERED</td></tr></table>", "123")
+assert len(timeline["timeline"]) == 1
+print("✅ Courier Wala parser OK")
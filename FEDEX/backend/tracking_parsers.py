@@ -0,0 +1,542 @@
+"""
+Tracking Page Parsers
+Pure functions that turn a provider's results HTML (or, for DHL, its JSON
+payload) into the tracking result dict, using lxml XPath over a single
+snapshot of the page
+"""
+
+import json
+import re
+
+import lxml.html
+
+
+def parse_html(html):
+    """Parse an HTML string/bytes into an lxml document, dropping scripts and styles"""
+    doc = lxml.html.fromstring(html)
+    for el in doc.xpath('//script | //style | //noscript'):
+        el.drop_tree()
+    return doc
+
+
+def text_of(el):
+    """Visible-ish text of an element: whitespace collapsed within lines, blank lines dropped"""
+    if el is None:
+        return ""
+    lines = (" ".join(line.split()) for line in el.text_content().splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def has_class(name):
+    """XPath predicate matching a single CSS class"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _cells(row):
+    # Descendant cells, like WebDriver's row.find_elements(By.TAG_NAME, "td")
+    return [text_of(td) for td in row.xpath('.//td')]
+
+
+# ---------------------------------------------------------------------------
+# Atlantic Courier
+# ---------------------------------------------------------------------------
+
+def atlantic_result(awb_number, status="Unknown"):
+    """Empty Atlantic result with the given status"""
+    return {
+        "awb": awb_number,
+        "status": status,
+        "consignee_name": None,
+        "destination": None,
+        "delivery_date": None,
+        "signing_for": None,
+        "fwd_no": None,
+        "timeline": []
+    }
+
+
+def atlantic_status(latest_activity):
+    """Map Atlantic's latest activity text to a summary status"""
+    activity = latest_activity.upper()
+
+    if "DELIVERED" in activity:
+        return "Delivered"
+    if "OUT FOR DELIVERY" in activity or "WITH DELIVERY COURIER" in activity:
+        return "Out for Delivery"
+    if "PARCEL DELIVERY CENTRE" in activity or "AT PARCEL" in activity:
+        return "At Delivery Centre"
+    if "CUSTOM CLEARED" in activity:
+        return "Customs Cleared"
+    if "CUSTOM" in activity or "UNDER CUSTOM" in activity:
+        return "In Customs"
+    if "TRANSIT" in activity or "SHIPMENT SENT" in activity or "IN TRANSIT" in activity:
+        return "In Transit"
+    if "RECEIVED" in activity or "PICKED" in activity:
+        return "Picked Up"
+    return latest_activity
+
+
+def parse_atlantic(html, awb_number):
+    """
+    Parse Atlantic Courier's results page.
+    Returns: tracking dict, or None if the page holds no results or
+    'No tracking data' message at all
+    """
+    doc = parse_html(html)
+
+    for alert in doc.xpath(f'//*[{has_class("alert-info")}]'):
+        if "No tracking data" in text_of(alert):
+            return atlantic_result(awb_number, "Not Found")
+
+    main_table = doc.xpath(f'//table[{has_class("table-bordered")}]')
+    if not main_table:
+        return None
+
+    tracking_data = atlantic_result(awb_number)
+
+    # Main table: Consignee Name | Name | Destination, Delivery Date | Date | Signing info
+    for row in main_table[0].xpath('.//tr'):
+        cells = _cells(row)
+        if len(cells) != 3:
+            continue
+        if "Consignee Name" in cells[0]:
+            tracking_data["consignee_name"] = cells[1]
+            if "Destination:" in cells[2]:
+                tracking_data["destination"] = cells[2].replace("Destination:", "").strip()
+        elif "Delivery Date" in cells[0]:
+            tracking_data["delivery_date"] = cells[1]
+            if "Signing for:" in cells[2]:
+                parts = cells[2].split("Fwd No:")
+                tracking_data["signing_for"] = parts[0].replace("Signing for:", "").strip()
+                if len(parts) > 1:
+                    tracking_data["fwd_no"] = parts[1].strip()
+
+    # Nested timeline table: Date/Time | Activity | Location
+    timeline_table = doc.xpath(f'//table[{has_class("table-striped")}]')
+    if not timeline_table:
+        if tracking_data["destination"]:
+            tracking_data["status"] = f"Destination: {tracking_data['destination']}"
+        else:
+            tracking_data["status"] = "Tracking Data Incomplete"
+        return tracking_data
+
+    for row in timeline_table[0].xpath('.//tr'):
+        cells = _cells(row)
+        if len(cells) == 3:
+            date_time, activity, location = cells
+            if date_time and date_time != "Date/Time" and activity != "Activity":
+                tracking_data["timeline"].append({
+                    "date_time": date_time,
+                    "activity": activity,
+                    "location": location
+                })
+
+    # First entry is the latest
+    if tracking_data["timeline"]:
+        tracking_data["status"] = atlantic_status(tracking_data["timeline"][0]["activity"])
+    elif tracking_data["destination"]:
+        tracking_data["status"] = f"Destination: {tracking_data['destination']}"
+
+    return tracking_data
+
+
+# ---------------------------------------------------------------------------
+# Courier Wala
+# ---------------------------------------------------------------------------
+
+def courierwala_result(awb_number, status="Unknown"):
+    """Empty Courier Wala result with the given status"""
+    return {
+        "awb": awb_number,
+        "status": status,
+        "booking_date": None,
+        "consignee_name": None,
+        "destination": None,
+        "delivery_date_time": None,
+        "receiver_name": None,
+        "delivery_awb": None,
+        "timeline": []
+    }
+
+
+def courierwala_status(latest_activity):
+    """Map Courier Wala's latest activity text to a summary status"""
+    activity = latest_activity.upper()
+
+    if "DELIVERED" in activity:
+        return "Delivered"
+    if "OUT FOR DELIVERY" in activity:
+        return "Out for Delivery"
+    if "CUSTOMS" in activity or "CUSTOM" in activity:
+        return "In Customs"
+    if "TRANSIT" in activity or "IN TRANSIT" in activity:
+        return "In Transit"
+    if "RECEIVED" in activity:
+        return "Received"
+    if "ARRIVAL" in activity or "ARRIVED" in activity:
+        return "Arrived at Hub"
+    return latest_activity
+
+
+COURIERWALA_FIELDS = [
+    # (label fragment, result key), checked in order
+    ("AWB No", None),
+    ("Booking Date", "booking_date"),
+    ("Consignee Name", "consignee_name"),
+    ("Destination", "destination"),
+    ("Status", "status"),
+    ("Delivery Date", "delivery_date_time"),
+    ("Receiver Name", "receiver_name"),
+    ("Delivery AWB", "delivery_awb")
+]
+
+
+def parse_courierwala(html, awb_number):
+    """
+    Parse Courier Wala's results page.
+    Returns: tracking dict, or None unless a shipment detail or timeline
+    row was read (or the page says 'not found')
+    """
+    doc = parse_html(html)
+
+    body = doc.find('body')
+    page_text = text_of(body if body is not None else doc).lower()
+    if "no data" in page_text or "not found" in page_text:
+        return courierwala_result(awb_number, "Not Found")
+
+    if not doc.xpath('//table'):
+        return None
+
+    tracking_data = courierwala_result(awb_number)
+    rows = [_cells(row) for row in doc.xpath('//tr')]
+    found_details = False
+
+    # Details table: Label | Value
+    for cells in rows:
+        if len(cells) != 2:
+            continue
+        label, value = cells
+        for fragment, key in COURIERWALA_FIELDS:
+            if fragment in label:
+                if key and value:
+                    tracking_data[key] = value
+                    found_details = True
+                break
+
+    # Timeline table: Date | Time | Location | Activity
+    for cells in rows:
+        if len(cells) == 4:
+            date, time_val, location, activity = cells
+            if date and date != "Date" and activity != "Activity":
+                tracking_data["timeline"].append({
+                    "date": date,
+                    "time": time_val,
+                    "location": location,
+                    "activity": activity
+                })
+
+    # Some other table (layout change, error page): let Selenium have a go
+    if not found_details and not tracking_data["timeline"]:
+        return None
+
+    if tracking_data["status"] == "Unknown" and tracking_data["timeline"]:
+        tracking_data["status"] = courierwala_status(tracking_data["timeline"][0]["activity"])
+
+    if tracking_data["status"] == "Unknown" and tracking_data["destination"]:
+        tracking_data["status"] = "Tracking Data Available"
+
+    return tracking_data
+
+
+# ---------------------------------------------------------------------------
+# PXC Pacific
+# ---------------------------------------------------------------------------
+
+def _table_rows(table):
+    """Header cells (upper case) and data rows of a table"""
+    rows = []
+    for row in table.xpath('.//tr'):
+        cells = [text_of(c) for c in row.xpath('./th | ./td')]
+        if cells:
+            rows.append(cells)
+    if not rows:
+        return [], []
+    return [c.upper() for c in rows[0]], rows[1:]
+
+
+def _column(headers, *fragments):
+    return next((i for i, h in enumerate(headers) if any(f in h for f in fragments)), None)
+
+
+def parse_pxc(html, awb_number):
+    """
+    Parse PXC Pacific's results page.
+    Returns: tracking dict, or None unless a status or timeline row was read
+    """
+    doc = parse_html(html)
+
+    tracking_data = {
+        "awb": awb_number,
+        "status": "Unknown",
+        "origin": None,
+        "destination": None,
+        "delivery_date": None,
+        "timeline": []
+    }
+    found = False
+
+    for table in doc.xpath('//table'):
+        table_str = text_of(table).upper()
+        headers, data = _table_rows(table)
+
+        # Summary table (Origin, Destination, Status)
+        if "ORIGIN" in table_str and "DESTINATION" in table_str:
+            found = True
+            status_col = _column(headers, "STATUS")
+            if status_col is not None and data and status_col < len(data[0]):
+                tracking_data["status"] = data[0][status_col]
+
+        # Timeline table
+        if "DATE" in table_str and ("LOCATION" in table_str or "ACTIVITY" in table_str or "STATUS" in table_str):
+            date_col = _column(headers, "DATE")
+            status_col = _column(headers, "STATUS", "ACTIVITY")
+            loc_col = _column(headers, "LOCATION", "ORIGIN")
+
+            if date_col is not None and status_col is not None:
+                found = True
+                for cells in data:
+                    if max(date_col, status_col) >= len(cells):
+                        continue
+                    tracking_data["timeline"].append({
+                        "date_time": cells[date_col],
+                        "activity": cells[status_col],
+                        "location": cells[loc_col] if loc_col is not None and loc_col < len(cells) else ""
+                    })
+
+    # PXC lists newest first
+    if tracking_data["timeline"]:
+        latest_activity = tracking_data["timeline"][0]["activity"]
+        tracking_data["status"] = "Delivered" if "DELIVERED" in latest_activity.upper() else latest_activity
+
+    # Empty headers only (the form echoed back, an error page): let Selenium have a go
+    if not found or (tracking_data["status"] in ("", "Unknown") and not tracking_data["timeline"]):
+        return None
+
+    return tracking_data
+
+
+# ---------------------------------------------------------------------------
+# United Express
+# ---------------------------------------------------------------------------
+
+def parse_united(html, awb_number):
+    """
+    Parse United Express's results page.
+    Returns: tracking dict, or None unless a status or timeline row was read
+    """
+    doc = parse_html(html)
+
+    tracking_data = {
+        "awb": awb_number,
+        "status": "Unknown",
+        "origin": "N/A",
+        "destination": "N/A",
+        "delivery_date": None,
+        "timeline": []
+    }
+    found = False
+
+    # Summary table: row 3 is the delivery date, row 4 the status (a layout
+    # table around the tracking form isn't it)
+    first_table = doc.xpath('(//table[not(preceding-sibling::table)])[1][not(.//input)]')
+    if first_table:
+        status = first_table[0].xpath('.//tr[4]/td[2]')
+        if status and text_of(status[0]):
+            tracking_data["status"] = text_of(status[0]).title()
+            found = True
+        delivery = first_table[0].xpath('.//tr[3]/td[2]')
+        if delivery:
+            tracking_data["delivery_date"] = text_of(delivery[0])
+
+    origin = doc.xpath(f'//*[{has_class("order-1")}]//h5')
+    if origin:
+        tracking_data["origin"] = text_of(origin[0])
+        found = True
+
+    destination = doc.xpath(f'//*[{has_class("order-3")}]//h5')
+    if destination:
+        tracking_data["destination"] = text_of(destination[0])
+        found = True
+
+    # History table: Date/Time | Activity | Location
+    for table in doc.xpath('//table'):
+        header_text = text_of(table).lower()
+        if "date" in header_text and "activity" in header_text:
+            found = True
+            for row in table.xpath('.//tr'):
+                cells = _cells(row)
+                if len(cells) == 3 and "activity" not in cells[1].lower() and cells[1]:
+                    tracking_data["timeline"].append({
+                        "date_time": cells[0],
+                        "activity": cells[1],
+                        "location": cells[2]
+                    })
+            break
+
+    # Origin/destination headings alone are stock Bootstrap markup, also on
+    # the form page: without a status or history let Selenium have a go
+    if not found or (tracking_data["status"] == "Unknown" and not tracking_data["timeline"]):
+        return None
+
+    return tracking_data
+
+
+# ---------------------------------------------------------------------------
+# ICL
+# ---------------------------------------------------------------------------
+
+def parse_icl(html, awb_number):
+    """
+    Parse ICL's results page. Each day is its own table whose first header
+    cell carries the date ('28/08/2025 Status'), with Status, Location and
+    Time columns.
+    Returns: tracking dict (status 'Unknown' with an empty timeline if no
+    tables matched)
+    """
+    tracking_data = {
+        "awb": awb_number,
+        "status": "Unknown",
+        "origin": None,
+        "destination": None,
+        "timeline": []
+    }
+
+    if isinstance(html, bytes):
+        html = html.decode('utf-8', 'replace')
+    if "Invalid" in html or "Not Found" in html:
+        tracking_data["status"] = "Not Found"
+
+    doc = parse_html(html)
+    for table in doc.xpath('//table'):
+        headers, data = _table_rows(table)
+        if not headers:
+            continue
+
+        date_match = re.search(r'\d{1,2}[/-]\d{1,2}[/-]\d{4}', headers[0])
+        current_date = date_match.group(0) if date_match else ""
+
+        status_col = _column(headers, "STATUS")
+        if status_col is None:
+            continue
+        location_col = _column(headers, "LOCATION")
+        time_col = _column(headers, "TIME")
+
+        for cells in data:
+            if status_col >= len(cells):
+                continue
+            activity = cells[status_col]
+            location = cells[location_col] if location_col is not None and location_col < len(cells) else ""
+            time_val = cells[time_col] if time_col is not None and time_col < len(cells) else ""
+
+            if activity and activity.upper() != "STATUS":
+                tracking_data["timeline"].append({
+                    "date_time": f"{current_date} {time_val}".strip(),
+                    "activity": activity,
+                    "location": location
+                })
+
+    timeline = tracking_data["timeline"]
+    if timeline:
+        if any("DELIVERED" in t["activity"].upper() for t in timeline):
+            tracking_data["status"] = "Delivered"
+        else:
+            tracking_data["status"] = timeline[0]["activity"]
+
+        # Newest first: destination from the first located event, origin from the last
+        located = [t["location"] for t in timeline if t["location"]]
+        if located:
+            tracking_data["destination"] = located[0]
+            tracking_data["origin"] = located[-1]
+
+    return tracking_data
+
+
+# ---------------------------------------------------------------------------
+# DHL (JSON from the tracking page's shipment lookup, see xhr_capture)
+# ---------------------------------------------------------------------------
+
+def _dhl_place(node):
+    """'City, CC' from a DHL location/origin/destination object"""
+    address = (node or {}).get("address") or (node or {}).get("location", {}).get("address") or {}
+    parts = [address.get("addressLocality"), address.get("countryCode")]
+    return ", ".join(p for p in parts if p) or None
+
+
+def _dhl_event(event):
+    return {
+        "date_time": (event.get("timestamp") or "").replace("T", " "),
+        "activity": (event.get("description") or event.get("status") or "").strip(),
+        "location": _dhl_place(event.get("location")) or ""
+    }
+
+
+def _dhl_shipment(shipment, awb_number):
+    status = shipment.get("status") or {}
+    timeline = [_dhl_event(e) for e in shipment.get("events") or []]
+    delivered = (status.get("statusCode") or "").lower() == "delivered"
+    return {
+        "awb": awb_number,
+        "status": (status.get("description") or status.get("status") or "").strip() or "Unknown",
+        "origin": _dhl_place(shipment.get("origin")),
+        "destination": _dhl_place(shipment.get("destination")),
+        "delivery_date": (status.get("timestamp") or "").replace("T", " ") if delivered else
+                         shipment.get("estimatedTimeOfDelivery"),
+        "timeline": [e for e in timeline if e["activity"]]
+    }
+
+
+def _dhl_shipments(payload):
+    data = json.loads(payload) if isinstance(payload, (str, bytes)) else payload
+    return (data or {}).get("shipments") or []
+
+
+def parse_dhl_json(payload, awb_number):
+    """
+    Parse DHL's shipment-tracking JSON ({"shipments": [{status, origin,
+    destination, events, ...}]}), the payload the tracking page renders.
+    Returns: tracking dict, or None if it holds no shipment
+    """
+    shipments = _dhl_shipments(payload)
+    return _dhl_shipment(shipments[0], awb_number) if shipments else None
+
+
+def parse_dhl_json_many(payload, awb_numbers):
+    """
+    Split a multi-number DHL payload per AWB (matched on the shipment id).
+    Returns: {awb: tracking dict}; AWBs without a shipment are left out
+    """
+    wanted = {str(awb).replace(" ", "").upper(): awb for awb in awb_numbers}
+    results = {}
+    for shipment in _dhl_shipments(payload):
+        awb = wanted.get(str(shipment.get("id", "")).replace(" ", "").upper())
+        if awb is not None and awb not in results:
+            results[awb] = _dhl_shipment(shipment, awb)
+    return results
+
+
+PARSERS = {
+    'Atlantic': parse_atlantic,
+    'Courier Wala': parse_courierwala,
+    'PXC Pacific': parse_pxc,
+    'United Express': parse_united,
+    'ICL': parse_icl
+}
+
+
+def parse_tracking_html(provider_name, html, awb_number):
+    """
+    Parse a saved or fetched results page for any HTML-scraped provider.
+    Returns: tracking dict, or None if the page holds no tracking data
+    Raises: KeyError for providers without an HTML parser
+    """
+    return PARSERS[provider_name](html, awb_number)
@@ -7,191 +7,63 @@ from selenium.webdriver.chrome.options import Options
 import time
 import json
 from datetime import datetime
+from wait_engine import wait_for, element_present, text_present, all_of, ajax_idle
+from tracking_parsers import parse_atlantic, atlantic_result
+from xhr_capture import xhr_capture
 
-def get_atlantic_tracking_details(awb_number, driver):
+# Results are in, or the site says there's nothing to show
+ATLANTIC_READY = {
+    "results": all_of(element_present("table.table-bordered td"), ajax_idle),
+    "no_data": text_present(".alert-info", "No tracking data")
+}
+ATLANTIC_RESULT_TIMEOUT = 20
+
+def prepare_atlantic_form(driver):
+    """Load the tracking page and wait until the AWB field is ready to type into"""
+    driver.get("https://atlanticcourier.net/track/")
+    WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.ID, "tracking"))
+    )
+
+def get_atlantic_tracking_details(awb_number, driver, prepared=False):
     """
     Fetch detailed tracking information from Atlantic Courier website
+    prepared: the driver is already parked on the form (see warm_slots)
     Returns: dict with status, timeline, and other details
     """
     try:
         # Navigate to tracking page
-        driver.get("https://atlanticcourier.net/track/")
-        time.sleep(2)
+        if not prepared:
+            prepare_atlantic_form(driver)
         
         # Find and clear the input field
-        tracking_input = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.ID, "tracking"))
-        )
+        tracking_input = driver.find_element(By.ID, "tracking")
         tracking_input.clear()
         tracking_input.send_keys(str(awb_number))
         
-        # Click the track button
+        # Click the track button, watching for the AJAX response that
+        # carries the tables when XHR capture is on
+        capture = xhr_capture(driver, 'Atlantic')
         track_button = driver.find_element(By.ID, "track")
         track_button.click()
         
-        # Wait longer for results to load (tables load dynamically via AJAX)
-        # The page needs 5-7 seconds to populate the tracking tables
-        time.sleep(7)
-        
-        # Try to wait for the table to be present
-        try:
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "table"))
-            )
-        except:
-            pass  # Continue anyway, we'll check for tables below
+        if capture:
+            captured = capture.result(awb_number)
+            if captured:
+                return captured
         
-        # Check for "No tracking data" message
-        try:
-            no_data = driver.find_element(By.CLASS_NAME, "alert-info")
-            if "No tracking data" in no_data.text:
-                return {
-                    "awb": awb_number,
-                    "status": "Not Found",
-                    "consignee_name": None,
-                    "destination": None,
-                    "delivery_date": None,
-                    "signing_for": None,
-                    "fwd_no": None,
-                    "timeline": []
-                }
-        except:
-            pass
+        # Tables load dynamically via AJAX; wait until they (or the
+        # 'No tracking data' alert) show up, continuing anyway on timeout
+        wait_for(driver, ATLANTIC_READY, ATLANTIC_RESULT_TIMEOUT, provider='Atlantic')
         
-        # Extract tracking details
-        tracking_data = {
-            "awb": awb_number,
-            "status": "Unknown",
-            "consignee_name": None,
-            "destination": None,
-            "delivery_date": None,
-            "signing_for": None,
-            "fwd_no": None,
-            "timeline": []
-        }
-        
-        try:
-            # Wait a bit more for the table to load
-            time.sleep(1)
-            
-            # Check if there's any table on the page
-            tables = driver.find_elements(By.TAG_NAME, "table")
-            
-            if not tables:
-                # No tables found - likely no tracking data
-                tracking_data["status"] = "No Tracking Data Available"
-                return tracking_data
-            
-            # Try to find the main results table (table-bordered)
-            try:
-                main_table = driver.find_element(By.CSS_SELECTOR, "table.table-bordered")
-                main_rows = main_table.find_elements(By.TAG_NAME, "tr")
-                
-                # Parse main table (consignee details)
-                for row in main_rows:
-                    cells = row.find_elements(By.TAG_NAME, "td")
-                    
-                    # Row with 3 columns
-                    if len(cells) == 3:
-                        cell0_text = cells[0].text.strip()
-                        cell1_text = cells[1].text.strip()
-                        cell2_text = cells[2].text.strip()
-                        
-                        # First row: Consignee Name | Name Value | Destination
-                        if "Consignee Name" in cell0_text:
-                            tracking_data["consignee_name"] = cell1_text
-                            if "Destination:" in cell2_text:
-                                tracking_data["destination"] = cell2_text.replace("Destination:", "").strip()
-                        
-                        # Second row: Delivery Date | Date Value | Signing Info
-                        elif "Delivery Date" in cell0_text:
-                            tracking_data["delivery_date"] = cell1_text
-                            # Extract signing for and fwd no from cell2
-                            if "Signing for:" in cell2_text:
-                                parts = cell2_text.split("Fwd No:")
-                                signing = parts[0].replace("Signing for:", "").strip()
-                                tracking_data["signing_for"] = signing
-                                if len(parts) > 1:
-                                    tracking_data["fwd_no"] = parts[1].strip()
-                
-                # Find the nested timeline table (table-striped)
-                try:
-                    timeline_table = driver.find_element(By.CSS_SELECTOR, "table.table-striped")
-                    timeline_rows = timeline_table.find_elements(By.TAG_NAME, "tr")
-                    
-                    for row in timeline_rows:
-                        cells = row.find_elements(By.TAG_NAME, "td")
-                        
-                        # Skip header row and rows without 3 cells
-                        if len(cells) == 3:
-                            date_time = cells[0].text.strip()
-                            activity = cells[1].text.strip()
-                            location = cells[2].text.strip()
-                            
-                            # Skip header row (check if it's the header)
-                            if date_time and date_time != "Date/Time" and activity != "Activity":
-                                tracking_data["timeline"].append({
-                                    "date_time": date_time,
-                                    "activity": activity,
-                                    "location": location
-                                })
-                    
-                    # Determine status from timeline (first entry is the latest)
-                    if tracking_data["timeline"]:
-                        latest_activity = tracking_data["timeline"][0]["activity"].upper()
-                        
-                        if "DELIVERED" in latest_activity:
-                            tracking_data["status"] = "Delivered"
-                        elif "OUT FOR DELIVERY" in latest_activity or "WITH DELIVERY COURIER" in latest_activity:
-                            tracking_data["status"] = "Out for Delivery"
-                        elif "PARCEL DELIVERY CENTRE" in latest_activity or "AT PARCEL" in latest_activity:
-                            tracking_data["status"] = "At Delivery Centre"
-                        elif "CUSTOM CLEARED" in latest_activity:
-                            tracking_data["status"] = "Customs Cleared"
-                        elif "CUSTOM" in latest_activity or "UNDER CUSTOM" in latest_activity:
-                            tracking_data["status"] = "In Customs"
-                        elif "TRANSIT" in latest_activity or "SHIPMENT SENT" in latest_activity or "IN TRANSIT" in latest_activity:
-                            tracking_data["status"] = "In Transit"
-                        elif "RECEIVED" in latest_activity or "PICKED" in latest_activity:
-                            tracking_data["status"] = "Picked Up"
-                        else:
-                            # Use the actual activity as status
-                            tracking_data["status"] = tracking_data["timeline"][0]["activity"]
-                    else:
-                        # No timeline found, use destination if available
-                        if tracking_data["destination"]:
-                            tracking_data["status"] = f"Destination: {tracking_data['destination']}"
-                            
-                except Exception as e:
-                    # Timeline table not found
-                    if tracking_data["destination"]:
-                        tracking_data["status"] = f"Destination: {tracking_data['destination']}"
-                    else:
-                        tracking_data["status"] = "Tracking Data Incomplete"
-                
-            except Exception as e:
-                # Main table not found - check if it's a "No tracking data" message
-                tracking_data["status"] = "No Tracking Data Available"
-            
-            return tracking_data
-            
-        except Exception as e:
-            print(f"   Warning: Unexpected error - {str(e)[:100]}")
-            tracking_data["status"] = "Error Fetching Data"
-            return tracking_data
+        # Parse one snapshot of the page instead of querying each cell
+        # through WebDriver
+        return parse_atlantic(driver.page_source, awb_number) or \
+            atlantic_result(awb_number, "No Tracking Data Available")
     
     except Exception as e:
         print(f"   Error tracking AWB {awb_number}: {str(e)}")
-        return {
-            "awb": awb_number,
-            "status": f"Error: {str(e)}",
-            "consignee_name": None,
-            "destination": None,
-            "delivery_date": None,
-            "signing_for": None,
-            "fwd_no": None,
-            "timeline": []
-        }
+        return atlantic_result(awb_number, f"Error: {str(e)}")
 
 def update_atlantic_tracking():
     """
@@ -7,21 +7,36 @@ from selenium.webdriver.chrome.options import Options
 import time
 import json
 from datetime import datetime
+from wait_engine import wait_for, rows_present, text_present
+from tracking_parsers import parse_courierwala, courierwala_result
 
-def get_courierwala_tracking_details(awb_number, driver):
+# Result rows are in, or the site says there's nothing to show
+COURIERWALA_READY = {
+    "results": rows_present("table", min_cells=2),
+    "no_data": text_present("body", "no data", "not found")
+}
+COURIERWALA_RESULT_TIMEOUT = 20
+
+def prepare_courierwala_form(driver):
+    """Load the tracking page and wait until the AWB field is ready to type into"""
+    driver.get("https://courierwalaexpress.in/track-shipment.html")
+    WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.ID, "txtawbno"))
+    )
+
+def get_courierwala_tracking_details(awb_number, driver, prepared=False):
     """
     Fetch detailed tracking information from Courier Wala website
+    prepared: the driver is already parked on the form (see warm_slots)
     Returns: dict with status, timeline, and other details
     """
     try:
         # Navigate to tracking page
-        driver.get("https://courierwalaexpress.in/track-shipment.html")
-        time.sleep(3)
+        if not prepared:
+            prepare_courierwala_form(driver)
         
         # Find and clear the input field using correct ID
-        tracking_input = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.ID, "txtawbno"))
-        )
+        tracking_input = driver.find_element(By.ID, "txtawbno")
         tracking_input.clear()
         tracking_input.send_keys(str(awb_number))
         
@@ -29,157 +44,18 @@ def get_courierwala_tracking_details(awb_number, driver):
         track_button = driver.find_element(By.ID, "trackAwbNumber")
         track_button.click()
         
-        # Wait longer for results to load (similar to Atlantic)
-        time.sleep(7)
-        
-        # Try to wait for results table to be present
-        try:
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "table"))
-            )
-        except:
-            pass
-        
-        # Check for "No data found" or similar message
-        try:
-            page_text = driver.find_element(By.TAG_NAME, "body").text
-            if "no data" in page_text.lower() or "not found" in page_text.lower():
-                return {
-                    "awb": awb_number,
-                    "status": "Not Found",
-                    "booking_date": None,
-                    "consignee_name": None,
-                    "destination": None,
-                    "delivery_date_time": None,
-                    "receiver_name": None,
-                    "delivery_awb": None,
-                    "timeline": []
-                }
-        except:
-            pass
+        # Wait for the results table (or a 'no data' message), continuing
+        # anyway on timeout
+        wait_for(driver, COURIERWALA_READY, COURIERWALA_RESULT_TIMEOUT, provider='Courier Wala')
         
-        # Extract tracking details
-        tracking_data = {
-            "awb": awb_number,
-            "status": "Unknown",
-            "booking_date": None,
-            "consignee_name": None,
-            "destination": None,
-            "delivery_date_time": None,
-            "receiver_name": None,
-            "delivery_awb": None,
-            "timeline": []
-        }
-        
-        try:
-            time.sleep(1)
-            
-            # Check if there are any tables on the page
-            tables = driver.find_elements(By.TAG_NAME, "table")
-            
-            if not tables:
-                tracking_data["status"] = "No Tracking Data Available"
-                return tracking_data
-            
-            # Parse the main details table (first table with shipment info)
-            try:
-                # Find all table rows
-                all_rows = driver.find_elements(By.TAG_NAME, "tr")
-                
-                for row in all_rows:
-                    cells = row.find_elements(By.TAG_NAME, "td")
-                    
-                    if len(cells) == 2:
-                        label = cells[0].text.strip()
-                        value = cells[1].text.strip()
-                        
-                        if "AWB No" in label or "AWB No." in label:
-                            # This is the AWB confirmation
-                            pass
-                        elif "Booking Date" in label:
-                            tracking_data["booking_date"] = value
-                        elif "Consignee Name" in label:
-                            tracking_data["consignee_name"] = value
-                        elif "Destination" in label:
-                            tracking_data["destination"] = value
-                        elif "Status" in label:
-                            tracking_data["status"] = value
-                        elif "Delivery Date and Time" in label or "Delivery Date" in label:
-                            tracking_data["delivery_date_time"] = value
-                        elif "Receiver Name" in label:
-                            tracking_data["receiver_name"] = value
-                        elif "Delivery AWB" in label:
-                            tracking_data["delivery_awb"] = value
-                
-                # Find the timeline table (table with Date, Time, Location, Activity headers)
-                # Look for table rows with 4 columns
-                timeline_found = False
-                for row in all_rows:
-                    cells = row.find_elements(By.TAG_NAME, "td")
-                    
-                    if len(cells) == 4:
-                        date = cells[0].text.strip()
-                        time_val = cells[1].text.strip()
-                        location = cells[2].text.strip()
-                        activity = cells[3].text.strip()
-                        
-                        # Skip header row
-                        if date and date != "Date" and activity != "Activity":
-                            tracking_data["timeline"].append({
-                                "date": date,
-                                "time": time_val,
-                                "location": location,
-                                "activity": activity
-                            })
-                            timeline_found = True
-                
-                # If status wasn't found in the table but we have timeline, get it from latest activity
-                if tracking_data["status"] == "Unknown" and tracking_data["timeline"]:
-                    latest_activity = tracking_data["timeline"][0]["activity"].upper()
-                    
-                    if "DELIVERED" in latest_activity:
-                        tracking_data["status"] = "Delivered"
-                    elif "OUT FOR DELIVERY" in latest_activity:
-                        tracking_data["status"] = "Out for Delivery"
-                    elif "CUSTOMS" in latest_activity or "CUSTOM" in latest_activity:
-                        tracking_data["status"] = "In Customs"
-                    elif "TRANSIT" in latest_activity or "IN TRANSIT" in latest_activity:
-                        tracking_data["status"] = "In Transit"
-                    elif "RECEIVED" in latest_activity:
-                        tracking_data["status"] = "Received"
-                    elif "ARRIVAL" in latest_activity or "ARRIVED" in latest_activity:
-                        tracking_data["status"] = "Arrived at Hub"
-                    else:
-                        tracking_data["status"] = tracking_data["timeline"][0]["activity"]
-                
-                # If still no status but have destination
-                if tracking_data["status"] == "Unknown" and tracking_data["destination"]:
-                    tracking_data["status"] = "Tracking Data Available"
-                
-            except Exception as e:
-                print(f"   Warning: Error parsing tables - {str(e)[:100]}")
-                tracking_data["status"] = "Error Parsing Data"
-            
-            return tracking_data
-            
-        except Exception as e:
-            print(f"   Warning: Unexpected error - {str(e)[:100]}")
-            tracking_data["status"] = "Error Fetching Data"
-            return tracking_data
+        # Parse one snapshot of the page instead of querying each cell
+        # through WebDriver
+        return parse_courierwala(driver.page_source, awb_number) or \
+            courierwala_result(awb_number, "No Tracking Data Available")
     
     except Exception as e:
         print(f"   Error tracking AWB {awb_number}: {str(e)}")
-        return {
-            "awb": awb_number,
-            "status": f"Error: {str(e)[:50]}",
-            "booking_date": None,
-            "consignee_name": None,
-            "destination": None,
-            "delivery_date_time": None,
-            "receiver_name": None,
-            "delivery_awb": None,
-            "timeline": []
-        }
+        return courierwala_result(awb_number, f"Error: {str(e)[:50]}")
 
 def update_courierwala_tracking():
     """
@@ -1,155 +1,182 @@
 import pandas as pd
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.keys import Keys
 import time
 import json
+import os
 from datetime import datetime
+from wait_engine import wait_for, element_present, element_visible, element_hidden, text_present
+from browser_extract import extract_dhl, extract_dhl_many, ExtractionError, DHL_RESULT_CSS
+from tracking_parsers import parse_dhl_json_many
+from xhr_capture import xhr_capture
+from session_state import restore_session, save_session, record_banner
 
-def get_dhl_tracking_details(awb_number, driver):
+DHL_CHECKPOINTS_CSS = ".c-tracking-result--checkpoint, li.c-tracking-result--checkpoint, [class*='tracking-result--checkpoint']"
+DHL_EXPAND_CSS = "#c-tracking-result--checkpoints-dropdown-button, button[class*='checkpoints-dropdown']"
+
+# Result card rendered, or DHL reports the number as unknown
+DHL_READY = {
+    "results": element_present(".c-tracking-result--status-copy, [class*='status-copy'], " + DHL_CHECKPOINTS_CSS),
+    "no_data": text_present("[class*='tracking-result']", "not successful", "not found")
+}
+DHL_RESULT_TIMEOUT = 20
+# AWBs per page load for bulk lookups (the tracking page accepts a list)
+DHL_MAX_BATCH = int(os.getenv('DHL_MAX_BATCH', '10'))
+DHL_BANNER_CSS = "#onetrust-accept-btn-handler"
+# How long to wait for the cookie banner to appear; a tab restored with saved
+# consent only checks once
+DHL_BANNER_WAIT = 2
+
+def _dhl_result(awb_number, extracted=None):
+    """Tracking dict for one AWB from an extractor result (or an empty one)"""
+    tracking_data = {
+        "awb": awb_number,
+        "status": "Unknown",
+        "origin": None,
+        "destination": None,
+        "delivery_date": None,
+        "timeline": []
+    }
+    if extracted:
+        tracking_data["status"] = extracted["status"] or "Unknown"
+        tracking_data["origin"] = extracted["origin"]
+        tracking_data["destination"] = extracted["destination"]
+        tracking_data["timeline"] = extracted["events"]
+    return tracking_data
+
+def _accept_cookie_banner(driver, banner_wait):
     """
-    Fetch detailed tracking information from DHL website
-    Returns: dict with status, timeline, and other details
+    Accept the cookie banner if it shows up within ``banner_wait`` seconds;
+    once accepted, the consent is saved so later tabs and restarts don't
+    see it again
     """
+    shown = False
     try:
-        # Navigate directly to tracking results URL
-        tracking_url = f"https://www.dhl.com/in-en/home/tracking.html?tracking-id={awb_number}&submit=1"
-        driver.get(tracking_url)
-        
-        # Wait for page to load
-        time.sleep(5)
+        if wait_for(driver, {"banner": element_visible(DHL_BANNER_CSS)}, banner_wait):
+            shown = True
+            driver.find_element(By.CSS_SELECTOR, DHL_BANNER_CSS).click()
+            wait_for(driver, {"closed": element_hidden(DHL_BANNER_CSS)}, 2)
+            save_session(driver, 'DHL')
+    except:
+        pass # Cookie banner might not be there
+    record_banner('DHL', shown)
+
+def _expand_checkpoints(driver):
+    """Click every "All Shipment Updates" button and wait for the extra checkpoints"""
+    try:
+        # Scroll down a bit
+        driver.execute_script("window.scrollBy(0, 500);")
         
-        # 1. Handle Cookie Banner (if present)
-        try:
-            accept_cookies = WebDriverWait(driver, 5).until(
-                EC.element_to_be_clickable((By.ID, "onetrust-accept-btn-handler"))
-            )
-            accept_cookies.click()
-            time.sleep(1)
-        except:
-            pass # Cookie banner might not be there
-            
-        # 2. Try to expand "All Shipment Updates"
-        try:
-            # Scroll down a bit
-            driver.execute_script("window.scrollBy(0, 500);")
-            time.sleep(1)
-            
-            expand_button = WebDriverWait(driver, 5).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "#c-tracking-result--checkpoints-dropdown-button, button[class*='checkpoints-dropdown']"))
-            )
-            driver.execute_script("arguments[0].click();", expand_button) 
-            time.sleep(2)
-        except:
-            # Button might not exist or timeline already expanded
-            pass
+        expand_buttons = driver.find_elements(By.CSS_SELECTOR, DHL_EXPAND_CSS)
+        if expand_buttons:
+            shown = len(driver.find_elements(By.CSS_SELECTOR, DHL_CHECKPOINTS_CSS))
+            driver.execute_script("arguments[0].forEach(button => button.click());", expand_buttons)
+            wait_for(driver, {
+                "expanded": lambda d: len(d.find_elements(By.CSS_SELECTOR, DHL_CHECKPOINTS_CSS)) > shown
+            }, 5)
+    except:
+        # Button might not exist or timeline already expanded
+        pass
 
-        # Extract tracking details
-        tracking_data = {
-            "awb": awb_number,
-            "status": "Unknown",
-            "origin": None,
-            "destination": None,
-            "delivery_date": None,
-            "timeline": []
-        }
+def _dhl_from_page(driver, awb_number, banner_wait=DHL_BANNER_WAIT):
+    """Read DHL's rendered result card (the fallback when no XHR payload was captured)"""
+    # Wait for the result card (or DHL's not-found message)
+    wait_for(driver, DHL_READY, DHL_RESULT_TIMEOUT, provider='DHL')
+    
+    # 1. Handle Cookie Banner (if present)
+    _accept_cookie_banner(driver, banner_wait)
+        
+    # 2. Try to expand "All Shipment Updates"
+    _expand_checkpoints(driver)
 
-        # 3. Extract Status (Specific Selectors)
-        try:
-            # Primary status selector
-            status_element = driver.find_element(By.CSS_SELECTOR, ".c-tracking-result--status-copy h3, .c-tracking-result--status-copy h2, [class*='status-copy']")
-            tracking_data["status"] = status_element.text.strip()
-        except:
-            # Fallback parsing
-            try:
-                # Look for bold text or headers that contain status words
-                headers = driver.find_elements(By.CSS_SELECTOR, "h2, h3, h4")
-                for h in headers:
-                    txt = h.text.lower()
-                    if any(x in txt for x in ['delivered', 'transit', 'shipment picked up', 'returned', 'arrived']):
-                         if len(h.text) < 50:
-                            tracking_data["status"] = h.text.strip()
-                            break
-            except:
-                pass
+    # 3. Extract status, origin/destination and checkpoint events in
+    # one script call (checkpoint cards read date/time, activity, location)
+    try:
+        return _dhl_result(awb_number, extract_dhl(driver, DHL_CHECKPOINTS_CSS))
+    except ExtractionError as e:
+        print(f"   Warning: DHL extraction - {str(e)[:100]}")
+    return _dhl_result(awb_number)
 
-        # 4. Extract Origin/Destination/Date
-        try:
-            # These are often in a summary list
-            summary_items = driver.find_elements(By.CSS_SELECTOR, ".c-tracking-result--summary-content dl div, .c-tracking-result--summary-content p")
-            for item in summary_items:
-                text = item.text
-                if "Origin" in text:
-                    tracking_data["origin"] = text.replace("Origin", "").replace(":", "").strip()
-                elif "Destination" in text:
-                    tracking_data["destination"] = text.replace("Destination", "").replace(":", "").strip()
-        except:
-            pass
-            
-        # 5. Extract Timeline Events (Specific Selectors)
-        try:
-            # Timeline items
-            checkpoints = driver.find_elements(By.CSS_SELECTOR, ".c-tracking-result--checkpoint, li.c-tracking-result--checkpoint, [class*='tracking-result--checkpoint']")
-            
-            for checkpoint in checkpoints:
-                try:
-                    # Parse individual event 
-                    full_text = checkpoint.text.split('\n')
-                    
-                    if len(full_text) >= 2:
-                        event = {
-                            "date_time": full_text[0] if len(full_text) > 0 else "", 
-                            "activity": full_text[1] if len(full_text) > 1 else "",
-                            "location": full_text[2] if len(full_text) > 2 else ""
-                        }
-                        tracking_data["timeline"].append(event)
-                except:
-                    continue
-        except:
-            pass
+def _dhl_many_from_page(driver, awb_numbers, banner_wait=DHL_BANNER_WAIT):
+    """Read one result card per AWB off a multi-number results page"""
+    # Wait for a card per AWB (or DHL's not-found message)
+    wait_for(driver, {
+        "results": lambda d: len(d.find_elements(By.CSS_SELECTOR, DHL_RESULT_CSS)) >= len(awb_numbers),
+        "no_data": DHL_READY["no_data"]
+    }, DHL_RESULT_TIMEOUT, provider='DHL')
+    
+    _accept_cookie_banner(driver, banner_wait)
+    _expand_checkpoints(driver)
+    
+    try:
+        extracted = extract_dhl_many(driver, awb_numbers, DHL_CHECKPOINTS_CSS)
+    except ExtractionError as e:
+        print(f"   Warning: DHL extraction - {str(e)[:100]}")
+        return {}
+    return {awb: _dhl_result(awb, data) for awb, data in extracted.items()}
 
-        # Determine status from timeline if not already set or empty
-        # Improved logic to check all events for 'Delivered'
-        if (tracking_data["status"] == "Unknown" or not tracking_data["status"]) and tracking_data["timeline"]:
-            # Check all timeline events for delivered status first
-            is_delivered = False
-            for event in tracking_data["timeline"]:
-                # Check both activity and date_time fields as sometimes they get swapped in parsing
-                text_to_check = (str(event.get("activity", "")) + " " + str(event.get("date_time", ""))).upper()
-                if "DELIVERED" in text_to_check:
-                    tracking_data["status"] = "Delivered"
-                    is_delivered = True
-                    break
+def _infer_dhl_status(tracking_data):
+    """Fill in a missing status from the timeline (or the destination)"""
+    # Determine status from timeline if not already set or empty
+    # Improved logic to check all events for 'Delivered'
+    if (tracking_data["status"] == "Unknown" or not tracking_data["status"]) and tracking_data["timeline"]:
+        # Check all timeline events for delivered status first
+        is_delivered = False
+        for event in tracking_data["timeline"]:
+            # Check both activity and date_time fields as sometimes they get swapped in parsing
+            text_to_check = (str(event.get("activity", "")) + " " + str(event.get("date_time", ""))).upper()
+            if "DELIVERED" in text_to_check:
+                tracking_data["status"] = "Delivered"
+                is_delivered = True
+                break
+        
+        if not is_delivered:
+            # If not delivered, take the latest activity
+            latest_event = tracking_data["timeline"][0]
+            latest_text = (str(latest_event.get("activity", "")) + " " + str(latest_event.get("date_time", ""))).upper()
             
-            if not is_delivered:
-                # If not delivered, take the latest activity
-                latest_event = tracking_data["timeline"][0]
-                latest_text = (str(latest_event.get("activity", "")) + " " + str(latest_event.get("date_time", ""))).upper()
-                
-                if "TRANSIT" in latest_text or "DEPARTED" in latest_text:
-                    tracking_data["status"] = "In Transit"
-                elif "PICKED" in latest_text or "COLLECTED" in latest_text:
-                    tracking_data["status"] = "Picked Up"
-                elif "CUSTOMS" in latest_text:
-                    tracking_data["status"] = "In Customs"
-                elif "ARRIVED" in latest_text:
-                    tracking_data["status"] = "Arrived at Facility"
+            if "TRANSIT" in latest_text or "DEPARTED" in latest_text:
+                tracking_data["status"] = "In Transit"
+            elif "PICKED" in latest_text or "COLLECTED" in latest_text:
+                tracking_data["status"] = "Picked Up"
+            elif "CUSTOMS" in latest_text:
+                tracking_data["status"] = "In Customs"
+            elif "ARRIVED" in latest_text:
+                tracking_data["status"] = "Arrived at Facility"
+            else:
+                # Use the activity text itself if it's reasonable length
+                activity_text = latest_event.get("activity", "")
+                if activity_text and len(activity_text) < 50:
+                    tracking_data["status"] = activity_text
                 else:
-                    # Use the activity text itself if it's reasonable length
-                    activity_text = latest_event.get("activity", "")
-                    if activity_text and len(activity_text) < 50:
-                        tracking_data["status"] = activity_text
-                    else:
-                            tracking_data["status"] = "In Transit" # Default fallback if we have timeline data
+                        tracking_data["status"] = "In Transit" # Default fallback if we have timeline data
+    
+    # If still no status but have destination
+    if (tracking_data["status"] == "Unknown" or not tracking_data["status"]) and tracking_data["destination"]:
+        tracking_data["status"] = "Tracking Data Available"
         
-        # If still no status but have destination
-        if (tracking_data["status"] == "Unknown" or not tracking_data["status"]) and tracking_data["destination"]:
-            tracking_data["status"] = "Tracking Data Available"
-            
-        return tracking_data
+    return tracking_data
+
+def get_dhl_tracking_details(awb_number, driver):
+    """
+    Fetch detailed tracking information from DHL website
+    Returns: dict with status, timeline, and other details
+    """
+    try:
+        # Navigate directly to tracking results URL
+        tracking_url = f"https://www.dhl.com/in-en/home/tracking.html?tracking-id={awb_number}&submit=1"
+
+        # With XHR capture on, the shipment JSON the page loads is parsed
+        # directly; otherwise (or if it can't be read) the rendered card is
+        restored = restore_session(driver, 'DHL')
+        capture = xhr_capture(driver, 'DHL')
+        driver.get(tracking_url)
+        tracking_data = (capture and capture.result(awb_number)) or \
+            _dhl_from_page(driver, awb_number, banner_wait=0 if restored else DHL_BANNER_WAIT)
+
+        return _infer_dhl_status(tracking_data)
 
     except Exception as e:
         print(f"   Error tracking AWB {awb_number}: {str(e)[:100]}")
@@ -162,6 +189,33 @@ def get_dhl_tracking_details(awb_number, driver):
             "timeline": []
         }
 
+def get_dhl_tracking_many(awb_numbers, driver):
+    """
+    Track up to DHL_MAX_BATCH AWBs with one page load: DHL's tracking URL
+    takes a comma-separated list and shows a result card per shipment.
+    Returns: {awb: tracking dict}; AWBs DHL showed nothing for are left
+    out, for the caller to look up one at a time
+    """
+    awbs = [str(awb).strip() for awb in awb_numbers]
+    if len(awbs) == 1:
+        return {awbs[0]: get_dhl_tracking_details(awbs[0], driver)}
+
+    try:
+        tracking_url = f"https://www.dhl.com/in-en/home/tracking.html?tracking-id={','.join(awbs)}&submit=1"
+
+        restored = restore_session(driver, 'DHL')
+        capture = xhr_capture(driver, 'DHL')
+        driver.get(tracking_url)
+        results = (capture and capture.result(awbs, parse=parse_dhl_json_many)) or \
+            _dhl_many_from_page(driver, awbs, banner_wait=0 if restored else DHL_BANNER_WAIT)
+
+        print(f"   DHL: {len(results)}/{len(awbs)} AWBs from one page load")
+        return {awb: _infer_dhl_status(data) for awb, data in results.items()}
+
+    except Exception as e:
+        print(f"   Error tracking {len(awbs)} DHL AWBs: {str(e)[:100]}")
+        return {}
+
 def update_dhl_tracking():
     """
     Main function to update DHL tracking data
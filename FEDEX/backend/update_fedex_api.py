@@ -1,7 +1,7 @@
 import pandas as pd
 import os
-import time
 from fedex_service import FedExTrackingService
+from fedex_api.rate_limit import fedex_limiter
 
 # CONFIGURATION
 # Using credentials provided by user
@@ -64,8 +64,8 @@ def process_excel_tracking(file_path):
     # 3. Initialize Service
     service = FedExTrackingService(CLIENT_ID, CLIENT_SECRET, env=FEDEX_ENV)
 
-    # 4. Batch Process
-    BATCH_SIZE = 10 
+    # 4. Batch Process (pace is set by the shared FedEx rate limiter)
+    BATCH_SIZE = 50
     
     for i in range(0, total_pending, BATCH_SIZE):
         batch_indices = pending_indices[i : i + BATCH_SIZE]
@@ -73,7 +73,7 @@ def process_excel_tracking(file_path):
         
         print(f"🔄 Processing batch {i//BATCH_SIZE + 1} ({len(batch_awbs)} items)...")
         
-        results = service.track_batch(batch_awbs, max_workers=5)
+        results = service.track_batch(batch_awbs)
         
         # Update DataFrame
         for res in results:
@@ -103,10 +103,10 @@ def process_excel_tracking(file_path):
             print("💾 Saved progress.")
         except Exception as e:
             print(f"⚠️ Save Error: {e}")
-            
-        # Rate limit safety
-        time.sleep(1)
 
+    pace = fedex_limiter.stats()
+    print(f"📈 FedEx API: {pace['rate']} req/s, {pace['concurrency']} in flight, "
+          f"{pace['throttled']} throttled of {pace['calls']} calls")
     print("✅ Tracking Run Complete.")
 
 if __name__ == "__main__":
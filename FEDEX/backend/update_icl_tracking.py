@@ -8,59 +8,100 @@ import time
 import json
 from datetime import datetime
 import traceback
-import io
 import os
-import re
+from wait_engine import wait_for, document_ready, table_with_text, text_present
+from tracking_parsers import parse_icl
+from xhr_capture import xhr_capture
+from session_state import restore_session, save_session, record_banner
 
-def get_icl_tracking_details(awb_number, driver):
+ICL_POPUP_CLOSE_SELECTORS = [
+    "//div[contains(@class, 'dialog-close-button')]",
+    "//button[contains(@class, 'dialog-close')]",
+    "//div[contains(@class, 'elementor-popup-modal')]//i[contains(@class, 'eicon-close')]",
+    "//button[@aria-label='Close']"
+]
+
+# Timeline table rendered, or the site rejected the AWB
+ICL_READY = {
+    "results": table_with_text("status"),
+    "no_data": text_present("body", "invalid", "not found")
+}
+ICL_RESULT_TIMEOUT = 20
+
+
+def _popup_visible(driver):
+    return any(
+        el.is_displayed()
+        for selector in ICL_POPUP_CLOSE_SELECTORS
+        for el in driver.find_elements(By.XPATH, selector)
+    )
+
+def _dismiss_popups(driver):
     """
-    Fetch detailed tracking information from ICL Express International
+    Close the first visible popup/modal that might be blocking interactions,
+    saving the site state afterwards so the popup stays dismissed
+    Returns: True if a popup was closed
     """
+    closed = False
     try:
-        # Navigate to tracking page
-        driver.get("https://iclexpress.in/tracking/")
-        time.sleep(3)
-        
-        # 0. Dismiss any popups/modals that might be blocking interactions
-        try:
-            # Try to find and close any popup/modal
-            popup_close_selectors = [
-                "//div[contains(@class, 'dialog-close-button')]",
-                "//button[contains(@class, 'dialog-close')]",
-                "//div[contains(@class, 'elementor-popup-modal')]//i[contains(@class, 'eicon-close')]",
-                "//button[@aria-label='Close']"
-            ]
-            for selector in popup_close_selectors:
-                try:
-                    close_btn = driver.find_element(By.XPATH, selector)
-                    if close_btn.is_displayed():
-                        close_btn.click()
-                        print("✓ Closed popup/modal")
-                        time.sleep(1)
-                        break
-                except:
-                    continue
-        except:
-            pass  # No popup found, continue
-        
-        # 1. Click International Tab - CRITICAL STEP
-        try:
-            # First, try clicking by the exact ID discovered from browser inspection
-            intl_tab = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.ID, "elementor-tab-title-9352"))
-            )
-            intl_tab.click()
-            print("✓ Clicked International tab")
-            time.sleep(2)  # Wait for tab content to load
-        except Exception as e:
-            print(f"Warning: Could not click International tab: {e}")
-            # Try alternative method
+        for selector in ICL_POPUP_CLOSE_SELECTORS:
             try:
-                driver.execute_script("document.getElementById('elementor-tab-title-9352').click();")
-                time.sleep(2)
-                print("✓ Clicked International tab via JavaScript")
+                close_btn = driver.find_element(By.XPATH, selector)
+                if close_btn.is_displayed():
+                    close_btn.click()
+                    print("✓ Closed popup/modal")
+                    wait_for(driver, {"closed": lambda d: not _popup_visible(d)}, 2)
+                    closed = True
+                    break
             except:
-                print("⚠️ Could not switch to International tab - proceeding anyway")
+                continue
+    except:
+        pass  # No popup found, continue
+    if closed:
+        save_session(driver, 'ICL')
+    return closed
+
+def prepare_icl_form(driver):
+    """
+    Load the tracking page, dismiss popups and switch to the International
+    tab, leaving the AWB field ready to type into
+    """
+    restore_session(driver, 'ICL')
+    driver.get("https://iclexpress.in/tracking/")
+    wait_for(driver, {"loaded": document_ready}, 10)
+    
+    # 0. Dismiss any popups/modals that might be blocking interactions
+    record_banner('ICL', _dismiss_popups(driver))
+    
+    # 1. Click International Tab - CRITICAL STEP
+    try:
+        # First, try clicking by the exact ID discovered from browser inspection
+        intl_tab = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.ID, "elementor-tab-title-9352"))
+        )
+        intl_tab.click()
+        print("✓ Clicked International tab")
+    except Exception as e:
+        print(f"Warning: Could not click International tab: {e}")
+        # Try alternative method
+        try:
+            driver.execute_script("document.getElementById('elementor-tab-title-9352').click();")
+            print("✓ Clicked International tab via JavaScript")
+        except:
+            print("⚠️ Could not switch to International tab - proceeding anyway")
+
+def get_icl_tracking_details(awb_number, driver, prepared=False):
+    """
+    Fetch detailed tracking information from ICL Express International
+    prepared: the driver is already parked on the International tab form
+    (see warm_slots)
+    """
+    try:
+        if prepared:
+            # Popups can open on a timer while the tab is parked
+            record_banner('ICL', _popup_visible(driver) and _dismiss_popups(driver))
+        else:
+            prepare_icl_form(driver)
 
         # 2. Input AWB into the International tracking field
         try:
@@ -71,12 +112,13 @@ def get_icl_tracking_details(awb_number, driver):
             awb_input.clear()
             awb_input.send_keys(str(awb_number))
             print(f"✓ Entered AWB: {awb_number}")
-            time.sleep(1)
         except Exception as e:
             print(f"Could not find AWB input field: {e}")
             return {"awb": awb_number, "status": "Error Input", "origin": None, "destination": None, "timeline": []}
 
-        # 3. Click Track Button
+        # 3. Click Track Button (trackShipment() fetches the results in the
+        # background; with XHR capture on, that response is read directly)
+        capture = xhr_capture(driver, 'ICL')
         try:
             # The button is next to the input field and has onclick="trackShipment()"
             # Try multiple strategies to find and click it
@@ -119,92 +161,20 @@ def get_icl_tracking_details(awb_number, driver):
             print(f"Could not find Track button: {e}")
             return {"awb": awb_number, "status": "Error Button", "origin": None, "destination": None, "timeline": []}
             
-        # Wait for results
-        time.sleep(6)
+        if capture:
+            captured = capture.result(awb_number)
+            if captured:
+                return captured
         
-        tracking_data = {
-            "awb": awb_number,
-            "status": "Unknown",
-            "origin": None,
-            "destination": None,
-            "timeline": []
-        }
+        # Wait for the results table (or an error message)
+        wait_for(driver, ICL_READY, ICL_RESULT_TIMEOUT, provider='ICL')
         
-        # 4. Extract Results
+        # 4. Extract results from one snapshot of the page
         try:
-            html = driver.page_source
-            
-            # Check for error msg
-            if "Invalid" in html or "Not Found" in html:
-                 tracking_data["status"] = "Not Found"
-            
-            dfs = pd.read_html(io.StringIO(html))
-            
-            for df in dfs:
-                df.columns = [str(c).strip() for c in df.columns]
-                col_names = [c.upper() for c in df.columns]
-                
-                # Check for Date in Header (e.g., "28/08/2025 Status")
-                current_date = ""
-                # Look for date pattern in the first column name
-                date_match = re.search(r'\d{1,2}[/-]\d{1,2}[/-]\d{4}', df.columns[0])
-                if date_match:
-                    current_date = date_match.group(0)
-                
-                # Identify columns
-                status_col = None
-                location_col = None
-                time_col = None
-                
-                for i, col in enumerate(col_names):
-                    if "STATUS" in col: status_col = df.columns[i]
-                    if "LOCATION" in col: location_col = df.columns[i]
-                    if "TIME" in col: time_col = df.columns[i]
-                
-                # Only process if we found meaningful columns
-                if status_col:
-                    for _, row in df.iterrows():
-                        activity = str(row[status_col]).strip()
-                        location = str(row[location_col]).strip() if location_col and pd.notna(row[location_col]) else ""
-                        time_val = str(row[time_col]).strip() if time_col and pd.notna(row[time_col]) else ""
-                        
-                        full_date = f"{current_date} {time_val}".strip()
-                        
-                        if activity and activity.lower() != "nan" and activity.upper() != "STATUS":
-                            tracking_data["timeline"].append({
-                                "date_time": full_date,
-                                "activity": activity,
-                                "location": location
-                            })
-
-            # Determine main status
-            if tracking_data["timeline"]:
-                if any("DELIVERED" in t["activity"].upper() for t in tracking_data["timeline"]):
-                    tracking_data["status"] = "Delivered"
-                else:
-                    tracking_data["status"] = tracking_data["timeline"][0]["activity"]
-                
-                # Extract origin and destination from timeline
-                # Origin: earliest event (last in timeline if sorted newest first)
-                # Destination: latest event (first in timeline if sorted newest first)
-                
-                # Get destination from the first event with a location
-                for event in tracking_data["timeline"]:
-                    if event.get("location") and event["location"].strip():
-                        tracking_data["destination"] = event["location"]
-                        break
-                
-                # Get origin from the last event with a location
-                for event in reversed(tracking_data["timeline"]):
-                    if event.get("location") and event["location"].strip():
-                        tracking_data["origin"] = event["location"]
-                        break
-                    
+            return parse_icl(driver.page_source, awb_number)
         except Exception as e:
-            # print(f"Error parsing table: {e}")
-            pass
-            
-        return tracking_data
+            print(f"   Warning parsing ICL tables: {e}")
+            return {"awb": awb_number, "status": "Unknown", "origin": None, "destination": None, "timeline": []}
 
     except Exception as e:
         print(f"Global Error: {e}")
@@ -7,33 +7,67 @@ from selenium.webdriver.chrome.options import Options
 import time
 import json
 from datetime import datetime
-import io
+from wait_engine import wait_for, table_with_text, any_of, page_replaced
+from tracking_parsers import parse_pxc
+from xhr_capture import xhr_capture
 
-def get_pxc_tracking_details(awb_number, driver):
+# Summary or timeline table rendered
+PXC_RESULTS = any_of(
+    table_with_text("origin", "destination"),
+    table_with_text("date", "location"),
+    table_with_text("date", "status")
+)
+PXC_RESULT_TIMEOUT = 20
+
+def prepare_pxc_form(driver):
+    """Load the tracking page and wait until the AWB field is ready to type into"""
+    driver.get("https://www.pacificexp.net/tracking-details.html")
+    WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.ID, "Tracking1_txtAwb"))
+    )
+
+def get_pxc_tracking_details(awb_number, driver, prepared=False):
     """
     Fetch detailed tracking information from PXC Pacific website
+    prepared: the driver is already parked on the form (see warm_slots)
     Returns: dict with status, timeline, and other details
     """
     try:
         # Navigate to tracking page
-        driver.get("https://www.pacificexp.net/tracking-details.html")
-        time.sleep(3)
+        if not prepared:
+            prepare_pxc_form(driver)
         
         # input field
-        tracking_input = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.ID, "Tracking1_txtAwb"))
-        )
+        tracking_input = driver.find_element(By.ID, "Tracking1_txtAwb")
         tracking_input.clear()
         tracking_input.send_keys(str(awb_number))
         
-        # Click track button
+        # The form posts back, so a freshly loaded page also means the
+        # response is in (found or not)
+        ready = {"results": PXC_RESULTS, "reloaded": page_replaced(driver)}
+        
+        # Click track button; with XHR capture on, the post-back response
+        # is parsed as soon as it arrives, before the page renders it
+        capture = xhr_capture(driver, 'PXC Pacific')
         track_button = driver.find_element(By.CSS_SELECTOR, "button.track-button.show")
         track_button.click()
         
-        # Wait for results to load - increase wait time
-        time.sleep(8)
+        if capture:
+            captured = capture.result(awb_number)
+            if captured:
+                return captured
         
-        tracking_data = {
+        wait_for(driver, ready, PXC_RESULT_TIMEOUT, provider='PXC Pacific')
+        
+        # Parse one snapshot of the page with lxml
+        try:
+            parsed = parse_pxc(driver.page_source, awb_number)
+            if parsed:
+                return parsed
+        except Exception as e:
+            print(f"   Warning parsing PXC tables: {e}")
+            
+        return {
             "awb": awb_number,
             "status": "Unknown",
             "origin": None,
@@ -42,94 +76,6 @@ def get_pxc_tracking_details(awb_number, driver):
             "timeline": []
         }
         
-        # Improved parsing using pandas read_html
-        try:
-            # Get table HTMLs
-            dfs = pd.read_html(io.StringIO(driver.page_source))
-            
-            if dfs:
-                print(f"   Found {len(dfs)} tables.")
-                
-                # Check each table
-                for df in dfs:
-                    # Convert to string to search easily
-                    table_str = df.to_string().upper()
-                    
-                    # 1. Check for Summary Table (has Origin, Dest, Status)
-                    if "ORIGIN" in table_str and "DESTINATION" in table_str:
-                        # Iterate rows to find values
-                        # Usually Key-Value pairs or specific columns
-                        # Let's simple search for keywords in columns
-                        for col in df.columns:
-                            for idx, val in enumerate(df[col]):
-                                val_str = str(val).upper()
-                                if "STATUS" in val_str:
-                                    # Value might be in next column
-                                    if idx + 1 < len(df.columns): # next col same row? no, logic is hard with df
-                                        pass
-                        
-                        # Simpler: Iterate values
-                        # Assuming key is in one cell, value in next or same row
-                        # PXC table likely: Headers in first row?
-                        if "STATUS" in str(df.columns).upper():
-                           # Column header is status
-                           tracking_data["status"] = str(df.iloc[0]['Status']) if 'Status' in df.columns else "Unknown"
-
-                        # Let's try row iteration for key-value
-                        for i, row in df.iterrows():
-                            row_str = " ".join([str(x) for x in row.values]).upper()
-                            if "STATUS" in row_str:
-                                # Try to find the status value
-                                parts = row_str.split("STATUS")
-                                if len(parts) > 1:
-                                    candidate = parts[1].replace(":","").strip().split(" ")[0] # Grab first word/phrase?
-                                    # Actually better to rely on timeline if summary fails
-                                    pass
-
-                    # 2. Check for Timeline Table
-                    if "DATE" in table_str and ("LOCATION" in table_str or "ACTIVITY" in table_str or "STATUS" in table_str):
-                        # This is likely the timeline
-                        # Rename cols to standard if possible
-                        df.columns = [str(c).upper().strip() for c in df.columns]
-                        
-                        # Map columns
-                        date_col = next((c for c in df.columns if "DATE" in c), None)
-                        status_col = next((c for c in df.columns if "STATUS" in c or "ACTIVITY" in c), None)
-                        loc_col = next((c for c in df.columns if "LOCATION" in c or "ORIGIN" in c), None)
-                        
-                        if date_col and status_col:
-                            for _, row in df.iterrows():
-                                event = {
-                                    "date_time": str(row[date_col]),
-                                    "activity": str(row[status_col]),
-                                    "location": str(row[loc_col]) if loc_col else ""
-                                }
-                                tracking_data["timeline"].append(event)
-
-            # Fallback to manual text parsing if tables failed or empty
-            if not tracking_data["timeline"]:
-                # Try raw text regex/splitting
-                pass
-
-            # Determine status from timeline
-            if tracking_data["timeline"]:
-                # Latest event is usually first? Or last? PXC typically Newest First.
-                # Let's check dates to be sure? No, usually ordered.
-                # Assuming first row is latest.
-                
-                latest_event = tracking_data["timeline"][0]
-                latest_status = latest_event['activity'].upper()
-                
-                if "DELIVERED" in latest_status:
-                    tracking_data["status"] = "Delivered"
-                else:
-                    tracking_data["status"] = latest_event['activity']
-                    
-        except Exception as e:
-            print(f"   Warning parsing PXC tables with pandas: {e}")
-            
-        return tracking_data
-        
     except Exception as e:
         print(f"   Error tracking AWB {awb_number}: {str(e)[:100]}")
         return {
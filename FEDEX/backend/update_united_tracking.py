@@ -11,11 +11,28 @@ from datetime import datetime
 import traceback
 import os
 import io
+from wait_engine import wait_for, element_present, table_with_text, any_of, page_replaced
+from tracking_parsers import parse_united
 
-def get_united_tracking_details(awb_number, driver):
+# Summary table or history table rendered
+UNITED_RESULTS = any_of(
+    element_present("table:nth-of-type(1) tr:nth-child(4) td:nth-child(2)"),
+    table_with_text("date", "activity")
+)
+UNITED_RESULT_TIMEOUT = 15
+
+def prepare_united_form(driver):
+    """Load the homepage and wait until the AWB field is ready to type into"""
+    driver.get("https://unitedexpress.in/index")
+    WebDriverWait(driver, 10).until(
+        EC.visibility_of_element_located((By.ID, "tawbno"))
+    )
+
+def get_united_tracking_details(awb_number, driver, prepared=False):
     """
     Fetch tracking info from United Express
     URL: https://unitedexpress.in/index
+    prepared: the driver is already parked on the form (see warm_slots)
     """
     tracking_data = {
         "awb": awb_number,
@@ -27,105 +44,32 @@ def get_united_tracking_details(awb_number, driver):
     }
 
     try:
-        # Navigate to homepage
-        driver.get("https://unitedexpress.in/index")
-        
         # 1. Enter AWB
         try:
-            input_field = WebDriverWait(driver, 10).until(
-                EC.visibility_of_element_located((By.ID, "tawbno"))
-            )
+            if not prepared:
+                prepare_united_form(driver)
+            input_field = driver.find_element(By.ID, "tawbno")
             input_field.clear()
             input_field.send_keys(str(awb_number))
             
-            # 2. Click Track
+            # 2. Click Track (the form submits to a results page, so a fresh
+            # document also means the response is in)
+            ready = {"results": UNITED_RESULTS, "reloaded": page_replaced(driver)}
             track_btn = driver.find_element(By.CSS_SELECTOR, "button.tbt")
             driver.execute_script("arguments[0].click();", track_btn) # Force click
             
             # Wait for results
-            time.sleep(4)
+            wait_for(driver, ready, UNITED_RESULT_TIMEOUT, provider='United Express')
             
         except Exception as e:
             print(f"Error submitting form: {e}")
             return tracking_data
 
-        # 3. Extract Details
+        # 3. Extract details from one snapshot of the results page
         try:
-            # === Extract Main Status ===
-            # Status is often in the first table, row 4
-            # Selector: table:nth-of-type(1) tr:nth-child(4) td:nth-child(2)
-            try:
-                status_el = driver.find_element(By.CSS_SELECTOR, "table:nth-of-type(1) tr:nth-child(4) td:nth-child(2)")
-                if status_el:
-                    tracking_data["status"] = status_el.text.strip().title()
-            except: pass
-
-            # === Extract Delivery Date ===
-            # Selector: table:nth-of-type(1) tr:nth-child(3) td:nth-child(2)
-            try:
-                date_el = driver.find_element(By.CSS_SELECTOR, "table:nth-of-type(1) tr:nth-child(3) td:nth-child(2)")
-                if date_el:
-                    tracking_data["delivery_date"] = date_el.text.strip()
-            except: pass
-
-            # === Extract Origin ===
-            # Try finding .order-1 h5
-            try:
-                origin_el = driver.find_element(By.CSS_SELECTOR, ".order-1 h5")
-                if origin_el:
-                    tracking_data["origin"] = origin_el.text.strip()
-            except: pass
-
-            # === Extract Destination ===
-            # Try finding .order-3 h5
-            try:
-                dest_el = driver.find_element(By.CSS_SELECTOR, ".order-3 h5")
-                if dest_el:
-                    tracking_data["destination"] = dest_el.text.strip()
-            except: pass
-
-            # === Extract Timeline (History) ===
-            try:
-                # Find all tables
-                tables = driver.find_elements(By.TAG_NAME, "table")
-                history_table = None
-                
-                # Look for the specific table with correct headers
-                for tbl in tables:
-                    try:
-                        header_text = tbl.text.lower()
-                        if "date" in header_text and "activity" in header_text:
-                            history_table = tbl
-                            break
-                    except: continue
-                
-                if history_table:
-                    # Get all rows
-                    rows = history_table.find_elements(By.TAG_NAME, "tr")
-                    
-                    for row in rows:
-                        cols = row.find_elements(By.TAG_NAME, "td")
-                        # We expect 3 columns: Date/Time, Activity, Location
-                        if len(cols) == 3:
-                            col_texts = [c.text.strip() for c in cols]
-                            
-                            # Skip header row if it contains "Date" or "Activity"
-                            if "activity" in col_texts[1].lower():
-                                continue
-                                
-                            evt = {
-                                "date_time": col_texts[0],
-                                "activity": col_texts[1],
-                                "location": col_texts[2]
-                            }
-                            
-                            # clean up empty events
-                            if evt["activity"]:
-                                tracking_data["timeline"].append(evt)
-                                
-            except Exception as e:
-                print(f"Error parsing timeline table: {e}")
-            
+            parsed = parse_united(driver.page_source, awb_number)
+            if parsed:
+                tracking_data = parsed
         except Exception as e:
             print(f"Error parsing results: {e}")
 
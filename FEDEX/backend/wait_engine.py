@@ -0,0 +1,250 @@
+"""
+Wait Engine
+Condition-based waits for provider pages: readiness predicates are polled
+at a fine interval until one matches or a hard deadline passes
+"""
+
+import os
+import threading
+import time
+
+from selenium.common.exceptions import StaleElementReferenceException, WebDriverException
+from selenium.webdriver.common.by import By
+
+WAIT_POLL_INTERVAL = float(os.getenv('WAIT_POLL_INTERVAL', '0.1'))
+
+# Fixed sleeps each scraper used to spend waiting for results (seconds),
+# kept so the latency report can show what the condition waits save
+LEGACY_WAIT_BUDGETS = {
+    'Atlantic': 2 + 7 + 1,
+    'Courier Wala': 3 + 7 + 1,
+    'PXC Pacific': 3 + 8,
+    'ICL': 3 + 2 + 1 + 6,
+    'United Express': 4,
+    'DHL': 5 + 1 + 1 + 2,
+    'FedEx': 15
+}
+
+
+class WaitStats:
+    """Per-provider record of how long condition waits actually took"""
+
+    def __init__(self, max_samples=500):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._providers = {}
+
+    def record(self, provider, elapsed, matched):
+        with self._lock:
+            entry = self._providers.setdefault(provider, {"samples": [], "matched": {}, "timeouts": 0})
+            entry["samples"].append(elapsed)
+            del entry["samples"][:-self.max_samples]
+            if matched is None:
+                entry["timeouts"] += 1
+            else:
+                entry["matched"][matched] = entry["matched"].get(matched, 0) + 1
+
+    def report(self):
+        """
+        Old fixed-sleep budget vs observed condition-wait latency per provider.
+
+        Returns:
+            dict: provider -> waits, timeouts, matched (counts per
+            condition), mean/p95/max seconds, legacy_fixed_wait and
+            saved_per_wait (mean seconds saved against the old sleeps)
+        """
+        with self._lock:
+            report = {}
+            for provider, entry in self._providers.items():
+                samples = sorted(entry["samples"])
+                if not samples:
+                    continue
+                mean = sum(samples) / len(samples)
+                legacy = LEGACY_WAIT_BUDGETS.get(provider)
+                report[provider] = {
+                    "waits": len(samples),
+                    "timeouts": entry["timeouts"],
+                    "matched": dict(entry["matched"]),
+                    "mean": round(mean, 2),
+                    "p95": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+                    "max": round(samples[-1], 2),
+                    "legacy_fixed_wait": legacy,
+                    "saved_per_wait": round(legacy - mean, 2) if legacy is not None else None
+                }
+            return report
+
+    def reset(self):
+        with self._lock:
+            self._providers.clear()
+
+
+wait_stats = WaitStats()
+
+
+def wait_for(driver, conditions, timeout, provider=None, poll=WAIT_POLL_INTERVAL):
+    """
+    Poll readiness predicates until one holds or ``timeout`` seconds pass.
+
+    Args:
+        driver: Selenium WebDriver
+        conditions: dict of name -> predicate(driver), checked in order on
+            every poll, e.g. {"results": ..., "no_data": ...}
+        timeout: Hard deadline in seconds
+        provider: Name to record the wait under in ``wait_stats``
+
+    Returns:
+        str: name of the condition that matched, or None on timeout
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    matched = None
+
+    while matched is None:
+        for name, predicate in conditions.items():
+            try:
+                if predicate(driver):
+                    matched = name
+                    break
+            except (StaleElementReferenceException, WebDriverException):
+                # The page is mid-update; try again on the next poll
+                continue
+        if matched is not None or time.monotonic() >= deadline:
+            break
+        time.sleep(poll)
+
+    if provider:
+        wait_stats.record(provider, time.monotonic() - start, matched)
+    return matched
+
+
+def latency_report():
+    """Shortcut for ``wait_stats.report()``"""
+    return wait_stats.report()
+
+
+def print_latency_report():
+    """Print the old-vs-new wait comparison, one line per provider"""
+    report = latency_report()
+    if not report:
+        return
+    print("\n⏱️  Wait latency (condition waits vs old fixed sleeps):")
+    for provider, row in sorted(report.items()):
+        legacy = f"{row['legacy_fixed_wait']}s" if row['legacy_fixed_wait'] is not None else "n/a"
+        print(f"   {provider:<15} old {legacy:>4} | new mean {row['mean']:.2f}s "
+              f"p95 {row['p95']:.2f}s max {row['max']:.2f}s | "
+              f"{row['waits']} waits, {row['timeouts']} timeouts")
+
+
+# ---------------------------------------------------------------------------
+# Readiness predicates. Each factory returns a callable taking the driver.
+# ---------------------------------------------------------------------------
+
+def element_present(css):
+    """At least one element matches the selector"""
+    return lambda driver: len(driver.find_elements(By.CSS_SELECTOR, css)) > 0
+
+
+def element_visible(css):
+    """At least one matching element is displayed"""
+    return lambda driver: any(el.is_displayed() for el in driver.find_elements(By.CSS_SELECTOR, css))
+
+
+def element_hidden(css):
+    """No matching element is displayed (gone or hidden)"""
+    return lambda driver: not any(el.is_displayed() for el in driver.find_elements(By.CSS_SELECTOR, css))
+
+
+def rows_present(table_css, min_cells=1):
+    """A matching table has a data row with at least ``min_cells`` cells"""
+    def predicate(driver):
+        for table in driver.find_elements(By.CSS_SELECTOR, table_css):
+            for row in table.find_elements(By.TAG_NAME, "tr"):
+                if len(row.find_elements(By.TAG_NAME, "td")) >= min_cells:
+                    return True
+        return False
+    return predicate
+
+
+def text_present(css, *needles):
+    """A matching element's visible text contains any of ``needles`` (case-insensitive)"""
+    lowered = [n.lower() for n in needles]
+
+    def predicate(driver):
+        for el in driver.find_elements(By.CSS_SELECTOR, css):
+            text = el.text.lower()
+            if any(n in text for n in lowered):
+                return True
+        return False
+    return predicate
+
+
+def table_with_text(*needles):
+    """Some table contains all of ``needles`` (case-insensitive), e.g. its headers"""
+    lowered = [n.lower() for n in needles]
+
+    def predicate(driver):
+        for table in driver.find_elements(By.TAG_NAME, "table"):
+            text = table.text.lower()
+            if all(n in text for n in lowered):
+                return True
+        return False
+    return predicate
+
+
+def document_ready(driver):
+    return driver.execute_script("return document.readyState") == "complete"
+
+
+def ajax_idle(driver):
+    """No jQuery requests outstanding (true on pages without jQuery)"""
+    return driver.execute_script(
+        "return document.readyState === 'complete' && "
+        "(!window.jQuery || window.jQuery.active === 0)"
+    )
+
+
+def page_replaced(driver):
+    """
+    Predicate that holds once the current document has been replaced,
+    e.g. after a form post-back. Create it before clicking submit.
+    """
+    old_root = driver.find_element(By.TAG_NAME, "html")
+
+    def predicate(current):
+        try:
+            old_root.tag_name
+            return False
+        except StaleElementReferenceException:
+            return document_ready(current)
+    return predicate
+
+
+def deep_text_present(*needles):
+    """Visible text, including open shadow roots, contains any of ``needles``"""
+    lowered = [n.lower() for n in needles]
+    script = """
+        function collect(root) {
+            let text = (root.innerText !== undefined ? root.innerText : root.textContent) || '';
+            const walker = document.createTreeWalker(root, NodeFilter.SHOW_ELEMENT);
+            let node = walker.currentNode;
+            while (node) {
+                if (node.shadowRoot) text += '\\n' + collect(node.shadowRoot);
+                node = walker.nextNode();
+            }
+            return text;
+        }
+        return document.body ? collect(document.body) : '';
+    """
+
+    def predicate(driver):
+        text = (driver.execute_script(script) or '').lower()
+        return any(n in text for n in lowered)
+    return predicate
+
+
+def all_of(*predicates):
+    return lambda driver: all(p(driver) for p in predicates)
+
+
+def any_of(*predicates):
+    return lambda driver: any(p(driver) for p in predicates)
@@ -0,0 +1,214 @@
+"""
+Warm Slots
+Browser tabs kept parked on a provider's tracking form, so a lookup only
+types, submits and extracts; navigation and popup handling happen in the
+background after each lookup
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from browser_profile import apply_resource_blocking
+from driver_pool import DriverPoolTimeout, is_session_error, is_tab_error
+
+# Providers to keep warm tabs for, e.g. 'ICL,Atlantic' (empty = off). Warm
+# tabs are taken out of the browser pool for good, so leave room for the rest
+WARM_SLOT_PROVIDERS = [p.strip() for p in os.getenv('WARM_SLOT_PROVIDERS', '').split(',') if p.strip()]
+WARM_SLOTS_PER_PROVIDER = int(os.getenv('WARM_SLOTS_PER_PROVIDER', '1'))
+# Re-park a tab that has sat this long, before the site's session/form expires
+WARM_SLOT_MAX_AGE = float(os.getenv('WARM_SLOT_MAX_AGE', '900'))
+# Seconds to wait before retrying a slot whose form failed to load
+WARM_SLOT_RETRY = float(os.getenv('WARM_SLOT_RETRY', '60'))
+
+READY, BUSY, WARMING, BROKEN = 'ready', 'busy', 'warming', 'broken'
+
+
+def _retiring(tab):
+    """True if the tab's browser is being recycled (see BrowserManager._recycle)"""
+    browser = getattr(tab, '_shared_browser', None)
+    return browser is not None and browser.retiring
+
+
+class WarmSlot:
+    """One parked tab for one provider"""
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.tab = None
+        self.state = WARMING
+        self.ready_at = 0.0
+        self.failed_at = 0.0
+        self.uses = 0
+
+
+class WarmSlots:
+    """
+    Parked tabs per provider, checked out of a browser pool.
+
+    ``checkout(provider)`` yields a ready tab, or None when every slot for
+    the provider is busy, still warming or broken; the caller then does a
+    normal cold lookup. After each use the tab is re-parked on a background
+    thread, in a fresh tab if its browser is being recycled.
+    """
+
+    def __init__(self, pool, preparers, per_provider=WARM_SLOTS_PER_PROVIDER,
+                 max_age=WARM_SLOT_MAX_AGE, retry_after=WARM_SLOT_RETRY):
+        self.pool = pool
+        self.preparers = dict(preparers)  # provider -> prepare(driver)
+        self.max_age = max_age
+        self.retry_after = retry_after
+
+        self._slots = {
+            provider: [WarmSlot(provider) for _ in range(per_provider)]
+            for provider in self.preparers
+        }
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, sum(len(s) for s in self._slots.values())),
+            thread_name_prefix='warm-slot'
+        )
+        self._hits = {provider: 0 for provider in self.preparers}
+        self._misses = {provider: 0 for provider in self.preparers}
+        self._closed = False
+
+    def start(self):
+        """Open and park every slot in the background"""
+        for slots in self._slots.values():
+            for slot in slots:
+                self._executor.submit(self._warm, slot)
+        return self
+
+    def _warm(self, slot, discard=False):
+        if discard and slot.tab is not None:
+            self.pool.release(slot.tab, discard=True)
+            slot.tab = None
+        elif slot.tab is not None and _retiring(slot.tab):
+            # Hand it back so the old browser can quit; park a tab in its replacement
+            self.pool.release(slot.tab)
+            slot.tab = None
+
+        try:
+            if slot.tab is None:
+                slot.tab = self.pool.acquire()
+            apply_resource_blocking(slot.tab, slot.provider)
+            self.preparers[slot.provider](slot.tab)
+        except Exception as e:
+            if not isinstance(e, DriverPoolTimeout):
+                print(f"⚠️ Warm slot for {slot.provider} failed to load: {str(e)[:100]}")
+            if slot.tab is not None and (is_tab_error(e) or is_session_error(e)):
+                self.pool.release(slot.tab, discard=True)
+                slot.tab = None
+            with self._lock:
+                slot.state = BROKEN
+                slot.failed_at = time.monotonic()
+            return
+
+        with self._lock:
+            if self._closed:
+                return
+            slot.state = READY
+            slot.ready_at = time.monotonic()
+
+    def _take(self, provider):
+        """A ready slot for the provider (marked busy), re-warming stale/broken ones on the way"""
+        now = time.monotonic()
+        rewarm = []
+        taken = None
+        with self._lock:
+            if self._closed:
+                return None
+            for slot in self._slots.get(provider, []):
+                if slot.state == READY and (now - slot.ready_at > self.max_age or _retiring(slot.tab)):
+                    slot.state = WARMING
+                    rewarm.append(slot)
+                elif slot.state == BROKEN and now - slot.failed_at > self.retry_after:
+                    slot.state = WARMING
+                    rewarm.append(slot)
+                elif slot.state == READY and taken is None:
+                    slot.state = BUSY
+                    taken = slot
+
+            if provider in self._hits:
+                if taken:
+                    self._hits[provider] += 1
+                else:
+                    self._misses[provider] += 1
+
+        for slot in rewarm:
+            self._executor.submit(self._warm, slot)
+        return taken
+
+    @contextmanager
+    def checkout(self, provider):
+        """
+        Yield a tab parked on ``provider``'s form, or None if none is ready.
+        The tab is re-parked afterwards; one whose tab/session died is
+        replaced with a fresh tab from the pool.
+        """
+        slot = self._take(provider)
+        if slot is None:
+            yield None
+            return
+
+        discard = False
+        try:
+            yield slot.tab
+        except Exception as e:
+            discard = is_tab_error(e) or is_session_error(e)
+            raise
+        finally:
+            slot.uses += 1
+            with self._lock:
+                slot.state = WARMING
+            if not self._closed:
+                self._executor.submit(self._warm, slot, discard)
+
+    def stats(self):
+        """Slot states and warm hit/miss counts per provider"""
+        with self._lock:
+            report = {}
+            for provider, slots in self._slots.items():
+                states = [slot.state for slot in slots]
+                report[provider] = {
+                    state: states.count(state) for state in (READY, BUSY, WARMING, BROKEN)
+                }
+                report[provider].update(
+                    hits=self._hits[provider],
+                    misses=self._misses[provider],
+                    uses=sum(slot.uses for slot in slots)
+                )
+            return report
+
+    def close(self):
+        """Stop re-warming and hand every parked tab back to the pool"""
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for slots in self._slots.values():
+            for slot in slots:
+                if slot.tab is not None and slot.state != BUSY:
+                    self.pool.release(slot.tab, discard=True)
+                    slot.tab = None
+
+
+def warm_slots_for(pool, providers, names=WARM_SLOT_PROVIDERS, per_provider=WARM_SLOTS_PER_PROVIDER):
+    """
+    WarmSlots for the named providers that can park a tab (have ``prepare``),
+    already warming. With none configured it holds no slots and every
+    checkout yields None.
+    """
+    preparers = {}
+    for name in names:
+        tracker = providers.get(name)
+        if tracker is None or tracker.prepare is None:
+            print(f"Warning: no warm slot for '{name}' (unknown provider or no tracking form)")
+            continue
+        preparers[name] = tracker.prepare
+    if per_provider < 1:
+        preparers = {}
+    if preparers:
+        print(f"🔥 Warm slots: {', '.join(preparers)} x {per_provider}")
+    return WarmSlots(pool, preparers, per_provider).start()
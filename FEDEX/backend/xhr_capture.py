@@ -0,0 +1,281 @@
+"""
+XHR Capture
+Reads a provider's tracking response straight off the network through
+DevTools (chromedriver's performance log + Network.getResponseBody) and
+parses the payload, instead of waiting for the page to render it. The DOM
+scrapers stay as the fallback whenever nothing usable is captured.
+"""
+
+import base64
+import json
+import os
+import re
+import threading
+import time
+
+from selenium.common.exceptions import WebDriverException
+
+from tracking_parsers import parse_atlantic, parse_dhl_json, parse_icl, parse_pxc
+
+# Off by default: needs performance logging on every scraping browser
+XHR_CAPTURE = os.getenv('XHR_CAPTURE', 'false').lower() == 'true'
+XHR_CAPTURE_TIMEOUT = float(os.getenv('XHR_CAPTURE_TIMEOUT', '10'))
+XHR_CAPTURE_POLL = float(os.getenv('XHR_CAPTURE_POLL', '0.1'))
+# After this many lookups in a row without a usable payload (endpoint moved,
+# response changed) a provider goes straight to the DOM for XHR_CAPTURE_BACKOFF seconds
+XHR_CAPTURE_MAX_MISSES = int(os.getenv('XHR_CAPTURE_MAX_MISSES', '3'))
+XHR_CAPTURE_BACKOFF = int(os.getenv('XHR_CAPTURE_BACKOFF', '600'))
+# Events of other tabs are kept this long for their own capture to read
+XHR_EVENT_RETENTION = 60
+
+NETWORK_EVENTS = ('Network.responseReceived', 'Network.loadingFinished', 'Network.loadingFailed')
+
+
+class CaptureRule:
+    """
+    Which response carries a provider's tracking data and how to parse it.
+
+    Args:
+        url: regex searched in the response URL
+        parse: ``parse(body, awb)`` returning a tracking dict or None
+        types: DevTools resource types to consider (XHR/Fetch for AJAX,
+            Document for form post-backs)
+    """
+
+    def __init__(self, url, parse, types=('XHR', 'Fetch')):
+        self.url = re.compile(url, re.IGNORECASE)
+        self.parse = parse
+        self.types = types
+
+    def matches(self, response, resource_type):
+        return resource_type in self.types and bool(self.url.search(response.get('url', '')))
+
+
+def _with_data(parse):
+    """Wrap an HTML parser so 'nothing found' (no result, or Unknown and no events) reads as None"""
+    def parse_body(body, awb):
+        result = parse(body, awb)
+        if not result or (result.get('status') in (None, 'Unknown') and not result.get('timeline')):
+            return None
+        return result
+    return parse_body
+
+
+def _html_or_json(parse):
+    """For endpoints that answer with HTML, either bare or wrapped in JSON ({"html": ...}, {"data": ...})"""
+    def parse_body(body, awb):
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return parse(body, awb)
+        if isinstance(payload, dict):
+            for key in ('html', 'data', 'result', 'content'):
+                if isinstance(payload.get(key), str):
+                    return parse(payload[key], awb)
+        return None
+    return parse_body
+
+
+CAPTURE_RULES = {
+    'DHL': CaptureRule(r'dhl\.com/.*utapi', parse_dhl_json),
+    'Atlantic': CaptureRule(r'atlanticcourier\.net/.*(track|ajax)', _with_data(parse_atlantic)),
+    'ICL': CaptureRule(r'iclexpress\.in/.*(track|admin-ajax)', _with_data(_html_or_json(parse_icl))),
+    # The PXC form posts back the whole page
+    'PXC Pacific': CaptureRule(r'pacificexp\.net/tracking-details', _with_data(parse_pxc),
+                               types=('Document', 'XHR'))
+}
+
+# Override a rule's URL pattern when a site moves its endpoint, e.g.
+# 'DHL=dhl\.com/.*shipments;ICL=iclexpress\.in/api/'
+for _entry in filter(None, (e.strip() for e in os.getenv('XHR_CAPTURE_URLS', '').split(';'))):
+    _provider, _, _pattern = _entry.partition('=')
+    if _provider.strip() in CAPTURE_RULES and _pattern.strip():
+        _rule = CAPTURE_RULES[_provider.strip()]
+        CAPTURE_RULES[_provider.strip()] = CaptureRule(_pattern.strip(), _rule.parse, _rule.types)
+
+
+def apply_network_capture(chrome_options):
+    """Turn on the DevTools network events capture reads (no-op unless XHR_CAPTURE)"""
+    if XHR_CAPTURE:
+        chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        chrome_options.add_experimental_option('perfLoggingPrefs', {'enableNetwork': True, 'enablePage': False})
+    return chrome_options
+
+
+class NetworkLog:
+    """
+    Network events of one browser session, split per tab.
+
+    chromedriver keeps one performance log per session and ``get_log``
+    empties it, so tabs sharing a browser read through this instead and
+    each only takes its own events (tagged with the tab's target id).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = {}  # webview -> [(received_at, method, params)]
+
+    def drain(self, driver):
+        """Pull new events from the browser into the per-tab buckets"""
+        now = time.monotonic()
+        with self._lock:
+            for entry in driver.get_log('performance') or []:
+                try:
+                    record = json.loads(entry['message'])
+                except (KeyError, ValueError):
+                    continue
+                message = record.get('message', {})
+                if message.get('method') in NETWORK_EVENTS:
+                    self._events.setdefault(record.get('webview'), []).append(
+                        (now, message['method'], message.get('params', {}))
+                    )
+            for webview, events in list(self._events.items()):
+                events[:] = [e for e in events if now - e[0] < XHR_EVENT_RETENTION]
+                if not events:
+                    del self._events[webview]
+
+    def take(self, driver, webview):
+        """New events for one tab, oldest first"""
+        self.drain(driver)
+        with self._lock:
+            return [(method, params) for _, method, params in self._events.pop(webview, [])]
+
+
+_log_lock = threading.Lock()
+
+
+def network_log(driver):
+    """The NetworkLog of the browser session behind ``driver`` (a tab or a plain driver)"""
+    owner = getattr(getattr(driver, '_shared_browser', None), 'driver', driver)
+    with _log_lock:
+        log = getattr(owner, '_network_log', None)
+        if log is None:
+            log = owner._network_log = NetworkLog()
+        return log
+
+
+def discard_network_log(driver):
+    """Empty chromedriver's buffer for a session nobody is capturing on, so it doesn't grow"""
+    if XHR_CAPTURE:
+        try:
+            network_log(driver).drain(driver)
+        except (WebDriverException, AttributeError):
+            pass
+
+
+class XhrCapture:
+    """
+    Watch one tab for a provider's tracking response. Create it before the
+    navigation or click that triggers the request, then call ``result()``.
+    """
+
+    def __init__(self, driver, provider, rule):
+        self.driver = driver
+        self.provider = provider
+        self.rule = rule
+        self.log = network_log(driver)
+        # TabDriver knows its handle; a plain driver asks (chromedriver handles are target ids)
+        self.webview = getattr(driver, 'handle', None) or driver.current_window_handle
+        self.log.take(driver, self.webview)  # Skip anything already loaded
+
+    def _body(self, request_id):
+        response = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+        body = response.get('body', '')
+        if response.get('base64Encoded'):
+            body = base64.b64decode(body).decode('utf-8', 'replace')
+        return body
+
+    def response(self, timeout=XHR_CAPTURE_TIMEOUT):
+        """
+        Body of the first matching response to finish loading, or None if
+        none did within ``timeout`` (or the request failed)
+        """
+        deadline = time.monotonic() + timeout
+        pending = set()
+        while True:
+            for method, params in self.log.take(self.driver, self.webview):
+                request_id = params.get('requestId')
+                if method == 'Network.responseReceived':
+                    if self.rule.matches(params.get('response', {}), params.get('type')):
+                        pending.add(request_id)
+                elif request_id in pending:
+                    if method == 'Network.loadingFailed':
+                        return None
+                    return self._body(request_id)
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(XHR_CAPTURE_POLL)
+
+    def result(self, awb_number, timeout=XHR_CAPTURE_TIMEOUT, parse=None):
+        """
+        Parsed tracking dict from the captured payload, or None to fall back
+        to the DOM. ``parse`` replaces the rule's parser, e.g. to split a
+        multi-number payload (``awb_number`` is then whatever it expects).
+        """
+        start = time.monotonic()
+        try:
+            body = self.response(timeout)
+            result = (parse or self.rule.parse)(body, awb_number) if body else None
+        except (WebDriverException, ValueError, TypeError, KeyError) as e:
+            print(f"   Warning: {self.provider} XHR capture failed ({str(e)[:80]}), reading the page instead")
+            result = None
+        capture_stats.record(self.provider, bool(result))
+        if result:
+            print(f"   ⚡ {self.provider} result captured from XHR in {time.monotonic() - start:.2f}s")
+        return result
+
+
+class CaptureStats:
+    """Hits/misses per provider, pausing capture for providers that keep missing"""
+
+    def __init__(self, max_misses=XHR_CAPTURE_MAX_MISSES, backoff=XHR_CAPTURE_BACKOFF):
+        self.max_misses = max_misses
+        self.backoff = backoff
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._misses = {}       # provider -> consecutive misses
+        self._skip_until = {}   # provider -> time.time() when capture is retried
+
+    def record(self, provider, hit):
+        with self._lock:
+            counts = self._counts.setdefault(provider, {"hits": 0, "misses": 0})
+            counts["hits" if hit else "misses"] += 1
+            if hit:
+                self._misses[provider] = 0
+                return
+            self._misses[provider] = self._misses.get(provider, 0) + 1
+            if self._misses[provider] >= self.max_misses:
+                print(f"⚠️ {provider}: no XHR payload {self._misses[provider]} times in a row, "
+                      f"reading the page only for {self.backoff}s")
+                self._skip_until[provider] = time.time() + self.backoff
+                self._misses[provider] = 0
+
+    def paused(self, provider):
+        with self._lock:
+            return time.time() < self._skip_until.get(provider, 0)
+
+    def report(self):
+        with self._lock:
+            return {
+                provider: dict(counts, paused=time.time() < self._skip_until.get(provider, 0))
+                for provider, counts in self._counts.items()
+            }
+
+
+capture_stats = CaptureStats()
+
+
+def xhr_capture(driver, provider):
+    """
+    An XhrCapture for ``provider`` on this driver, or None when capture is
+    off, the provider has no rule or keeps missing, or the browser has no
+    performance log
+    """
+    rule = CAPTURE_RULES.get(provider)
+    if not XHR_CAPTURE or rule is None or capture_stats.paused(provider):
+        return None
+    try:
+        return XhrCapture(driver, provider, rule)
+    except (WebDriverException, AttributeError) as e:
+        print(f"Warning: XHR capture unavailable for {provider} ({str(e)[:80]})")
+        return None
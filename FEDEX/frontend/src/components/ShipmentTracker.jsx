@@ -106,292 +106,28 @@ const ShipmentTracker = ({ shipment }) => {
     const [animatedPosition, setAnimatedPosition] = useState(null);
     const [shipmentRotation, setShipmentRotation] = useState(0);
     const [isAnimating, setIsAnimating] = useState(false);
-    const [checkpoints, setCheckpoints] = useState([]);
-    const [loading, setLoading] = useState(true);
     const [isFullScreen, setIsFullScreen] = useState(false);
 
 
-    // Parse location string to extract meaningful search terms
-    const parseLocation = (locationStr) => {
-        if (!locationStr) return '';
-
-        let cleaned = locationStr.trim();
-
-        // Extract country code in brackets [XX]
-        const countryCodeMatch = cleaned.match(/\[([A-Z]{2})\]/);
-        const countryCode = countryCodeMatch ? countryCodeMatch[1] : null;
-
-        // Remove brackets content
-        cleaned = cleaned.replace(/\[.*?\]/g, '').trim();
-
-        // Country code to name mapping
-        const countryMap = {
-            'IE': 'Ireland',
-            'DE': 'Germany',
-            'GB': 'United Kingdom',
-            'UK': 'United Kingdom',
-            'US': 'United States',
-            'IN': 'India',
-            'FR': 'France',
-            'IT': 'Italy',
-            'ES': 'Spain',
-            'NL': 'Netherlands',
-            'BE': 'Belgium',
-            'CH': 'Switzerland',
-            'AT': 'Austria',
-            'CN': 'China',
-            'JP': 'Japan',
-            'AE': 'United Arab Emirates',
-            'SA': 'Saudi Arabia',
-            'SG': 'Singapore',
-            'MY': 'Malaysia',
-            'TH': 'Thailand'
-        };
-
-        // Special handling for Indian states/cities
-        const indianCities = {
-            'TELANGANA': 'Hyderabad, India',
-            'HYDERABAD': 'Hyderabad, India',
-            'MUMBAI': 'Mumbai, India',
-            'DELHI': 'Delhi, India',
-            'BANGALORE': 'Bangalore, India',
-            'CHENNAI': 'Chennai, India',
-            'KOLKATA': 'Kolkata, India'
-        };
-
-        // Special handling for US cities
-        const usCities = {
-            'EL PASO': 'El Paso, Texas, United States',
-            'NEW YORK': 'New York, United States',
-            'LOS ANGELES': 'Los Angeles, United States',
-            'CHICAGO': 'Chicago, United States',
-            'HOUSTON': 'Houston, United States'
-        };
-
-        // Check for Indian cities
-        const upperCleaned = cleaned.toUpperCase();
-        for (const [key, value] of Object.entries(indianCities)) {
-            if (upperCleaned.includes(key)) {
-                return value;
-            }
-        }
-
-        // Check for US cities
-        for (const [key, value] of Object.entries(usCities)) {
-            if (upperCleaned.includes(key)) {
-                return value;
-            }
-        }
-
-        // If we have a country code, use it
-        if (countryCode && countryMap[countryCode]) {
-            if (cleaned) {
-                return `${cleaned}, ${countryMap[countryCode]}`;
-            }
-            return countryMap[countryCode];
-        }
-
-        // Check if location already contains country name
-        const knownCountries = ['GERMANY', 'FRANCE', 'ITALY', 'SPAIN', 'INDIA', 'CHINA', 'UNITED STATES'];
-        for (const country of knownCountries) {
-            if (upperCleaned.includes(country)) {
-                return cleaned;
-            }
-        }
-
-        return cleaned;
-    };
-
-
-
-    // Geocode location name to coordinates with retry
-    const geocodeLocation = async (locationName) => {
-        const parsedLocation = parseLocation(locationName);
-
-        if (!parsedLocation) return null;
-
-        try {
-            // Reduced delay to speed up loading (100ms between requests)
-            await new Promise(resolve => setTimeout(resolve, 100));
-
-            const response = await fetch(
-                `https://nominatim.openstreetmap.org/search?format=json&q=${encodeURIComponent(parsedLocation)}&limit=1`,
-                {
-                    headers: {
-                        'User-Agent': 'FedEx-Tracking-App/1.0'
-                    }
-                }
-            );
-
-            if (!response.ok) {
-                console.warn(`Geocoding HTTP error for ${locationName}:`, response.status);
-                return null;
-            }
-
-            const data = await response.json();
-
-            if (data && data.length > 0) {
-                const coords = {
-                    lat: parseFloat(data[0].lat),
-                    lng: parseFloat(data[0].lon)
-                };
-                console.log(`Geocoded "${locationName}" to:`, coords);
-                return coords;
-            }
-
-            console.warn(`No geocoding results for: ${locationName}`);
-            return null;
-        } catch (error) {
-            console.error('Geocoding error for', locationName, error);
-            return null;
-        }
-    };
-
-    // Parse timeline and geocode locations
-    useEffect(() => {
-        const loadCheckpoints = async () => {
-            if (!shipment?.timeline || !shipment?.coordinates) {
-                setLoading(false);
-                return;
-            }
-
-            const { origin, destination } = shipment.coordinates;
-
-            // Strict validation of origin and destination coordinates
-            if (!origin || !destination ||
-                !Number.isFinite(Number(origin.lat)) || !Number.isFinite(Number(origin.lng)) ||
-                !Number.isFinite(Number(destination.lat)) || !Number.isFinite(Number(destination.lng)) ||
-                origin.lat < -90 || origin.lat > 90 || origin.lng < -180 || origin.lng > 180 ||
-                destination.lat < -90 || destination.lat > 90 || destination.lng < -180 || destination.lng > 180) {
-                console.error('Invalid origin/destination coordinates:', { origin, destination });
-                setLoading(false);
-                return;
-            }
-
-            // Ensure coordinates are numbers
-            const validOrigin = { lat: Number(origin.lat), lng: Number(origin.lng) };
-            const validDestination = { lat: Number(destination.lat), lng: Number(destination.lng) };
-
-            // Sort timeline chronologically (Oldest -> Newest) to ensure correct path order
-            // This prevents zig-zag lines caused by events being out of order
-            const sortTimeline = (events) => {
-                return [...events].sort((a, b) => {
-                    const dateA = parseDate(a.date);
-                    const dateB = parseDate(b.date);
-                    return dateA - dateB;
-                });
-            };
-
-            // Helper to parse date strings like "10/11/2025 6:21 PM"
-            const parseDate = (dateStr) => {
-                if (!dateStr) return 0;
-                try {
-                    // Try parsing "DD/MM/YYYY HH:MM AM/PM"
-                    // Remove any non-standard chars and normalize
-                    const cleanStr = dateStr.replace(/(\d+)(st|nd|rd|th)/, '$1');
-
-                    const parts = cleanStr.match(/(\d{1,2})[\/.-](\d{1,2})[\/.-](\d{4})\s+(\d{1,2}):(\d{2})\s*([APap][Mm])?/);
-
-                    if (parts) {
-                        const day = parseInt(parts[1]);
-                        const month = parseInt(parts[2]) - 1; // 0-indexed
-                        const year = parseInt(parts[3]);
-                        let hour = parseInt(parts[4]);
-                        const minute = parseInt(parts[5]);
-                        const meridian = parts[6] ? parts[6].toUpperCase() : null;
-
-                        if (meridian === 'PM' && hour < 12) hour += 12;
-                        if (meridian === 'AM' && hour === 12) hour = 0;
-
-                        return new Date(year, month, day, hour, minute).getTime();
-                    }
-
-                    // Fallback to standard date parse
-                    return new Date(dateStr).getTime();
-                } catch (e) {
-                    return 0;
-                }
-            };
-
-            // Sort the timeline
-            let timeline = sortTimeline(shipment.timeline);
-
-            // If sort resulted in invalid order (all 0s) or no change,
-            // fall back to simple reverse assuming Newest-First input
-            const times = timeline.map(e => parseDate(e.date));
-            const isSorted = times.every((t, i) => i === 0 || t >= times[i - 1]);
-
-            if (!isSorted || times.every(t => t === 0) || times.every(t => isNaN(t))) {
-                console.log("Date sorting failed or inconclusive, falling back to reverse");
-                timeline = [...shipment.timeline].reverse();
-            }
-
-            setLoading(true);
-
-            const checkpointPromises = timeline.map(async (event, index) => {
-                let coords;
-                const isFirst = index === 0;
-                const isLast = index === timeline.length - 1;
-
-                if (isFirst) {
-                    // First chronological event = origin (where shipment started)
-                    coords = validOrigin;
-                    console.log(`Checkpoint ${index}: Origin -`, event.location, coords);
-                } else if (isLast) {
-                    // Last chronological event = destination (where shipment is going)
-                    coords = validDestination;
-                    console.log(`Checkpoint ${index}: Destination -`, event.location, coords);
-                } else {
-                    // Middle checkpoints - only geocode key waypoints for faster loading
-                    const shouldGeocode = timeline.length <= 5 || index % 3 === 0;
-
-                    if (shouldGeocode) {
-                        coords = await geocodeLocation(event.location);
-                    }
-
-                    // If geocoding fails or skipped, skip this checkpoint
-                    if (!coords) {
-                        if (shouldGeocode) {
-                            console.warn(`Skipping checkpoint ${index}: geocoding failed for "${event.location}"`);
-                        }
-                        return null;
-                    }
-                }
-
-                // Strict validation of coordinates before returning
-                if (!coords ||
-                    typeof coords !== 'object' ||
-                    !Number.isFinite(coords.lat) ||
-                    !Number.isFinite(coords.lng) ||
-                    coords.lat < -90 || coords.lat > 90 ||
-                    coords.lng < -180 || coords.lng > 180) {
-                    console.error(`Invalid coordinates for checkpoint ${index}:`, event.location, coords);
-                    return null;
-                }
-
-                return {
-                    id: index,
-                    status: event.status,
-                    location: event.location,
-                    date: event.date,
-                    completed: event.completed,
-                    coordinates: {
-                        lat: Number(coords.lat),
-                        lng: Number(coords.lng)
-                    },
-                    isFirst,
-                    isLast
-                };
-            });
-
-            const resolvedCheckpoints = (await Promise.all(checkpointPromises)).filter(cp => cp !== null);
-            console.log('Total valid checkpoints:', resolvedCheckpoints.length);
-            setCheckpoints(resolvedCheckpoints);
-            setLoading(false);
-        };
-
-        loadCheckpoints();
-        // eslint-disable-next-line react-hooks/exhaustive-deps
+    // Checkpoints come pre-geocoded from the backend, oldest first
+    const checkpoints = useMemo(() => {
+        const routeCheckpoints = shipment?.route?.checkpoints || [];
+
+        return routeCheckpoints
+            .filter(cp =>
+                Number.isFinite(cp.lat) && Number.isFinite(cp.lng) &&
+                cp.lat >= -90 && cp.lat <= 90 && cp.lng >= -180 && cp.lng <= 180
+            )
+            .map((cp, index, valid) => ({
+                id: index,
+                status: cp.status,
+                location: cp.location,
+                date: cp.date,
+                completed: cp.completed,
+                coordinates: { lat: cp.lat, lng: cp.lng },
+                isFirst: index === 0,
+                isLast: index === valid.length - 1
+            }));
     }, [shipment]);
 
     // Determine current checkpoint (last completed or second-to-last for animation)
@@ -482,10 +218,13 @@ const ShipmentTracker = ({ shipment }) => {
         setAnimatedPosition(checkpoint.coordinates);
     };
 
-    // Calculate route line
+    // Route line (precomputed by the backend, repeated stops already collapsed)
     const routeLine = useMemo(() => {
+        if (shipment?.route?.polyline?.length) {
+            return shipment.route.polyline;
+        }
         return checkpoints.map(cp => [cp.coordinates.lat, cp.coordinates.lng]);
-    }, [checkpoints]);
+    }, [shipment, checkpoints]);
 
     // Active checkpoint for display
     const activeCheckpoint = selectedCheckpoint !== null
@@ -498,18 +237,6 @@ const ShipmentTracker = ({ shipment }) => {
     // Shipment position (animated or selected)
     const shipmentPosition = animatedPosition || activeCheckpoint?.coordinates;
 
-    if (loading) {
-        return (
-            <div className="flex items-center justify-center h-[600px] bg-[#F5F5F5] rounded-xl">
-                <div className="text-center">
-                    <div className="w-16 h-16 border-4 border-brand-500 border-t-transparent rounded-full animate-spin mx-auto mb-4"></div>
-                    <p className="text-slate-600 font-medium">Loading tracking data...</p>
-                    <p className="text-xs text-slate-400 mt-1">Geocoding checkpoint locations</p>
-                </div>
-            </div>
-        );
-    }
-
     if (!shipment || checkpoints.length === 0) {
         return (
             <div className="flex items-center justify-center h-full min-h-[500px] bg-[#F5F5F5] rounded-xl">
@@ -652,7 +379,7 @@ const ShipmentTracker = ({ shipment }) => {
                                     />
                                     {/* Completed portion - purple dotted line */}
                                     <Polyline
-                                        positions={routeLine.slice(0, currentCheckpointIndex + 1)}
+                                        positions={checkpoints.slice(0, currentCheckpointIndex + 1).map(cp => [cp.coordinates.lat, cp.coordinates.lng])}
                                         color="#4D148C"
                                         weight={3}
                                         opacity={0.9}
@@ -113,7 +113,10 @@ const ShipmentMap = ({ shipment, animated = true, isFullScreen = false }) => {
         return points;
     };
 
-    const routePoints = createCurvedRoute(origin, destination);
+    // Prefer the backend's full route through every timeline stop
+    const routePoints = shipment.route?.polyline?.length > 1
+        ? shipment.route.polyline
+        : createCurvedRoute(origin, destination);
 
     const originIcon = new L.Icon({
         iconUrl: 'https://raw.githubusercontent.com/pointhi/leaflet-color-markers/master/img/marker-icon-2x-grey.png',
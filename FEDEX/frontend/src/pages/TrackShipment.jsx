@@ -6,6 +6,15 @@ import StatusBadge from '../components/StatusBadge';
 
 const PROVIDERS = ['FedEx', 'DHL', 'Atlantic', 'Courier Wala', 'ICL', 'PXC Pacific', 'United Express'];
 
+// Backend reports whether the result came from its cache and how old it is
+const formatResultAge = (cache) => {
+    if (!cache.hit || cache.age < 60) return 'Just now';
+    const minutes = Math.round(cache.age / 60);
+    if (minutes < 60) return `${minutes} min ago`;
+    const hours = Math.round(minutes / 60);
+    return `${hours} hr${hours > 1 ? 's' : ''} ago`;
+};
+
 const TrackShipment = () => {
     const location = useLocation();
     const [awbNumber, setAwbNumber] = useState('');
@@ -262,6 +271,14 @@ const TrackShipment = () => {
                                         <p className="text-xs text-slate-500 uppercase tracking-wider mb-1">Est. Delivery</p>
                                         <p className="text-brand-600 font-semibold">{searchResult.estimatedDelivery || '-'}</p>
                                     </div>
+
+                                    {/* Freshness */}
+                                    {searchResult.cache && (
+                                        <div>
+                                            <p className="text-xs text-slate-500 uppercase tracking-wider mb-1">Updated</p>
+                                            <p className="text-[#222222] font-semibold">{formatResultAge(searchResult.cache)}</p>
+                                        </div>
+                                    )}
                                 </div>
                             </div>
 